@@ -0,0 +1,273 @@
+from google.genai import types
+
+import asyncio
+import time
+from functools import cache
+from typing import TYPE_CHECKING, List, Union
+
+from functions.call_function import ToolDispatcher, call_functions
+from functions.tool_cache import tool_cache
+from functions.run_python import run_stats
+from context_budget import compact_history
+import blob_store
+from repeated_calls import repeated_calls
+from tracing import tracer
+from config import MAX_TOOL_WORKERS, MAX_ITERATIONS, CONTEXT_TOKEN_BUDGET
+
+if TYPE_CHECKING:
+    from google import genai
+    from session_log import SessionLog
+
+MODEL = "gemini-2.0-flash-001"
+
+SYSTEM_PROMPT = """
+You are a helpful AI coding agent.
+
+When a user asks a question or makes a request, make a function call plan.
+Don't ask for more information.
+Use the functions to get information about the files, search and read file contents, run Python files and tests, and write files as needed to fulfill the user's request.
+You can perform the following operations:
+
+- List files and directories
+- Read file contents
+- Search file contents for text or a regular expression (prefer this over reading files one by one to find something)
+- Execute Python files with optional arguments
+- Run the unittest tests affected by your changes and get a pass/fail summary (prefer this over running test files yourself)
+- Write or overwrite files
+- Edit part of a file with search/replace edits or a unified diff (prefer this over rewriting a whole file to change a few lines)
+
+All paths you provide should be relative to the working directory. You do not need to specify the working directory in your function calls as it is automatically injected for security reasons.
+"""
+
+
+@cache
+def available_functions():
+    """types.Tool is a collection of functions the model can call"""
+    from functions.get_files_info import get_files_info_schema
+    from functions.get_file_content import get_file_content_schema
+    from functions.run_python import run_python_file_schema
+    from functions.run_tests import run_tests_schema
+    from functions.write_file import write_file_schema
+    from functions.edit_file import edit_file_schema
+    from functions.search_files import search_files_schema
+
+    return types.Tool(
+        function_declarations=[
+            get_files_info_schema,
+            get_file_content_schema,
+            run_python_file_schema,
+            run_tests_schema,
+            write_file_schema,
+            edit_file_schema,
+            search_files_schema
+        ]
+    )
+
+
+def generation_config():
+    return types.GenerateContentConfig(
+        system_instruction=SYSTEM_PROMPT,
+        tools=[available_functions()]
+    )
+
+
+def print_usage(response, iteration: int, max_iterations: int, tokens_before: int, tokens_after: int, timings: dict = None):
+    print(f"\nIteration {iteration}/{max_iterations}")
+    if tokens_after < tokens_before:
+        print(f"Context compacted: ~{tokens_before} -> ~{tokens_after} tokens (saved ~{tokens_before - tokens_after})")
+    print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
+    print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
+    print(tool_cache.stats())
+    print(blob_store.store.stats())
+    print(repeated_calls.stats())
+    print(run_stats.stats())
+    if timings:
+        for label, key in (("Time to first token", "first_token"), ("Time to first tool call", "first_tool")):
+            if timings[key] is not None:
+                print(f"{label}: {timings[key] * 1000:.0f} ms")
+    print("---------------------------------------------------------------")
+
+
+def function_results_to_messages(function_call_results: List[types.Content], verbose: bool):
+    """Turns the tool results of one turn into user messages, in call order."""
+    user_msgs = []
+    for function_call_result in function_call_results:
+        function_response = function_call_result.parts[0].function_response.response
+
+        if not function_response:
+            raise ValueError("Function response is empty")
+
+        result_text = (
+            function_response["result"]
+            if isinstance(function_response, dict) and "result" in function_response
+            else str(function_response)
+        )
+
+        if verbose:
+            print(f"-> {result_text}")
+
+        # Large outputs live in the blob store; history keeps a reference
+        user_msgs.append(types.Content(
+            role="user",
+            parts=[types.Part(text=blob_store.spill(result_text))]
+        ))
+    return user_msgs
+
+
+def add_messages(messages: List, contents: List, session_log: "SessionLog" = None):
+    """Adds contents to the history, and to the session log as they are produced."""
+    messages.extend(contents)
+    if session_log:
+        session_log.append(contents)
+
+
+def finish_interrupted_turn(messages: List, verbose: bool, max_tool_workers: int = MAX_TOOL_WORKERS, session_log: "SessionLog" = None):
+    """
+    A resumed history that ends with the model's function calls stopped
+    while they ran, before their results were logged. Runs just those calls
+    and adds their results, so the loop can carry on from there.
+    """
+    if not messages or messages[-1].role != "model":
+        return
+    function_calls = [part.function_call for part in messages[-1].parts or [] if part.function_call]
+    if function_calls:
+        add_messages(messages, function_results_to_messages(call_functions(function_calls, verbose, max_tool_workers), verbose), session_log)
+
+
+def stream_response(client: "genai.Client", contents: List, dispatcher: ToolDispatcher):
+    """
+    Consumes one streamed model turn. Text is printed as it arrives and each
+    function call is handed to `dispatcher` as soon as its chunk is received,
+    so tools start while the rest of the turn is still streaming.
+
+    Returns the whole turn assembled into one response, plus the time to the
+    first text and to the first function call in seconds (None if absent).
+    """
+    start = time.perf_counter()
+    timings = {"first_token": None, "first_tool": None}
+    parts = []
+    usage_metadata = None
+
+    for chunk in client.models.generate_content_stream(model=MODEL, contents=contents, config=generation_config()):
+        if chunk.usage_metadata:
+            usage_metadata = chunk.usage_metadata
+        if not chunk.candidates or not chunk.candidates[0].content:
+            continue
+
+        for part in chunk.candidates[0].content.parts or []:
+            if part.text:
+                if timings["first_token"] is None:
+                    timings["first_token"] = time.perf_counter() - start
+                print(part.text, end="", flush=True)
+                # Merge text pieces so history holds one part per run of text
+                if parts and parts[-1].text is not None and not parts[-1].thought:
+                    parts[-1] = types.Part(text=parts[-1].text + part.text)
+                    continue
+            if part.function_call:
+                if timings["first_tool"] is None:
+                    timings["first_tool"] = time.perf_counter() - start
+                dispatcher.submit(part.function_call)
+            parts.append(part)
+
+    response = types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage_metadata or types.GenerateContentResponseUsageMetadata(),
+    )
+    return response, timings
+
+
+def record_usage(span: dict, response):
+    """Copies a model response's token counts and number of function calls onto its trace span."""
+    usage = response.usage_metadata
+    span["prompt_tokens"] = usage.prompt_token_count if usage else None
+    span["response_tokens"] = usage.candidates_token_count if usage else None
+    span["function_calls"] = len(response.function_calls or [])
+
+
+def generate_content(client: "genai.Client", message: Union[List, str], verbose: bool, max_tool_workers: int = MAX_TOOL_WORKERS, max_iterations: int = MAX_ITERATIONS, context_budget: int = CONTEXT_TOKEN_BUDGET, stream: bool = False, session_log: "SessionLog" = None):
+    for i in range(max_iterations):
+        try:
+            with tracer.span("iteration", str(i + 1)) as iteration_span:
+                contents, tokens_before, tokens_after = compact_history(message, context_budget)
+                iteration_span.update(context_tokens=tokens_after, compacted_tokens=tokens_before - tokens_after)
+
+                with ToolDispatcher(verbose, max_tool_workers) as dispatcher:
+                    with tracer.span("model", MODEL) as model_span:
+                        if stream:
+                            # Function calls are already running by the time this returns
+                            response, timings = stream_response(client, contents, dispatcher)
+                            for key, seconds in timings.items():
+                                if seconds is not None:
+                                    model_span[f"{key}_ms"] = round(seconds * 1000, 3)
+                        else:
+                            response = client.models.generate_content(
+                                model=MODEL,
+                                contents=contents,
+                                config=generation_config()
+                            )
+                            timings = None
+                        record_usage(model_span, response)
+
+                    # verbose output
+                    if verbose:
+                        print_usage(response, i + 1, max_iterations, tokens_before, tokens_after, timings)
+
+                    # Add candidates' content back to conversation
+                    add_messages(message, [candidate.content for candidate in response.candidates], session_log)
+
+                    # If final text is available → done
+                    if not response.function_calls:
+                        if stream:
+                            print()  # the answer itself was printed as it streamed
+                        else:
+                            print(response.text)
+                        break
+
+                    # Otherwise, handle function calls (results come back in call order)
+                    if not stream:
+                        for function_call in response.function_calls:
+                            dispatcher.submit(function_call)
+                    results = function_results_to_messages(dispatcher.results(), verbose)
+                    add_messages(message, repeated_calls.replace_repeats(message, contents, results), session_log)
+
+        except Exception as e:
+            print(f"Error during iteration {i+1}: {e}")
+            break
+    else:
+        # Only runs if loop finished all iterations without break
+        print("Reached maximum iterations without final response.")
+
+
+async def generate_content_async(client: "genai.Client", message: List, verbose: bool = False, max_tool_workers: int = MAX_TOOL_WORKERS, max_iterations: int = MAX_ITERATIONS, context_budget: int = CONTEXT_TOKEN_BUDGET, session_log: "SessionLog" = None):
+    """
+    Same loop as generate_content, but on the client.aio surface so many
+    sessions can share one event loop. Returns the final text (None if the
+    iteration limit is hit) and lets errors propagate to the caller.
+    """
+    for i in range(max_iterations):
+        with tracer.span("iteration", str(i + 1)) as iteration_span:
+            contents, tokens_before, tokens_after = compact_history(message, context_budget)
+            iteration_span.update(context_tokens=tokens_after, compacted_tokens=tokens_before - tokens_after)
+
+            with tracer.span("model", MODEL) as model_span:
+                response = await client.aio.models.generate_content(
+                    model=MODEL,
+                    contents=contents,
+                    config=generation_config()
+                )
+                record_usage(model_span, response)
+
+            if verbose:
+                print_usage(response, i + 1, max_iterations, tokens_before, tokens_after)
+
+            add_messages(message, [candidate.content for candidate in response.candidates], session_log)
+
+            if not response.function_calls:
+                return response.text
+
+            # Tools are blocking, so run them off the event loop
+            function_call_results = await asyncio.to_thread(call_functions, response.function_calls, verbose, max_tool_workers)
+            results = function_results_to_messages(function_call_results, verbose)
+            add_messages(message, repeated_calls.replace_repeats(message, contents, results), session_log)
+
+    return None
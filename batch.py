@@ -0,0 +1,95 @@
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING
+from google.genai import types
+
+from agent import generate_content_async
+from session_log import SessionLog
+from tracing import tracer
+from config import CONTEXT_TOKEN_BUDGET
+
+if TYPE_CHECKING:
+    from google import genai
+
+
+def load_batch(batch_path: str):
+    """
+    Reads one task per line. A task is either a JSON string (the prompt) or an
+    object with a "prompt" and optional "id" and "max_iterations" keys.
+    """
+    tasks = []
+    with open(batch_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            task = json.loads(line)
+            if isinstance(task, str):
+                task = {"prompt": task}
+            if not isinstance(task, dict) or not task.get("prompt"):
+                raise ValueError(f"{batch_path}:{line_number}: expected a prompt string or an object with a \"prompt\" key")
+
+            task.setdefault("id", line_number)
+            tasks.append(task)
+    return tasks
+
+
+async def run_batch(client: "genai.Client", batch_path: str, output_path: str, concurrency: int, max_iterations: int, max_tool_workers: int, verbose: bool = False, context_budget: int = CONTEXT_TOKEN_BUDGET, session_dir: str = None):
+    """
+    Runs every task in `batch_path` through generate_content_async on one
+    shared client, with at most `concurrency` tasks in flight. Each result is
+    written to `output_path` as soon as its task finishes, so the output is in
+    completion order; use the "id" field to match results to prompts.
+
+    With `session_dir`, each task's conversation is logged there and its
+    result names the session, which --resume can pick up.
+    """
+    tasks = load_batch(batch_path)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    with open(output_path, "w") as out:
+        async def run_task(task):
+            async with semaphore:
+                messages = [types.Content(role="user", parts=[types.Part(text=task["prompt"])])]
+                start = time.perf_counter()
+                record = {"id": task["id"], "prompt": task["prompt"]}
+                session_log = None
+                if session_dir:
+                    session_log = SessionLog.create(session_dir)
+                    session_log.append(messages)
+                    record["session"] = session_log.session_id
+                try:
+                    with tracer.span("task", str(task["id"])):
+                        text = await generate_content_async(
+                            client,
+                            messages,
+                            verbose,
+                            max_tool_workers,
+                            task.get("max_iterations", max_iterations),
+                            context_budget,
+                            session_log
+                        )
+                    record["response"] = text
+                    if text is None:
+                        record["error"] = "Reached maximum iterations without final response."
+                except Exception as e:
+                    record["error"] = str(e)
+                finally:
+                    if session_log:
+                        session_log.close()
+
+                record["messages"] = len(messages)
+                record["seconds"] = round(time.perf_counter() - start, 3)
+
+            # Only the event loop thread writes, so lines never interleave
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            return record
+
+        results = await asyncio.gather(*(run_task(task) for task in tasks))
+
+    failed = sum(1 for record in results if "error" in record)
+    print(f"Batch finished: {len(results) - failed}/{len(results)} tasks succeeded, results in {output_path}")
+    return results
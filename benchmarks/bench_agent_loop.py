@@ -0,0 +1,305 @@
+"""
+Offline benchmark of the whole agent loop: agent.generate_content driving
+the real tools over synthetic workspaces, with benchmarks.scripted_model
+standing in for Gemini.
+
+Scenarios:
+    many_files      2000 small modules; listings, searches and batches of reads
+    large_files     a few 8 MB files; ranged reads, line reads and searches
+    chatty_scripts  scripts printing megabytes; runs, edits and reruns
+    repeat_reads    a few modules listed and read over and over, with edits
+
+Each scenario runs in a fresh interpreter so its memory high-water mark is
+its own, and reports:
+    iterations/sec    model turns per second of wall time
+    dispatch ms/iter  loop + dispatch time per iteration that is neither
+                      the (instant) model nor inside a tool function
+    tool ms/iter      wall time inside tool functions per iteration
+    peak RSS MB       ru_maxrss at the end, and its growth during the run
+    history           tokens sent on the first and last request, and the
+                      number of messages at the end
+
+Results are saved to benchmarks/results/agent_loop.json with --save, and
+every run is compared against that file, so a regression shows up as a
+diff in the PR and as a non-zero exit here.
+
+Run from the repository root:
+    python -m benchmarks.bench_agent_loop [--save]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "agent_loop.json")
+
+# Metrics compared against the saved results, and whether higher is better
+TRACKED = {
+    "iterations_per_sec": True,
+    "dispatch_ms_per_iteration": False,
+    "peak_rss_growth_mb": False,
+    "history_tokens_last": False,
+}
+
+
+def write_lines(path, count, line):
+    # Written in chunks so building the workspace doesn't inflate the peak RSS
+    with open(path, "w") as f:
+        for start in range(0, count, 10_000):
+            f.write("".join(line(i) for i in range(start, min(count, start + 10_000))))
+
+
+def many_files(workdir, iterations):
+    for package in range(20):
+        os.makedirs(os.path.join(workdir, f"pkg_{package}"))
+        for module in range(100):
+            write_lines(
+                os.path.join(workdir, f"pkg_{package}", f"mod_{module}.py"), 60,
+                lambda i, n=package * 100 + module: f"def func_{n}_{i}(value):\n" if i % 10 == 0 else f"    value = value * {i} + {n}\n",
+            )
+
+    turns = []
+    for i in range(iterations):
+        step = i % 4
+        if step == 0:
+            turns.append([("get_files_info", {"directory": ".", "depth": 1, "cursor": str(i * 50 % 2000), "limit": 50})])
+        elif step == 1:
+            turns.append([("search_files", {"query": f"def func_{i * 37 % 2000}_", "max_results": 10})])
+        elif step == 2:
+            turns.append([("get_file_content", {"file_path": f"pkg_{(i + j) % 20}/mod_{(i * 7 + j) % 100}.py"}) for j in range(6)])
+        else:
+            turns.append([("search_files", {"query": r"value \* 3\d", "regex": True, "path_glob": f"pkg_{i % 20}/*"})])
+    return turns + ["done"]
+
+
+def large_files(workdir, iterations):
+    for n in range(4):
+        write_lines(os.path.join(workdir, f"big_{n}.log"), 100_000, lambda i, n=n: f"{i:08d} INFO worker-{n} handled request id={i * 7919 % 1000003}\n")
+
+    turns = []
+    for i in range(iterations):
+        file_path = f"big_{i % 4}.log"
+        step = i % 3
+        if step == 0:
+            turns.append([("get_file_content", {"file_path": file_path, "offset": i * 123_457 % 7_000_000})])
+        elif step == 1:
+            turns.append([("get_file_content", {"file_path": file_path, "start_line": i * 3_001 % 99_000 + 1, "end_line": i * 3_001 % 99_000 + 80})])
+        else:
+            turns.append([("search_files", {"query": f"id={i * 7919 % 1000003}", "max_results": 5})])
+    return turns + ["done"]
+
+
+CHATTY_SCRIPT = """import sys
+lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+for i in range(lines):
+    print(f"step {i}: " + "x" * 60)
+print("finished", file=sys.stderr)
+"""
+
+
+def chatty_scripts(workdir, iterations):
+    for n in range(3):
+        with open(os.path.join(workdir, f"chatty_{n}.py"), "w") as f:
+            f.write(CHATTY_SCRIPT)
+
+    turns = []
+    for i in range(iterations):
+        script = f"chatty_{i % 3}.py"
+        if i % 2 == 0:
+            turns.append([("run_python_file", {"file_path": script, "args": [str(20_000 + i)]})])
+        else:
+            turns.append([
+                ("edit_file", {"file_path": script, "edits": [{"search": f'"step {{i}}: "', "replace": f'"step {{i}}: "'}]}),
+                ("get_file_content", {"file_path": script}),
+            ])
+    return turns + ["done"]
+
+
+def repeat_reads(workdir, iterations):
+    for n in range(5):
+        write_lines(os.path.join(workdir, f"mod_{n}.py"), 120, lambda i, n=n: f"    total += {i} * {n}  # step {i}\n")
+        with open(os.path.join(workdir, f"mod_{n}.py"), "a") as f:
+            f.write("# end\n")
+
+    turns = []
+    for i in range(iterations):
+        module = f"mod_{i % 5}.py"
+        step = i % 5
+        if step == 0:
+            turns.append([("get_files_info", {"directory": "."})])
+        elif step in (1, 2):
+            turns.append([("get_file_content", {"file_path": module}), ("get_file_content", {"file_path": f"mod_{(i + 1) % 5}.py"})])
+        elif step == 3:
+            turns.append([("edit_file", {"file_path": module, "edits": [{"search": "# end\n", "replace": f"# end\n# edit {i}\n"}]})])
+        else:
+            turns.append([("get_file_content", {"file_path": module})])
+    return turns + ["done"]
+
+
+SCENARIOS = {
+    "many_files": many_files,
+    "large_files": large_files,
+    "chatty_scripts": chatty_scripts,
+    "repeat_reads": repeat_reads,
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def merged_ms(intervals):
+    """Total length of the union of (start, end) intervals, in ms; concurrent tool calls only count once."""
+    total, current_start, current_end = 0.0, None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total * 1000
+
+
+def run_scenario(name, iterations):
+    """Runs one scenario in this process and returns its metrics."""
+    import blob_store
+    from google.genai import types
+    from agent import generate_content
+    from benchmarks.scripted_model import ScriptedClient
+    from functions import call_function, search_files
+    from tracing import tracer
+
+    with tempfile.TemporaryDirectory() as workdir:
+        turns = SCENARIOS[name](workdir, iterations)
+        client = ScriptedClient(turns)
+        messages = [types.Content(role="user", parts=[types.Part(text=f"benchmark scenario {name}")])]
+
+        rss_before = peak_rss_mb()
+        tracer.reset()
+        tracer.enabled = True
+        output = io.StringIO()
+        store = blob_store.BlobStore(os.path.join(workdir, ".blobs"))
+        # Indexes and blobs live in the workdir, so they go away with it
+        with patch.object(call_function, "WORKING_DIRECTORY", workdir), patch.object(blob_store, "store", store), \
+                patch.object(search_files, "SEARCH_INDEX_DIR", os.path.join(workdir, ".index")), redirect_stdout(output):
+            start = time.perf_counter()
+            generate_content(client, messages, verbose=False, max_iterations=len(turns))
+            wall = time.perf_counter() - start
+        tracer.enabled = False
+
+    if "Error during iteration" in output.getvalue() or len(client.requests) != len(turns):
+        raise RuntimeError(f"scenario {name} did not finish its script:\n{output.getvalue()[-2000:]}")
+
+    spans = tracer.spans
+    iteration_spans = [span for span in spans if span["kind"] == "iteration"]
+    model_ms = sum(span["duration_ms"] for span in spans if span["kind"] == "model")
+    tool_ms = 0.0
+    for iteration in iteration_spans:
+        tool_ms += merged_ms([
+            (span["start"], span["start"] + span["duration_ms"] / 1000)
+            for span in spans if span["kind"] == "tool" and span["parent"] == iteration["id"]
+        ])
+    iteration_ms = sum(span["duration_ms"] for span in iteration_spans)
+    count = len(iteration_spans)
+
+    return {
+        "iterations": count,
+        "seconds": round(wall, 3),
+        "iterations_per_sec": round(count / wall, 2),
+        "dispatch_ms_per_iteration": round((iteration_ms - model_ms - tool_ms) / count, 3),
+        "tool_ms_per_iteration": round(tool_ms / count, 3),
+        "tool_calls": sum(1 for span in spans if span["kind"] == "tool"),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        "history_tokens_first": client.requests[0][1],
+        "history_tokens_last": client.requests[-1][1],
+        "history_messages": len(messages),
+    }
+
+
+def run_in_subprocess(name, iterations):
+    command = [sys.executable, "-m", "benchmarks.bench_agent_loop", "--worker", name, "--iterations", str(iterations)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(results, saved, tolerance):
+    regressions = []
+    for name, metrics in results.items():
+        baseline = saved.get("scenarios", {}).get(name)
+        if not baseline:
+            continue
+        for metric, higher_is_better in TRACKED.items():
+            old, new = baseline.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / abs(old)
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent loop benchmark with a scripted model")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append", help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--iterations", type=int, default=40, help="Tool-calling turns per scenario")
+    parser.add_argument("--save", action="store_true", help=f"Save the results to {os.path.relpath(RESULTS_PATH)}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative change in a tracked metric that counts as a regression")
+    parser.add_argument("--worker", choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_scenario(args.worker, args.iterations)))
+        return
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        metrics = results[name] = run_in_subprocess(name, args.iterations)
+        print(
+            f"{name:<15} {metrics['iterations_per_sec']:8.1f} it/s  "
+            f"dispatch {metrics['dispatch_ms_per_iteration']:6.2f} ms/it  "
+            f"tools {metrics['tool_ms_per_iteration']:8.2f} ms/it  "
+            f"peak RSS {metrics['peak_rss_mb']:6.1f} MB (+{metrics['peak_rss_growth_mb']:.1f})  "
+            f"history {metrics['history_tokens_first']} -> {metrics['history_tokens_last']} tokens, {metrics['history_messages']} messages"
+        )
+
+    exit_code = 0
+    if os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        exit_code = 1 if regressions else 0
+
+    if args.save:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        saved = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "scenarios": results,
+        }
+        with open(RESULTS_PATH, "w") as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved to {os.path.relpath(RESULTS_PATH)}")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
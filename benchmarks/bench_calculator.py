@@ -0,0 +1,175 @@
+"""
+Compares the compiled, cached calculator engine with the previous
+split-and-shunting-yard evaluator (kept below as LegacyCalculator).
+
+Workloads:
+    repeated   many short expressions drawn from a small pool (cache hits)
+    unique     short expressions that are all different (cache misses)
+    huge       one expression with about a million tokens
+    columns    one formula over a million rows of variables, run per row
+               versus Calculator.evaluate_columns
+
+Time is the best of --repeat runs; peak memory is measured in a separate
+tracemalloc pass, since tracing slows everything down.
+
+Run from the repository root:
+    python -m benchmarks.bench_calculator
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "calculator"))
+from pkg import calculator as engine  # noqa: E402
+from array import array  # noqa: E402
+from pkg.calculator import Calculator  # noqa: E402
+
+
+class LegacyCalculator:
+    """calculator/pkg/calculator.py as it was before programs were compiled and cached."""
+
+    def __init__(self):
+        self.operators = {
+            "+": lambda a, b: a + b,
+            "-": lambda a, b: a - b,
+            "*": lambda a, b: a * b,
+            "/": lambda a, b: a / b,
+        }
+        self.precedence = {"+": 1, "-": 1, "*": 2, "/": 2}
+
+    def evaluate(self, expression):
+        if not expression or expression.isspace():
+            return None
+        return self._evaluate_infix(expression.strip().split())
+
+    def _evaluate_infix(self, tokens):
+        values = []
+        operators = []
+        for token in tokens:
+            if token in self.operators:
+                while operators and operators[-1] in self.operators and self.precedence[operators[-1]] >= self.precedence[token]:
+                    self._apply_operator(operators, values)
+                operators.append(token)
+            else:
+                try:
+                    values.append(float(token))
+                except ValueError:
+                    raise ValueError(f"invalid token: {token}")
+        while operators:
+            self._apply_operator(operators, values)
+        if len(values) != 1:
+            raise ValueError("invalid expression")
+        return values[0]
+
+    def _apply_operator(self, operators, values):
+        operator = operators.pop()
+        if len(values) < 2:
+            raise ValueError(f"not enough operands for operator {operator}")
+        b = values.pop()
+        a = values.pop()
+        values.append(self.operators[operator](a, b))
+
+
+def random_expression(rng, terms):
+    # Spaced out, since the legacy evaluator needs whitespace between tokens
+    parts = [str(rng.randint(1, 999))]
+    for _ in range(terms - 1):
+        parts.append(rng.choice("+-*"))
+        parts.append(str(rng.randint(1, 999)))
+    return " ".join(parts)
+
+
+def workloads(count, pool, huge_tokens):
+    rng = random.Random(42)
+    distinct = [random_expression(rng, rng.randint(3, 5)) for _ in range(pool)]
+    return {
+        "repeated": [distinct[rng.randrange(pool)] for _ in range(count)],
+        "unique": [random_expression(rng, rng.randint(3, 5)) + f" + {i}" for i in range(count // 5)],
+        "huge": [random_expression(rng, huge_tokens // 2)],
+    }
+
+
+def evaluate_all(calculator, expressions):
+    evaluate = calculator.evaluate
+    for expression in expressions:
+        evaluate(expression)
+
+
+def best_time(make_calculator, expressions, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        calculator = make_calculator()
+        start = time.perf_counter()
+        evaluate_all(calculator, expressions)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(make_calculator, expressions):
+    calculator = make_calculator()
+    tracemalloc.start()
+    evaluate_all(calculator, expressions)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calculator engine benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Short expressions in the repeated workload (unique gets a fifth)")
+    parser.add_argument("--pool", type=int, default=1000, help="Distinct expressions in the repeated workload")
+    parser.add_argument("--huge-tokens", type=int, default=1_000_000)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the columns workload")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # The results must agree before the timings mean anything
+    for expressions in workloads(2000, 50, 1001).values():
+        for expression in expressions:
+            legacy, compiled = LegacyCalculator().evaluate(expression), Calculator().evaluate(expression)
+            assert abs(legacy - compiled) <= 1e-9 * max(1.0, abs(legacy)), (expression, legacy, compiled)
+
+    for name, expressions in workloads(args.count, args.pool, args.huge_tokens).items():
+        # Don't let the compiled cache warm up across workloads
+        engine._compile_cached.cache_clear()
+        legacy_time = best_time(LegacyCalculator, expressions, args.repeat)
+        compiled_time = best_time(Calculator, expressions, args.repeat)
+        legacy_peak = peak_memory(LegacyCalculator, expressions[:100_000])
+        compiled_peak = peak_memory(Calculator, expressions[:100_000])
+
+        print(f"{name} ({len(expressions)} expression{'s' if len(expressions) != 1 else ''})")
+        for label, seconds, peak in (("legacy", legacy_time, legacy_peak), ("compiled", compiled_time, compiled_peak)):
+            rate = len(expressions) / seconds
+            print(f"  {label:<9} {seconds * 1000:9.1f} ms  {rate:12,.0f} expr/s  peak {peak / 1024:10.1f} KiB")
+        print(f"  speedup {legacy_time / compiled_time:.1f}x")
+
+    rng = random.Random(7)
+    rows = args.rows
+    columns = {
+        "price": array("d", (rng.uniform(1, 100) for _ in range(rows))),
+        "qty": [rng.randint(1, 50) for _ in range(rows)],
+        "fee": 2.5,
+    }
+    formula = "price * qty - fee"
+    calculator = Calculator()
+    program = calculator.compile(formula)
+    per_row_time = column_time = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        per_row = [engine.run(program, {"price": price, "qty": qty, "fee": 2.5}) for price, qty in zip(columns["price"], columns["qty"])]
+        per_row_time = min(per_row_time, time.perf_counter() - start)
+        start = time.perf_counter()
+        by_column = calculator.evaluate_columns(formula, columns)
+        column_time = min(column_time, time.perf_counter() - start)
+    assert by_column.tolist() == per_row
+    print(f"columns ({rows} rows of {formula})")
+    print(f"  per row   {per_row_time * 1000:9.1f} ms")
+    print(f"  columns   {column_time * 1000:9.1f} ms")
+    print(f"  speedup {per_row_time / column_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
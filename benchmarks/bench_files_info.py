@@ -0,0 +1,117 @@
+"""
+Compares the old os.listdir + isdir + getsize listing with the scandir-based
+get_files_info on a synthetic tree. It reports stat calls and wall time. The
+new listing only stats and formats the page it returns, which is where most
+of the difference comes from.
+
+Run from the repository root:
+    python -m benchmarks.bench_files_info
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from functions import get_files_info as files_info
+
+
+def listdir_listing(abs_path, depth):
+    # The listing as it was before scandir, extended to recurse the same way
+    result = []
+    stack = [(abs_path, "", 0)]
+    while stack:
+        dir_path, rel_dir, level = stack.pop()
+        for entry in os.listdir(dir_path):
+            entry_path = os.path.join(dir_path, entry)
+            rel_path = f"{rel_dir}/{entry}" if rel_dir else entry
+            is_dir = os.path.isdir(entry_path)
+            file_size = os.path.getsize(entry_path)
+            if is_dir and level < depth:
+                stack.append((entry_path, rel_path, level + 1))
+            result.append(f"- {rel_path}: file_size={file_size} bytes, is_dir={is_dir}")
+    return "\n".join(result)
+
+
+def scandir_listing(abs_path, depth):
+    entries = files_info._list_entries(abs_path, abs_path, depth, None, (), False, "name")
+    return files_info._page(abs_path, entries, 0, files_info.LISTING_PAGE_SIZE)
+
+
+class CountingEntry:
+    def __init__(self, entry, counter):
+        self._entry = entry
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def stat(self, **kwargs):
+        self._counter[0] += 1
+        return self._entry.stat(**kwargs)
+
+
+class CountingScandir:
+    def __init__(self, iterator, counter):
+        self._iterator = iterator
+        self._counter = counter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._iterator.close()
+
+    def __iter__(self):
+        return (CountingEntry(entry, self._counter) for entry in self._iterator)
+
+
+def count_stats(listing, abs_path, depth):
+    counter = [0]
+    real_stat, real_scandir = os.stat, os.scandir
+
+    def counting_stat(*args, **kwargs):
+        counter[0] += 1
+        return real_stat(*args, **kwargs)
+
+    with patch("os.stat", counting_stat), patch("os.scandir", lambda path: CountingScandir(real_scandir(path), counter)):
+        listing(abs_path, depth)
+    return counter[0]
+
+
+def best_time(listing, abs_path, depth, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        listing(abs_path, depth)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Directory listing benchmark")
+    parser.add_argument("--dirs", type=int, default=50)
+    parser.add_argument("--files", type=int, default=1000, help="Files per directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        for d in range(args.dirs):
+            directory = os.path.join(root, f"dir_{d:03}")
+            os.mkdir(directory)
+            for f in range(args.files):
+                open(os.path.join(directory, f"file_{f:05}.txt"), "w").close()
+
+        flat = os.path.join(root, "dir_000")
+        for label, abs_path, depth, entries in (
+            ("flat directory", flat, 0, args.files),
+            ("recursive tree", root, 1, args.dirs * (args.files + 1)),
+        ):
+            print(f"{label} ({entries} entries)")
+            for name, listing in (("listdir+isdir+getsize", listdir_listing), ("scandir", scandir_listing)):
+                stats = count_stats(listing, abs_path, depth)
+                elapsed = best_time(listing, abs_path, depth, args.repeat)
+                print(f"  {name:22} {stats:8} stat calls  {elapsed * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
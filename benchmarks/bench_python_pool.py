@@ -0,0 +1,48 @@
+"""
+Compares cold and warm (forked) runs of calculator/main.py through
+run_python_file.
+
+Run from the repository root:
+    python -m benchmarks.bench_python_pool
+"""
+import argparse
+import time
+from functions import python_pool
+from functions.run_python import run_python_file
+
+WORKING_DIRECTORY = "./calculator"
+
+
+def time_runs(runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = run_python_file(WORKING_DIRECTORY, "main.py", ["3 + 7 * 2"])
+        timings.append(time.perf_counter() - start)
+        assert "17" in result, result
+    timings.sort()
+    return timings[len(timings) // 2], timings[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm Python pool benchmark")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    python_pool.enabled = False
+    cold_median, cold_best = time_runs(args.runs)
+
+    python_pool.enabled = True
+    start = time.perf_counter()
+    python_pool.get_pool(WORKING_DIRECTORY)
+    startup = time.perf_counter() - start
+    warm_median, warm_best = time_runs(args.runs)
+
+    print(f"calculator/main.py x{args.runs}")
+    print(f"  cold: median {cold_median * 1000:7.2f} ms, best {cold_best * 1000:7.2f} ms")
+    print(f"  warm: median {warm_median * 1000:7.2f} ms, best {warm_best * 1000:7.2f} ms  ({cold_median / warm_median:.1f}x)")
+    print(f"  pool startup (once per working directory): {startup * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Measures the cold start of the CLI: `python main.py --help`, and a no-op
+run that replays one recorded final answer (--replay, so no network). Each
+command is timed in fresh interpreters against a bare `python -c pass`, and
+one extra run under `-X importtime` lists the slowest imports and checks
+that the heavy ones stay lazy.
+
+Exits non-zero when a command's median overhead over the bare interpreter
+goes over its threshold, or a lazy module is imported, so it can be used as
+a regression check.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+# Default thresholds for the overhead over a bare interpreter, in
+# milliseconds. Loose enough for a slow laptop; the SDK import alone is
+# many times the --help budget.
+HELP_MAX_MS = 60
+NOOP_MAX_MS = 1200
+
+# Modules each command must not import. A replayed run needs
+# google.genai.types, and importing it runs google/genai/__init__.py, which
+# imports the client (and asyncio), so the no-op run can't avoid the SDK.
+LAZY_MODULES = {
+    "help": ["google.genai", "dotenv", "asyncio", "agent", "functions.call_function"],
+    "noop": ["batch", "functions.python_pool_server"],
+}
+
+PROMPT = "startup benchmark"
+
+
+def record_noop(cache_dir):
+    """Records a final answer for PROMPT, so `--replay` finishes after one turn."""
+    from google.genai import types
+    from agent import MODEL, generation_config
+    from context_budget import compact_history
+    from response_cache import ResponseCache
+    from config import CONTEXT_TOKEN_BUDGET, RESPONSE_CACHE_MAX_BYTES
+
+    messages = [types.Content(role="user", parts=[types.Part(text=PROMPT)])]
+    contents, _, _ = compact_history(messages, CONTEXT_TOKEN_BUDGET)
+    cache = ResponseCache(cache_dir, RESPONSE_CACHE_MAX_BYTES)
+    cache.put(cache.key(MODEL, contents, generation_config()), types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text="ok")]))]
+    ))
+
+
+def time_command(command, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(command)} failed:\n{result.stderr}")
+    timings.sort()
+    return timings[len(timings) // 2], timings[0]
+
+
+def import_times(command):
+    """({top-level module: cumulative microseconds}, set of every module imported) from one run under -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", *command[1:]], capture_output=True, text=True)
+    top_level, imported = {}, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imported.add(name.strip())
+        # Nested imports are indented under the module that imported them
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--help-max-ms", type=float, default=HELP_MAX_MS, help="Threshold for the overhead of `main.py --help`")
+    parser.add_argument("--noop-max-ms", type=float, default=NOOP_MAX_MS, help="Threshold for the overhead of a replayed no-op run")
+    parser.add_argument("--top", type=int, default=8, help="How many of the slowest top-level imports to show")
+    args = parser.parse_args()
+
+    failures = []
+    baseline, _ = time_command([sys.executable, "-c", "pass"], args.runs)
+    print(f"python -c pass: median {baseline * 1000:7.1f} ms")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        record_noop(cache_dir)
+        commands = {
+            "help": ([sys.executable, "main.py", "--help"], args.help_max_ms),
+            "noop": ([sys.executable, "main.py", "--replay", "--cache-dir", cache_dir, "--session-dir", cache_dir, PROMPT], args.noop_max_ms),
+        }
+
+        for label, (command, max_ms) in commands.items():
+            median, best = time_command(command, args.runs)
+            overhead = (median - baseline) * 1000
+            status = "ok" if overhead <= max_ms else "REGRESSION"
+            print(f"{label}: median {median * 1000:7.1f} ms, best {best * 1000:7.1f} ms, "
+                  f"+{overhead:.1f} ms over python (threshold {max_ms:.0f} ms) {status}")
+            if status != "ok":
+                failures.append(f"{label} took {overhead:.1f} ms more than a bare interpreter")
+
+            top_level, imported = import_times(command)
+            for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"    {cumulative / 1000:7.1f} ms  {name}")
+            for module in LAZY_MODULES[label]:
+                if module in imported:
+                    failures.append(f"{label} imported {module}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
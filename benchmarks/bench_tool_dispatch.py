@@ -0,0 +1,66 @@
+"""
+Compares sequential and concurrent dispatch of one model turn's tool calls.
+
+Run from the repository root:
+    python -m benchmarks.bench_tool_dispatch
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from google.genai import types
+from functions import call_function as dispatcher
+from functions.get_file_content import get_file_content
+
+
+def with_latency(func, latency):
+    # Simulates a slow disk / network filesystem on top of the real tool
+    def wrapper(*args, **kwargs):
+        time.sleep(latency)
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def time_turn(calls, max_workers, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            dispatcher.call_functions(calls, max_workers=max_workers)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool dispatch benchmark")
+    parser.add_argument("--calls", type=int, default=8, help="Read calls per simulated turn")
+    parser.add_argument("--latency", type=float, default=0.02, help="Extra seconds added to each read")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for i in range(args.calls):
+            with open(os.path.join(workdir, f"file_{i}.txt"), "w") as f:
+                f.write("x" * 200_000)
+
+        calls = [
+            types.FunctionCall(name="get_file_content", args={"file_path": f"file_{i}.txt"})
+            for i in range(args.calls)
+        ]
+
+        for label, latency in (("local reads", 0.0), (f"reads +{args.latency * 1000:.0f}ms", args.latency)):
+            fake = {"get_file_content": with_latency(get_file_content, latency)}
+            with patch.object(dispatcher, "WORKING_DIRECTORY", workdir), patch.dict(dispatcher.name_to_function, fake):
+                print(f"{label} ({args.calls} calls per turn)")
+                baseline = time_turn(calls, 1, args.repeat)
+                print(f"  workers=1: {baseline * 1000:8.2f} ms")
+                for workers in (2, 4, 8):
+                    elapsed = time_turn(calls, workers, args.repeat)
+                    print(f"  workers={workers}: {elapsed * 1000:8.2f} ms  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+A local stand-in for genai.Client that plays back a script of model turns,
+so the agent loop and the tools can be exercised without the network.
+
+A script is a list of turns. Each turn is either a list of
+(function name, args) calls or a string, which ends the conversation as
+the model's final answer. Every request's contents are recorded, so
+history growth can be measured from the model's side.
+
+FaultInjectingClient wraps any client and fails some of its requests with
+the SDK's own 429/5xx errors, for exercising retries and rate limiting.
+"""
+import random
+from types import SimpleNamespace
+from google.genai import errors, types
+from context_budget import estimate_tokens
+
+
+class ScriptExhaustedError(Exception):
+    """The agent asked for more turns than the script has."""
+
+
+def model_turn(turn, prompt_tokens: int) -> types.GenerateContentResponse:
+    if isinstance(turn, str):
+        parts = [types.Part(text=turn)]
+    else:
+        parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in turn]
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=estimate_tokens(types.Content(parts=parts)),
+        ),
+    )
+
+
+class _ScriptedModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, *, model, contents, config=None):
+        return self._client.next_turn(contents)
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        # One chunk per part, the way the real stream splits a turn
+        response = self._client.next_turn(contents)
+        for part in response.candidates[0].content.parts:
+            yield model_turn([(part.function_call.name, part.function_call.args)] if part.function_call else part.text, 0)
+
+
+class _ScriptedAsyncModels(_ScriptedModels):
+    async def generate_content(self, *, model, contents, config=None):
+        return self._client.next_turn(contents)
+
+
+class ScriptedClient:
+    """Plays back `turns` in order; `requests` holds (messages, estimated tokens) for each request."""
+
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.requests = []
+        self.models = _ScriptedModels(self)
+        self.aio = SimpleNamespace(models=_ScriptedAsyncModels(self))
+
+    def next_turn(self, contents):
+        tokens = sum(estimate_tokens(content) for content in contents)
+        self.requests.append((len(contents), tokens))
+        if len(self.requests) > len(self.turns):
+            raise ScriptExhaustedError(f"script has {len(self.turns)} turns")
+        return model_turn(self.turns[len(self.requests) - 1], tokens)
+
+
+def api_error(code: int, retry_delay: float = None) -> errors.APIError:
+    """The error the SDK raises for an HTTP `code`, optionally carrying a RetryInfo delay."""
+    error = {"code": code, "message": "injected fault", "status": "RESOURCE_EXHAUSTED" if code == 429 else "UNAVAILABLE"}
+    if retry_delay is not None:
+        error["details"] = [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{retry_delay}s"}]
+    return (errors.ClientError if code < 500 else errors.ServerError)(code, {"error": error})
+
+
+class _FaultyModels:
+    def __init__(self, client, models):
+        self._client = client
+        self._models = models
+
+    def generate_content(self, **kwargs):
+        self._client.inject()
+        return self._models.generate_content(**kwargs)
+
+    def generate_content_stream(self, **kwargs):
+        self._client.inject()
+        yield from self._models.generate_content_stream(**kwargs)
+
+
+class _FaultyAsyncModels(_FaultyModels):
+    async def generate_content(self, **kwargs):
+        self._client.inject()
+        return await self._models.generate_content(**kwargs)
+
+
+class FaultInjectingClient:
+    """
+    Wraps `client` and fails requests before they reach it. `faults` is a
+    sequence of HTTP codes (None lets that request through) used up one per
+    request; after it runs out, each request fails with probability
+    `fault_rate`, with a code picked from `codes`.
+    """
+
+    def __init__(self, client, faults=(), fault_rate: float = 0.0, codes=(429, 503), seed: int = 0):
+        self.faults = list(faults)
+        self.fault_rate = fault_rate
+        self.codes = codes
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.injected = []
+        self.models = _FaultyModels(self, client.models)
+        self.aio = SimpleNamespace(models=_FaultyAsyncModels(self, client.aio.models))
+
+    def inject(self):
+        self.requests += 1
+        if self.faults:
+            code = self.faults.pop(0)
+        elif self.fault_rate and self.rng.random() < self.fault_rate:
+            code = self.rng.choice(self.codes)
+        else:
+            code = None
+        if code is not None:
+            self.injected.append(code)
+            raise api_error(code)
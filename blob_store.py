@@ -0,0 +1,186 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from google.genai import types
+from state_dir import PerSession
+from config import BLOB_STORE_DIR, BLOB_STORE_MAX_BYTES, BLOB_SPILL_CHARS, BLOB_PREVIEW_CHARS, BLOB_MEMORY_ENTRIES
+
+REFERENCE = re.compile(r"\[tool output stored as blob sha256:([0-9a-f]{64}), (\d+) characters;")
+
+
+class BlobStore:
+    """
+    Content-addressed store of large tool outputs on disk: each distinct
+    text is written once, zlib-compressed, to a file named after its
+    sha256, so the same output read twice (or in two sessions) is stored
+    once. Blobs are never modified, so reads need no locking. When the
+    store grows past `max_bytes`, the least recently used blobs are
+    deleted, as in the response cache.
+
+    The last `memory_entries` blobs stored or read are also kept in memory,
+    since the newest outputs are expanded again on every iteration until
+    they age out of the recent window.
+    """
+
+    SUFFIX = ".z"
+
+    def __init__(self, directory: str, max_bytes: int = BLOB_STORE_MAX_BYTES, memory_entries: int = BLOB_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.stored = 0
+        self.deduplicated = 0
+        self._recent = OrderedDict()
+        # digest -> size on disk, oldest use first; read from the directory
+        # on first use, so importing this module stays cheap
+        self._entries = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        # mtime doubles as the last-used time, so the order survives between runs
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            if name.endswith(self.SUFFIX):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, name[:-len(self.SUFFIX)], stat.st_size))
+        self._entries = OrderedDict((digest, size) for _, digest, size in sorted(entries))
+        self._total_bytes = sum(self._entries.values())
+
+    def _used(self, digest: str, size: int = None):
+        """Marks `digest` as just used, adding it with `size` if it's new. Call with the lock held."""
+        if self._entries is None:
+            self._load()
+        if size is not None:
+            self._total_bytes += size - self._entries.pop(digest, 0)
+            self._entries[digest] = size
+        elif digest in self._entries:
+            self._entries.move_to_end(digest)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            digest, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._recent.pop(digest, None)
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, digest: str, text: str):
+        with self._lock:
+            self._recent[digest] = text
+            self._recent.move_to_end(digest)
+            while len(self._recent) > self.memory_entries:
+                self._recent.popitem(last=False)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest + self.SUFFIX)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        self._remember(digest, text)
+        if os.path.exists(path):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass  # evicted by another process just now; the next put writes it again
+            with self._lock:
+                self._used(digest)
+                self.deduplicated += 1
+            return digest
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temp file and rename so readers never see half a blob
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        compressed = zlib.compress(data, 1)
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._used(digest, len(compressed))
+            self.stored += 1
+            self._evict()
+        return digest
+
+    def get(self, digest: str):
+        """The text stored under `digest`, or None if it's gone."""
+        with self._lock:
+            text = self._recent.get(digest)
+            if text is not None:
+                self._used(digest)
+                return text
+        try:
+            with open(self._path(digest), "rb") as f:
+                text = zlib.decompress(f.read()).decode("utf-8")
+            os.utime(self._path(digest))
+        except (OSError, zlib.error):
+            return None
+        with self._lock:
+            self._used(digest)
+        self._remember(digest, text)
+        return text
+
+    def stats(self):
+        return f"Blob store: {self.stored} stored, {self.deduplicated} deduplicated"
+
+
+# The current session's project's store
+store = PerSession(BLOB_STORE_DIR, BlobStore)
+
+
+def spill(text: str, spill_chars: int = BLOB_SPILL_CHARS) -> str:
+    """
+    Returns `text` itself if it's short, else stores it and returns a
+    reference with a preview, which is what the history keeps.
+    """
+    if len(text) <= spill_chars:
+        return text
+    digest = store.put(text)
+    preview = text[:BLOB_PREVIEW_CHARS]
+    return (
+        f"[tool output stored as blob sha256:{digest}, {len(text)} characters; "
+        f"the first {len(preview)} follow. Call the tool again if you need the rest of it]\n{preview}"
+    )
+
+
+def expand(content: types.Content) -> types.Content:
+    """`content` with any blob reference replaced by the full output, if the blob is still there."""
+    if content.role != "user" or not content.parts or len(content.parts) != 1 or not content.parts[0].text:
+        return content
+    match = REFERENCE.match(content.parts[0].text)
+    if not match:
+        return content
+    text = store.get(match.group(1))
+    if text is None:
+        return content
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def expand_recent(messages: list, keep_recent: int) -> list:
+    """
+    The history with the full outputs put back into the newest
+    `keep_recent` messages and into every tool result the model hasn't
+    seen yet. Older outputs go out as their reference and preview, the way
+    compaction would digest them anyway.
+    """
+    start = max(0, len(messages) - keep_recent)
+    for i in range(len(messages) - 1, -1, -1):
+        if messages[i].role == "model":
+            start = min(start, i + 1)
+            break
+    if not any(REFERENCE.match(part.text or "") for content in messages[start:] for part in content.parts or []):
+        return messages
+    return messages[:start] + [expand(content) for content in messages[start:]]
@@ -4,15 +4,121 @@ import sys, os
 from pkg.calculator import Calculator
 from pkg.render import render
 
+# Input is read in chunks of up to this many bytes, and the results for all
+# the complete lines in a chunk go out in one write. A pipe full of
+# expressions is answered in a few large writes, while a line typed at a
+# terminal arrives as a chunk of its own and is answered straight away.
+STREAM_CHUNK = 64 * 1024
+
+
+def format_result(expression, result, plain):
+    if plain:
+        if result is None:
+            return ""
+        return str(int(result)) if isinstance(result, float) and result.is_integer() else str(result)
+    return render(expression, result)
+
+
+def evaluate_line(calculator, line, plain):
+    expression = line.strip()
+    if not expression:
+        return "" if plain else None
+    try:
+        return format_result(expression, calculator.evaluate(expression), plain)
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def stream(calculator, infile, outfile, plain=False):
+    """
+    Evaluates one expression per line of the binary stream `infile` and
+    writes the results to the binary stream `outfile`. With `plain`, each
+    input line gets exactly one output line (empty for a blank line).
+    """
+    pending = b""
+    while True:
+        chunk = infile.read1(STREAM_CHUNK)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        _write_results(calculator, lines, outfile, plain)
+    if pending:
+        _write_results(calculator, [pending], outfile, plain)
+
+
+def _write_results(calculator, lines, outfile, plain):
+    results = [evaluate_line(calculator, line.decode("utf-8", "replace"), plain) for line in lines]
+    results = [result for result in results if result is not None]
+    if results:
+        outfile.write(("\n".join(results) + "\n").encode())
+        outfile.flush()
+
+
+def _remove_stale_socket(socket_path):
+    """Removes a socket left behind by a server that didn't shut down cleanly; a live one is left alone."""
+    import socket
+
+    if not os.path.exists(socket_path) or os.path.isfile(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"a server is already listening on {socket_path}")
+
+
+def serve(calculator, socket_path, plain=False):
+    """Serves the line protocol of stream() on a Unix socket, one thread per connection, all sharing `calculator`."""
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            stream(calculator, self.rfile, self.wfile, plain)
+
+    _remove_stale_socket(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, Handler) as server:
+        server.daemon_threads = True
+        print(f"Serving on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
 
 def main():
     calculator = Calculator()
     if len(sys.argv) <= 1:
         print("Calculator App")
         print('Usage: python main.py "<expression>"')
+        print("       python main.py --stdin [--plain]")
+        print("       python main.py --serve <socket path> [--plain]")
         print('Example: python main.py "3 + 5"')
         return
 
+    if sys.argv[1] in ("--stdin", "--serve"):
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Evaluates one expression per line")
+        mode = parser.add_mutually_exclusive_group(required=True)
+        mode.add_argument("--stdin", action="store_true", help="Read expressions from stdin, write results to stdout")
+        mode.add_argument("--serve", metavar="SOCKET_PATH", help="Serve the same line protocol on a Unix socket")
+        parser.add_argument("--plain", action="store_true", help="Print bare results, one line per expression, instead of boxes")
+        args = parser.parse_args()
+        if args.stdin:
+            stream(calculator, sys.stdin.buffer, sys.stdout.buffer, args.plain)
+        else:
+            try:
+                serve(calculator, args.serve, args.plain)
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        return
+
     expression = " ".join(sys.argv[1:])
     try:
         result = calculator.evaluate(expression)
@@ -1,59 +1,269 @@
-class Calculator:
-    def __init__(self):
-        self.operators = {
-            "+": lambda a, b: a + b,
-            "-": lambda a, b: a - b,
-            "*": lambda a, b: a * b,
-            "/": lambda a, b: a / b,
-        }
-        self.precedence = {
-            "+": 1,
-            "-": 1,
-            "*": 2,
-            "/": 2,
-        }
-
-    def evaluate(self, expression):
-        if not expression or expression.isspace():
-            return None
-        tokens = expression.strip().split()
-        return self._evaluate_infix(tokens)
-
-    def _evaluate_infix(self, tokens):
-        values = []
-        operators = []
-
-        for token in tokens:
-            if token in self.operators:
-                while (
-                    operators
-                    and operators[-1] in self.operators
-                    and self.precedence[operators[-1]] >= self.precedence[token]
-                ):
-                    self._apply_operator(operators, values)
-                operators.append(token)
-            else:
+import operator
+import re
+import sys
+from array import array
+from functools import lru_cache
+from itertools import repeat
+
+# Compiled programs kept per expression text. Expressions longer than
+# CACHE_MAX_CHARS are compiled every time, so one huge input can't pin
+# megabytes of program in the cache.
+CACHE_SIZE = 4096
+CACHE_MAX_CHARS = 4096
+
+# operator -> (precedence, function). All binary operators are left-associative.
+BINARY_OPERATORS = {
+    "+": (1, operator.add),
+    "-": (1, operator.sub),
+    "*": (2, operator.mul),
+    "/": (2, operator.truediv),
+}
+# Unary minus binds tighter than any binary operator: 3 * -2, -(1 + 2)
+UNARY_PRECEDENCE = 3
+
+# Every non-space character is part of some match, so finditer never skips input
+TOKEN = re.compile(
+    r"(?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)"
+    r"|(?P<operator>[-+*/()])"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<invalid>\S)"
+)
+OPERATOR_TOKENS = frozenset("+-*/()")
+
+# In ASCII input without "_", a chunk that starts with one of these and that
+# float() accepts is a single number token ("-5", "1e" and "3+5" are not).
+# Any other chunk has to be a whole variable name.
+NUMBER_START = frozenset("0123456789.")
+
+
+class _NotSpaced(Exception):
+    """The whitespace-split fast path met a chunk that is more than one token."""
+
+
+def tokenize(expression):
+    """Splits an expression into number, operator and name strings; whitespace between tokens is optional."""
+    tokens = []
+    for match in TOKEN.finditer(expression):
+        if match.lastgroup == "invalid":
+            raise ValueError(f"invalid token: {match.group()}")
+        tokens.append(match.group())
+    return tokens
+
+
+def compile_expression(expression):
+    """
+    Compiles an infix expression into a postfix program: a tuple whose items
+    are float constants and variable names, which are pushed, or functions
+    from the operator module, which pop their operands and push the result.
+    Operators whose operands are all constants are folded while compiling.
+
+    Operands and operators are checked to alternate here, which is enough
+    for every program to be well formed, so run() never checks anything.
+    """
+    if len(expression) <= CACHE_MAX_CHARS:
+        return _compile_cached(expression)
+    return _compile(expression)
+
+
+def _compile(expression):
+    # Most input is spaced out, and str.split is far cheaper than the regex
+    if expression.isascii() and "_" not in expression:
+        try:
+            return _compile_tokens(expression.split())
+        except _NotSpaced:
+            pass
+    return _compile_tokens(tokenize(expression))
+
+
+_compile_cached = lru_cache(maxsize=CACHE_SIZE)(_compile)
+
+
+# Entries of the pending-operator stack: (precedence, function, text)
+_OPERATOR_ENTRIES = {text: (precedence, function, text) for text, (precedence, function) in BINARY_OPERATORS.items()}
+_UNARY_MINUS = (UNARY_PRECEDENCE, operator.neg, "-")
+_OPEN_PAREN = (0, None, "(")
+
+
+def _compile_tokens(tokens):
+    program = []
+    emit = program.append
+    neg = operator.neg
+    pending = []    # operators and "(" waiting for their right operand
+    expect_operand = True
+
+    for text in tokens:
+        if text not in OPERATOR_TOKENS:
+            if text[0] in NUMBER_START:
                 try:
-                    values.append(float(token))
+                    operand = float(text)
                 except ValueError:
-                    raise ValueError(f"invalid token: {token}")
+                    raise _NotSpaced
+            elif text.isidentifier():
+                operand = sys.intern(text)
+            else:
+                raise _NotSpaced
+            if not expect_operand:
+                raise ValueError("invalid expression")
+            emit(operand)
+            expect_operand = False
+        elif expect_operand:
+            if text == "(":
+                pending.append(_OPEN_PAREN)
+            elif text == "-":
+                pending.append(_UNARY_MINUS)
+            elif text == ")":
+                raise ValueError("invalid expression")
+            else:
+                raise ValueError(f"not enough operands for operator {text}")
+        elif text == ")":
+            while pending and pending[-1] is not _OPEN_PAREN:
+                _emit(program, pending.pop()[1])
+            if not pending:
+                raise ValueError("mismatched parentheses")
+            pending.pop()
+        elif text == "(":
+            raise ValueError("invalid expression")
+        else:
+            entry = _OPERATOR_ENTRIES[text]
+            precedence = entry[0]
+            while pending and pending[-1][0] >= precedence:
+                function = pending.pop()[1]
+                # The common case of _emit, inlined: folding two constants
+                if function is not neg and program[-1].__class__ is float and program[-2].__class__ is float:
+                    b = program.pop()
+                    program[-1] = function(program[-1], b)
+                else:
+                    _emit(program, function)
+            pending.append(entry)
+            expect_operand = True
 
-        while operators:
-            self._apply_operator(operators, values)
+    if expect_operand:
+        if pending and pending[-1] is not _OPEN_PAREN:
+            raise ValueError(f"not enough operands for operator {pending[-1][2]}")
+        raise ValueError("invalid expression")
 
-        if len(values) != 1:
-            raise ValueError("invalid expression")
+    while pending:
+        entry = pending.pop()
+        if entry is _OPEN_PAREN:
+            raise ValueError("mismatched parentheses")
+        _emit(program, entry[1])
+    return tuple(program)
 
-        return values[0]
 
-    def _apply_operator(self, operators, values):
-        if not operators:
+def _emit(program, function):
+    # In postfix, constants at the end of the program are exactly the
+    # operands of the operator being emitted, so it can be applied now
+    if function is operator.neg:
+        if program[-1].__class__ is float:
+            program[-1] = -program[-1]
             return
+    elif program[-1].__class__ is float and program[-2].__class__ is float:
+        b = program.pop()
+        program[-1] = function(program[-1], b)
+        return
+    program.append(function)
+
+
+def run(program, variables=None):
+    """Evaluates a program from compile_expression, taking variable values from `variables`."""
+    if len(program) == 1 and program[0].__class__ is float:
+        return program[0]
+
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    neg = operator.neg
+    for item in program:
+        if item.__class__ is float:
+            push(item)
+        elif item.__class__ is str:
+            push(_lookup(variables, item))
+        elif item is neg:
+            stack[-1] = -stack[-1]
+        else:
+            b = pop()
+            stack[-1] = item(stack[-1], b)
+    return stack[0]
+
+
+def _lookup(variables, name):
+    try:
+        return variables[name]
+    except (KeyError, TypeError):
+        raise ValueError(f"unknown variable: {name}") from None
+
+
+def run_columns(program, columns):
+    """
+    Evaluates a program over whole columns at once: every operator is
+    applied to all rows in one pass instead of the program running per row.
+
+    `columns` maps variable names to sequences of numbers (lists,
+    array.array, ...) of equal length, or to single numbers, which apply to
+    every row. Returns an array("d"), or a NumPy array if any column is one;
+    NumPy columns are computed by NumPy itself, so dividing by zero gives
+    inf there rather than raising ZeroDivisionError.
+    """
+    numpy = sys.modules.get("numpy")    # it can only be in use if it's imported
+    use_numpy = numpy is not None and any(isinstance(column, numpy.ndarray) for column in columns.values())
+
+    rows = None
+    values = {}
+    for name, column in columns.items():
+        if isinstance(column, (int, float)):
+            values[name] = float(column)
+            continue
+        if rows is None:
+            rows = len(column)
+        elif len(column) != rows:
+            raise ValueError(f"column {name} has {len(column)} rows, expected {rows}")
+        values[name] = numpy.asarray(column, dtype=float) if use_numpy else column
+    if rows is None:
+        raise ValueError("no columns to evaluate over")
+
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    neg = operator.neg
+    for item in program:
+        if item.__class__ is float:
+            push(item)
+        elif item.__class__ is str:
+            push(_lookup(values, item))
+        elif item is neg:
+            top = stack[-1]
+            stack[-1] = -top if use_numpy or top.__class__ is float else array("d", map(neg, top))
+        else:
+            b = pop()
+            a = stack[-1]
+            if use_numpy or (a.__class__ is float and b.__class__ is float):
+                stack[-1] = item(a, b)
+            elif a.__class__ is float:
+                stack[-1] = array("d", map(item, repeat(a, rows), b))
+            elif b.__class__ is float:
+                stack[-1] = array("d", map(item, a, repeat(b, rows)))
+            else:
+                stack[-1] = array("d", map(item, a, b))
+
+    result = stack[0]
+    if result.__class__ is float:
+        # Nothing in the program varies by row
+        return numpy.full(rows, result) if use_numpy else array("d", [result]) * rows
+    if use_numpy:
+        return numpy.asarray(result, dtype=float)
+    return result if isinstance(result, array) else array("d", result)
+
+
+class Calculator:
+    def evaluate(self, expression, variables=None):
+        if not expression or expression.isspace():
+            return None
+        return run(compile_expression(expression), variables)
 
-        operator = operators.pop()
-        if len(values) < 2:
-            raise ValueError(f"not enough operands for operator {operator}")
+    def evaluate_columns(self, expression, columns):
+        """Evaluates `expression` for every row of `columns`; see run_columns."""
+        return run_columns(compile_expression(expression), columns)
 
-        b = values.pop()
-        a = values.pop()
-        values.append(self.operators[operator](a, b))
+    def compile(self, expression):
+        """The compiled program for `expression`, for evaluating it repeatedly with run()."""
+        return compile_expression(expression)
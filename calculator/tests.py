@@ -1,5 +1,13 @@
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
-from pkg.calculator import Calculator
+from array import array
+import main
+from pkg.calculator import Calculator, run
 
 
 class TestCalculator(unittest.TestCase):
@@ -46,6 +54,148 @@ class TestCalculator(unittest.TestCase):
         result = self.calculator.evaluate("3 + 2 * 5")
         self.assertEqual(result, 13)
 
+    def test_without_whitespace(self):
+        self.assertEqual(self.calculator.evaluate("3+2*5"), 13)
+        self.assertEqual(self.calculator.evaluate("1.5e1/3 -2"), 3)
+
+    def test_parentheses(self):
+        self.assertEqual(self.calculator.evaluate("(3 + 2) * 5"), 25)
+        self.assertEqual(self.calculator.evaluate("2*((1+2)*(3+4))"), 42)
+
+    def test_unary_minus(self):
+        self.assertEqual(self.calculator.evaluate("-3 * -2"), 6)
+        self.assertEqual(self.calculator.evaluate("3 -5"), -2)
+        self.assertEqual(self.calculator.evaluate("-(1 + 2) * 2"), -6)
+
+    def test_mismatched_parentheses(self):
+        for expression in ("(3 + 2", "3 + 2)", "5) + (1"):
+            with self.assertRaises(ValueError):
+                self.calculator.evaluate(expression)
+
+    def test_invalid_tokens(self):
+        for expression in ("3 + x", "3 + inf", "1_000 + 1", "2 (3)"):
+            with self.assertRaises(ValueError):
+                self.calculator.evaluate(expression)
+
+    def test_compiled_program_is_reused(self):
+        program = self.calculator.compile("3 * x".replace("x", "4") + " + 1")
+        self.assertIs(self.calculator.compile("3 * 4 + 1"), program)
+        self.assertEqual(run(program), 13)
+
+    def test_constants_are_folded(self):
+        self.assertEqual(self.calculator.compile("3 * 4 + 1"), (13.0,))
+        self.assertEqual(self.calculator.compile("-(2 - 5)"), (3.0,))
+
+    def test_huge_expression(self):
+        expression = " + ".join(["1"] * 10_000)
+        self.assertEqual(self.calculator.evaluate(expression), 10_000)
+        self.assertEqual(self.calculator.evaluate(expression.replace(" ", "")), 10_000)
+
+    def test_variables(self):
+        self.assertEqual(self.calculator.evaluate("price * qty - fee", {"price": 2.5, "qty": 4, "fee": 1}), 9)
+        self.assertEqual(self.calculator.evaluate("-(a_1+b)", {"a_1": 1, "b": 2}), -3)
+
+    def test_unknown_variable(self):
+        with self.assertRaisesRegex(ValueError, "unknown variable: qty"):
+            self.calculator.evaluate("price * qty", {"price": 1})
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("price * 2")
+
+    def test_evaluate_columns(self):
+        columns = {"price": [1, 2, 3], "qty": array("d", [4, 5, 6]), "fee": 0.5}
+        result = self.calculator.evaluate_columns("price * qty - fee", columns)
+        self.assertEqual(result, array("d", [3.5, 9.5, 17.5]))
+        self.assertEqual(result.tolist(), [self.calculator.evaluate("price * qty - fee", {"price": p, "qty": q, "fee": 0.5}) for p, q in zip(columns["price"], columns["qty"])])
+
+    def test_evaluate_columns_broadcasts_constants(self):
+        self.assertEqual(self.calculator.evaluate_columns("-x", {"x": [1, -2]}), array("d", [-1, 2]))
+        self.assertEqual(self.calculator.evaluate_columns("fee * 2", {"fee": 1.5, "x": [0, 0, 0]}), array("d", [3, 3, 3]))
+
+    def test_evaluate_columns_errors(self):
+        with self.assertRaisesRegex(ValueError, "rows"):
+            self.calculator.evaluate_columns("a + b", {"a": [1, 2], "b": [1]})
+        with self.assertRaisesRegex(ValueError, "unknown variable: b"):
+            self.calculator.evaluate_columns("a + b", {"a": [1, 2]})
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate_columns("a + 1", {"a": 1})
+
+    def test_evaluate_columns_with_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        result = self.calculator.evaluate_columns("price * qty - fee", {"price": numpy.array([1.0, 2.0]), "qty": [3, 4], "fee": 1})
+        self.assertIsInstance(result, numpy.ndarray)
+        self.assertEqual(result.tolist(), [2.0, 7.0])
+
+
+class _CountingWriter(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+class TestStreaming(unittest.TestCase):
+    def test_plain_results_line_up_with_input(self):
+        out = io.BytesIO()
+        main.stream(Calculator(), io.BytesIO(b"3 + 5\n\n2 * (1 + 1)\n1 +\n7 / 2"), out, plain=True)
+        self.assertEqual(out.getvalue().decode().split("\n"), ["8", "", "4", "Error: not enough operands for operator +", "3.5", ""])
+
+    def test_rendered_results(self):
+        out = io.BytesIO()
+        main.stream(Calculator(), io.BytesIO(b"3 + 5\n"), out)
+        self.assertEqual(out.getvalue().decode(), main.render("3 + 5", 8.0) + "\n")
+
+    def test_results_are_written_in_batches(self):
+        out = _CountingWriter()
+        main.stream(Calculator(), io.BytesIO(b"1 + 1\n" * 5000), out, plain=True)
+        self.assertEqual(out.getvalue(), b"2\n" * 5000)
+        self.assertEqual(out.writes, 1)
+
+    def test_socket_server(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "calc.sock")
+            threading.Thread(target=main.serve, args=(Calculator(), path, True), daemon=True).start()
+            for _ in range(100):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+
+            for expression, expected in (("2 * 21", b"42\n"), ("1 / 4", b"0.25\n")):
+                with socket.socket(socket.AF_UNIX) as client:
+                    client.connect(path)
+                    client.sendall(expression.encode() + b"\n")
+                    client.shutdown(socket.SHUT_WR)
+                    self.assertEqual(client.makefile("rb").read(), expected)
+
+    def test_socket_server_keeps_a_live_socket_and_replaces_a_stale_one(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "calc.sock")
+            # Bound but never listened on: what a crashed server leaves behind
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+            threading.Thread(target=main.serve, args=(Calculator(), path, True), daemon=True).start()
+            for _ in range(100):
+                try:
+                    with socket.socket(socket.AF_UNIX) as client:
+                        client.connect(path)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+
+            with self.assertRaises(RuntimeError):
+                main.serve(Calculator(), path, True)
+            with socket.socket(socket.AF_UNIX) as client:
+                client.connect(path)
+                client.sendall(b"6 * 7\n")
+                client.shutdown(socket.SHUT_WR)
+                self.assertEqual(client.makefile("rb").read(), b"42\n")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1 +1,111 @@
+import os
+
 MAX_CHARS = 10000   
+
+# Upper bound on threads used to run read-only tool calls from one model turn
+MAX_TOOL_WORKERS = 4
+
+# Maximum number of model calls for a single prompt
+MAX_ITERATIONS = 20
+
+# Number of prompts in flight at once in --batch mode
+BATCH_CONCURRENCY = 8
+
+# Everything kept between runs goes under STATE_DIR. A relative STATE_DIR
+# is per project: it's taken from the directory the agent runs in, which
+# for a daemon session is its client's (see state_dir.py). The *_DIR paths
+# below are relative to that directory too.
+STATE_DIR = ".tinyagent"
+
+# On-disk model response cache used by --cache / --replay
+RESPONSE_CACHE_DIR = os.path.join(STATE_DIR, "responses")
+RESPONSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Total characters of tool results kept by the shared file/directory cache
+TOOL_CACHE_MAX_CHARS = 16 * 1024 * 1024
+
+# Estimated token budget for the history sent to the model (0 disables compaction).
+# The first prompt and the newest CONTEXT_KEEP_RECENT messages are never shrunk.
+CONTEXT_TOKEN_BUDGET = 32000
+CONTEXT_KEEP_RECENT = 6
+CONTEXT_DIGEST_CHARS = 400
+
+# Modules the warm Python pool (--warm-python) imports once, before forking
+# each run. Modules that fail to import are skipped.
+PYTHON_POOL_PRELOAD = ["unittest", "json", "re", "pkg.calculator", "pkg.render"]
+
+# run_python_file keeps the first/last bytes of each output stream. Past
+# RUN_OUTPUT_MAX_BYTES of combined output the script is killed, or left to
+# finish with its output dropped if RUN_OUTPUT_KILL_ON_OVERFLOW is False.
+RUN_OUTPUT_HEAD_BYTES = 8 * 1024
+RUN_OUTPUT_TAIL_BYTES = 8 * 1024
+RUN_OUTPUT_MAX_BYTES = 16 * 1024 * 1024
+RUN_OUTPUT_KILL_ON_OVERFLOW = True
+
+# Maximum number of entries get_files_info returns per page
+LISTING_PAGE_SIZE = 200
+
+# search_files trigram index: where it is persisted, the largest file it
+# indexes, and how often (seconds) it re-checks file mtimes for outside edits
+SEARCH_INDEX_DIR = os.path.join(STATE_DIR, "search")
+SEARCH_MAX_FILE_BYTES = 1024 * 1024
+SEARCH_RESCAN_SECONDS = 5
+SEARCH_MAX_RESULTS = 50
+
+# Number of functions --profile prints, sorted by cumulative time
+PROFILE_TOP_FUNCTIONS = 30
+
+# Client-side limits on model calls, shared by every session in the process
+# (0 turns a per-minute limit off). MODEL_MAX_CONCURRENCY is where the
+# adaptive cap on requests in flight starts and the most it grows back to.
+MODEL_REQUESTS_PER_MINUTE = 0
+MODEL_TOKENS_PER_MINUTE = 0
+MODEL_MAX_CONCURRENCY = 8
+LIMITER_POLL_SECONDS = 0.05
+
+# Attempts per model call, and the jittered exponential backoff between
+# them, for throttling (429), server errors (5xx) and dropped connections
+RETRY_MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+
+# Every prompt's conversation is appended here as <session id>.jsonl, for
+# --resume and --export. Exported transcripts cut text to SESSION_EXPORT_CHARS.
+SESSION_LOG_DIR = os.path.join(STATE_DIR, "sessions")
+SESSION_EXPORT_CHARS = 160
+
+# Where `main.py --serve` listens, and how many sessions it runs at once
+# (more wait their turn). Plain runs go to a daemon on this socket if one
+# is listening. One daemon serves every project, so it's under the home
+# directory's STATE_DIR.
+DAEMON_SOCKET = os.path.join("~", STATE_DIR, "daemon.sock")
+DAEMON_MAX_SESSIONS = 8
+
+# run_python_file: wall-clock timeout, and the setrlimit limits each script
+# runs under (0 leaves a limit alone): CPU seconds, address space, open
+# files and the size of any file it writes. At most RUN_MAX_CONCURRENT
+# scripts run at once across all sessions; more wait for a free slot.
+RUN_TIMEOUT_SECONDS = 30
+RUN_CPU_SECONDS = 30
+RUN_MAX_MEMORY_BYTES = 2 * 1024 * 1024 * 1024
+RUN_MAX_OPEN_FILES = 1024
+RUN_MAX_FILE_BYTES = 256 * 1024 * 1024
+RUN_MAX_CONCURRENT = os.cpu_count() or 4
+
+# run_tests: how many test files run at once, each in its own process (and
+# in one of the RUN_MAX_CONCURRENT slots), and how many failures the
+# summary lists
+RUN_TESTS_WORKERS = RUN_MAX_CONCURRENT
+RUN_TESTS_MAX_FAILURES = 20
+
+# Tool outputs longer than BLOB_SPILL_CHARS are stored once in this
+# content-addressed store, and the history keeps a reference plus the first
+# BLOB_PREVIEW_CHARS. Full outputs are put back only into the messages
+# compaction never shrinks (the newest CONTEXT_KEEP_RECENT and any the
+# model hasn't seen yet). Past BLOB_STORE_MAX_BYTES on disk, the least
+# recently used blobs are deleted.
+BLOB_STORE_DIR = os.path.join(STATE_DIR, "blobs")
+BLOB_STORE_MAX_BYTES = 256 * 1024 * 1024
+BLOB_SPILL_CHARS = 4 * 1024
+BLOB_PREVIEW_CHARS = 400
+BLOB_MEMORY_ENTRIES = 16
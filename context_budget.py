@@ -0,0 +1,88 @@
+from google.genai import types
+from blob_store import expand_recent
+from config import CONTEXT_KEEP_RECENT, CONTEXT_DIGEST_CHARS
+
+# Rough chars-per-token ratio; close enough to budget with, and free to compute
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(content: types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        if part.function_call:
+            chars += len(part.function_call.name or "") + len(str(part.function_call.args or {}))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _text_of(content: types.Content) -> str:
+    return "".join(part.text for part in content.parts or [] if part.text)
+
+
+def _tool_outputs(messages: list) -> set:
+    """
+    Indexes of the tool results in `messages`: the user messages right after
+    a model turn with function calls, one per call. Other user messages are
+    prompts (a resumed session adds one partway through) and never shrink.
+    """
+    indexes = set()
+    pending = 0
+    for i, content in enumerate(messages):
+        if content.role == "model":
+            pending = sum(1 for part in content.parts or [] if part.function_call)
+        elif pending and content.role == "user" and all(part.text is not None for part in content.parts or []):
+            indexes.add(i)
+            pending -= 1
+        else:
+            pending = 0
+    return indexes
+
+
+def digest(text: str, digest_chars: int = CONTEXT_DIGEST_CHARS) -> str:
+    head = text[:digest_chars]
+    return f"{head}\n[... {len(text) - len(head)} more characters of this earlier tool result were elided; call the tool again if you need them]"
+
+
+def stub(text: str) -> str:
+    first_line = text.strip().split("\n", 1)[0][:80]
+    return f"[Earlier tool result elided: {len(text)} characters, starting with {first_line!r}]"
+
+
+def compact_history(messages: list, token_budget: int, keep_recent: int = CONTEXT_KEEP_RECENT):
+    """
+    Returns the contents to send for `messages` plus the estimated token
+    count before and after compaction. `messages` itself is not modified.
+
+    While the estimate is over `token_budget`, older tool outputs are cut down
+    to short digests, oldest first, and then to one-line stubs. The original
+    prompt and the newest `keep_recent` messages are always sent unchanged, so
+    the result can still be over budget.
+
+    Tool outputs spilled to the blob store are put back in full in those
+    newest messages, or everywhere when there is no budget.
+    """
+    messages = expand_recent(messages, keep_recent if token_budget > 0 else len(messages))
+    sizes = [estimate_tokens(content) for content in messages]
+    before = sum(sizes)
+    if token_budget <= 0 or before <= token_budget:
+        return messages, before, before
+
+    contents = list(messages)
+    total = before
+    tool_outputs = _tool_outputs(messages)
+    candidates = [i for i in range(1, max(1, len(messages) - keep_recent)) if i in tool_outputs]
+
+    for shrink in (digest, stub):
+        for i in candidates:
+            if total <= token_budget:
+                break
+            text = _text_of(messages[i])
+            shorter = types.Content(role="user", parts=[types.Part(text=shrink(text))])
+            new_size = estimate_tokens(shorter)
+            if new_size < sizes[i]:
+                contents[i] = shorter
+                total -= sizes[i] - new_size
+                sizes[i] = new_size
+
+    return contents, before, total
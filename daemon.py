@@ -0,0 +1,198 @@
+"""
+A long-lived agent process serving sessions over a Unix socket, so each
+prompt skips interpreter start, the SDK import, client construction and
+TLS setup, and finds the tool caches, search indexes and warm Python pools
+of earlier sessions still in memory. What a session keeps on disk goes
+under its client's project, as it would without the daemon (state_dir.py).
+
+The protocol is newline-delimited JSON. The client sends one request,
+{"argv": [...], "cwd": "..."}, with the same arguments main.py takes; the
+daemon answers with {"out": text} messages as the session prints, then
+{"exit": code}.
+
+Only the standard library is imported up front, since the client side
+runs on every CLI invocation.
+"""
+import contextvars
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+# The stream a session's prints go to, in the daemon. Tool threads and
+# asyncio.to_thread copy the context, so their output follows the session.
+_session_output = contextvars.ContextVar("session_output", default=None)
+
+
+class _RoutedOutput:
+    """Stands in for sys.stdout in the daemon: writes go to the current session's client, or the daemon's own stdout outside a session."""
+
+    def __init__(self, default):
+        self._default = default
+
+    def _target(self):
+        return _session_output.get() or self._default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+class _SessionWriter:
+    """Sends a session's output to its client, one message per line or flush."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if "\n" in text:
+                self._send()
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            self._send()
+
+    def _send(self):
+        if self._pending:
+            message = {"out": "".join(self._pending)}
+            self._pending.clear()
+            self._wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _send(wfile, message):
+    wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+
+
+class AgentDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs each request as a session on its own thread, with at most
+    `max_sessions` running at once (the rest wait their turn). Every session
+    shares `client`, and with it the connection pool and rate limiter.
+    `run` is main.run, called with arguments parsed by `parser`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, client, parser, run, max_sessions: int):
+        self.socket_path = os.path.abspath(socket_path)
+        self.client = client
+        self.parser = parser
+        self.run_session = run
+        self.sessions = threading.BoundedSemaphore(max_sessions)
+        _remove_stale_socket(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        super().__init__(self.socket_path, _SessionHandler)
+        self._stdout = sys.stdout
+        sys.stdout = _RoutedOutput(sys.stdout)
+
+    def server_close(self):
+        super().server_close()
+        sys.stdout = self._stdout
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+    def session_args(self, request: dict):
+        """The request's arguments, with paths made relative to the client's directory instead of the daemon's."""
+        cwd = request["cwd"]
+        args = self.parser.parse_args(request["argv"])
+        args.session_dir = os.path.join(cwd, args.session_dir)
+        if args.resume and os.path.isfile(os.path.join(cwd, args.resume)):
+            args.resume = os.path.join(cwd, args.resume)
+        return args
+
+
+class _SessionHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        from functions.call_function import WORKING_DIRECTORY, session_working_directory
+        from state_dir import session_directory
+
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            _send(self.wfile, {"out": "Error: malformed request\n"})
+            _send(self.wfile, {"exit": 2})
+            return
+
+        writer = _SessionWriter(self.wfile)
+        _session_output.set(writer)
+        session_working_directory.set(os.path.join(request["cwd"], WORKING_DIRECTORY))
+        session_directory.set(request["cwd"])
+        exit_code = 0
+        with self.server.sessions:
+            try:
+                self.server.run_session(self.server.session_args(request), self.server.client)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 1
+            except (BrokenPipeError, ConnectionResetError):
+                # The client went away; everything so far is in the session log
+                return
+            except Exception as e:
+                print(f"Error: {e}")
+                exit_code = 1
+        try:
+            writer.flush()
+            _send(self.wfile, {"exit": exit_code})
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path: str):
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+
+def serve(socket_path: str, client, parser, run, max_sessions: int):
+    with AgentDaemon(socket_path, client, parser, run, max_sessions) as daemon:
+        print(f"Agent daemon listening on {daemon.socket_path} (Ctrl-C to stop)")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def forward(socket_path: str, argv: list, cwd: str, out=None):
+    """
+    Runs a session on the daemon at `socket_path`, copying its output to
+    `out` (stdout by default) as it arrives. Returns the session's exit
+    code, or None if no daemon is listening.
+    """
+    out = out or sys.stdout
+    sock = socket.socket(socket.AF_UNIX)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+
+    with sock, sock.makefile("rb") as replies:
+        sock.sendall((json.dumps({"argv": argv, "cwd": cwd}) + "\n").encode("utf-8"))
+        for line in replies:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            out.write(message["out"])
+            out.flush()
+    # The daemon went away mid-session
+    print("Error: lost the connection to the agent daemon", file=sys.stderr)
+    return 1
@@ -1,21 +1,40 @@
+import contextvars
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 from google.genai import types
 from functions.get_files_info import get_files_info
 from functions.get_file_content import get_file_content
 from functions.run_python import run_python_file
+from functions.run_tests import run_tests
 from functions.write_file import write_file
+from functions.edit_file import edit_file
+from functions.search_files import search_files
+from tracing import tracer
+from config import MAX_TOOL_WORKERS
 
 name_to_function = {
     "get_files_info": get_files_info,
     "get_file_content": get_file_content,
     "run_python_file": run_python_file,
-    "write_file": write_file
+    "run_tests": run_tests,
+    "write_file": write_file,
+    "edit_file": edit_file,
+    "search_files": search_files
 }
 
+# Functions that never change the working directory, so they are safe to run
+# at the same time as each other. Anything else is treated as a barrier.
+READ_ONLY_FUNCTIONS = {"get_files_info", "get_file_content", "search_files"}
+
 WORKING_DIRECTORY = "./calculator"
 
+# Set by the daemon for each session to WORKING_DIRECTORY under that
+# client's directory; the plain CLI leaves it unset
+session_working_directory = contextvars.ContextVar("session_working_directory", default=None)
+
 def call_function(function_call_part: types.FunctionCall, verbose: bool =False):
     function_name = function_call_part.name.lower()
-    function_args = function_call_part.args
+    function_args = function_call_part.args or {}
 
     if verbose:
         print(f"Calling function: {function_name}({function_args})")
@@ -27,7 +46,13 @@ def call_function(function_call_part: types.FunctionCall, verbose: bool =False):
     if not func:
         response = {"error": f"Unknown function: {function_name}"}
     else:
-        function_result = func(WORKING_DIRECTORY, **function_args)
+        with tracer.span("tool", function_name) as span:
+            if tracer.enabled:
+                span["args_bytes"] = len(json.dumps(function_args, default=str))
+            function_result = func(session_working_directory.get() or WORKING_DIRECTORY, **function_args)
+            span["result_bytes"] = len(function_result) if isinstance(function_result, str) else None
+            if isinstance(function_result, str) and function_result.startswith("Error"):
+                span["error"] = function_result[:200]
         response = {"result": function_result}
 
     return types.Content(
@@ -41,5 +66,57 @@ def call_function(function_call_part: types.FunctionCall, verbose: bool =False):
     )
 
 
+class ToolDispatcher:
+    """
+    Starts function calls as they are submitted and hands back their results
+    in submission order.
+
+    Consecutive read-only calls run together on a thread pool of up to
+    `max_workers` threads. A write, `run_python_file` or `run_tests` call waits for
+    everything before it to finish, and runs alone before anything after it
+    starts, so the model sees the same effects as a sequential run.
+    """
+
+    def __init__(self, verbose: bool = False, max_workers: int = MAX_TOOL_WORKERS):
+        self.verbose = verbose
+        self._pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 1 else None
+        self._pending = []  # reads submitted since the last barrier
+        self._results = []  # futures or finished results, in call order
+
+    def submit(self, function_call: types.FunctionCall):
+        if self._pool and function_call.name.lower() in READ_ONLY_FUNCTIONS:
+            # Run in a copy of this context so the call's trace span nests under the current one
+            future = self._pool.submit(contextvars.copy_context().run, call_function, function_call, self.verbose)
+            self._pending.append(future)
+            self._results.append(future)
+            return
+
+        # Barrier: drain the reads queued so far, then run this call alone
+        for future in self._pending:
+            future.result()
+        self._pending = []
+        self._results.append(call_function(function_call, self.verbose))
+
+    def results(self):
+        results = [result.result() if isinstance(result, Future) else result for result in self._results]
+        self._pending = []
+        self._results = []
+        return results
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 
-    
\ No newline at end of file
+def call_functions(function_calls: list[types.FunctionCall], verbose: bool = False, max_workers: int = MAX_TOOL_WORKERS):
+    """Runs every function call from one model turn and returns the results in call order."""
+    with ToolDispatcher(verbose, max_workers) as dispatcher:
+        for function_call in function_calls:
+            dispatcher.submit(function_call)
+        return dispatcher.results()
@@ -0,0 +1,205 @@
+import os
+import re
+import tempfile
+from google.genai import types
+from functions.tool_cache import tool_cache
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class EditError(Exception):
+    """An edit that doesn't apply cleanly to the file's current contents."""
+
+
+def edit_file(working_directory, file_path, edits=None, diff=None):
+    abs_working_dir = os.path.abspath(working_directory)
+    abs_file_path = os.path.abspath(os.path.join(working_directory, file_path))
+
+    if not abs_file_path.startswith(abs_working_dir):
+        return f'Error: Cannot edit "{file_path}" as it is outside the permitted working directory'
+
+    if not os.path.isfile(abs_file_path):
+        return f'Error: File not found or is not a regular file: "{file_path}" (use write_file to create it)'
+
+    if bool(edits) == bool(diff):
+        return "Error: Provide exactly one of edits or diff"
+
+    try:
+        with open(abs_file_path, "r", newline="") as f:
+            content = f.read()
+
+        spans = _search_replace_spans(content, edits) if edits else _diff_spans(content, diff)
+        new_content, changed = _apply(content, spans)
+        _write_atomic(abs_file_path, new_content)
+    except EditError as e:
+        return f'Error: {e}. "{file_path}" was not changed'
+    except Exception as e:
+        return f"Error: editing file: {e}"
+
+    # Drop cached reads of this file and listings of the directories above it
+    tool_cache.invalidate(abs_file_path)
+
+    ranges = ", ".join(f"{start}-{end}" if end > start else str(start) for start, end in changed)
+    return f'Successfully edited "{file_path}" ({len(spans)} change{"s" if len(spans) != 1 else ""}; now lines {ranges})'
+
+
+def _search_replace_spans(content, edits):
+    """(start, end, replacement) for each edit, found in the original content."""
+    spans = []
+    for number, edit in enumerate(edits, start=1):
+        search = edit.get("search", "")
+        replace = edit.get("replace", "")
+        if not search:
+            raise EditError(f"edit {number} has an empty search string")
+
+        start = content.find(search)
+        if start == -1:
+            raise EditError(f"edit {number}: search text not found")
+        if content.find(search, start + 1) != -1:
+            raise EditError(f"edit {number}: search text matches more than once; include more surrounding lines")
+        spans.append((start, start + len(search), replace))
+    return spans
+
+
+def _parse_hunks(diff):
+    hunks = []
+    hunk = None
+    for line in diff.splitlines():
+        header = HUNK_HEADER.match(line)
+        if header:
+            hunk = {"old_start": int(header.group(1)), "old": [], "new": []}
+            hunks.append(hunk)
+        elif hunk is None or line.startswith("\\"):
+            continue  # file headers, "\ No newline at end of file"
+        elif line.startswith("-"):
+            hunk["old"].append(line[1:])
+        elif line.startswith("+"):
+            hunk["new"].append(line[1:])
+        elif line.startswith(" ") or line == "":
+            hunk["old"].append(line[1:])
+            hunk["new"].append(line[1:])
+    if not hunks:
+        raise EditError("diff has no @@ hunks")
+    return hunks
+
+
+def _diff_spans(content, diff):
+    """(start, end, replacement) for each unified diff hunk, checked against the original content."""
+    lines = content.splitlines(keepends=True)
+    bare = [line.rstrip("\r\n") for line in lines]
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+
+    spans = []
+    for number, hunk in enumerate(_parse_hunks(diff), start=1):
+        old, new = hunk["old"], hunk["new"]
+        if not old:
+            # Pure insertion after line old_start
+            index = min(hunk["old_start"], len(lines))
+        else:
+            expected = hunk["old_start"] - 1
+            if bare[expected:expected + len(old)] == old:
+                index = expected
+            else:
+                # The hunk's line numbers may be stale; accept a unique match elsewhere
+                matches = [i for i in range(len(bare) - len(old) + 1) if bare[i:i + len(old)] == old]
+                if not matches:
+                    raise EditError(f"hunk {number} does not match the current contents")
+                if len(matches) > 1:
+                    raise EditError(f"hunk {number} matches {len(matches)} places; add more context lines")
+                index = matches[0]
+
+        end = index + len(old)
+        replacement = "".join(line + newline for line in new)
+        # Keep a missing final newline missing
+        if end == len(lines) and lines and not lines[-1].endswith("\n") and replacement:
+            replacement = replacement[:-len(newline)]
+        if not old and index == len(lines) and lines and not lines[-1].endswith("\n"):
+            replacement = newline + replacement.rstrip("\r\n")
+        spans.append((offsets[index], offsets[end], replacement))
+    return spans
+
+
+def _apply(content, spans):
+    """Applies non-overlapping spans; returns the new content and the 1-based line range of each change in it."""
+    spans = sorted(spans, key=lambda span: span[0])
+    for (_, previous_end, _), (start, _, _) in zip(spans, spans[1:]):
+        if start < previous_end:
+            raise EditError("edits overlap")
+
+    pieces = []
+    changed = []
+    position = 0
+    line = 1
+    for start, end, replacement in spans:
+        unchanged = content[position:start]
+        pieces.append(unchanged)
+        line += unchanged.count("\n")
+
+        first = line
+        pieces.append(replacement)
+        line += replacement.count("\n")
+        last = line - 1 if replacement.endswith("\n") else line
+        changed.append((first, max(first, last)))
+        position = end
+    pieces.append(content[position:])
+    return "".join(pieces), changed
+
+
+def _write_atomic(abs_file_path, content):
+    directory = os.path.dirname(abs_file_path)
+    mode = os.stat(abs_file_path).st_mode
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".edit-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, abs_file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+edit_file_schema = types.FunctionDeclaration(
+    name="edit_file",
+    description=(
+        "Edits part of an existing file within the working directory, instead of rewriting it with write_file. "
+        "Give either search/replace edits, each of whose search text must occur exactly once in the file, or a unified diff. "
+        "All changes are checked against the current contents and applied together, or not at all."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "file_path": types.Schema(
+                type=types.Type.STRING,
+                description="The relative path to the file from the working_directory."
+            ),
+            "edits": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(
+                    type=types.Type.OBJECT,
+                    properties={
+                        "search": types.Schema(
+                            type=types.Type.STRING,
+                            description="Exact text to replace, including enough surrounding lines to be unique."
+                        ),
+                        "replace": types.Schema(
+                            type=types.Type.STRING,
+                            description="The text to put in its place."
+                        )
+                    },
+                    required=["search", "replace"]
+                ),
+                description="Search/replace edits to apply."
+            ),
+            "diff": types.Schema(
+                type=types.Type.STRING,
+                description="A unified diff (with @@ hunks) to apply to the file."
+            )
+        },
+        required=["file_path"]
+    )
+)
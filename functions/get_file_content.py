@@ -1,38 +1,161 @@
 import os
 from google.genai import types
 from config import MAX_CHARS
+from functions.tool_cache import tool_cache
 
+# Chunk size used to count lines while skipping to start_line
+SKIP_CHUNK = 1 << 20
 
-def get_file_content(working_directory, file_path):
+
+def get_file_content(working_directory, file_path, offset=None, length=None, start_line=None, end_line=None):
     full_path = os.path.join(working_directory, file_path)
     abs_path = os.path.abspath(full_path)
 
     if not abs_path.startswith(os.path.abspath(working_directory)):
         return f'Error: Cannot read "{file_path}" as it is outside the permitted working directory'
-    
+
     if not os.path.isfile(abs_path):
         return f'Error: File not found or is not a regular file: "{file_path}"'
 
+    args = (file_path, offset, length, start_line, end_line)
+    return tool_cache.cached("get_file_content", abs_path, lambda: _read_file(abs_path, *args), args)
+
+
+def _read_file(abs_path, file_path, offset, length, start_line, end_line):
+    # Never read more than MAX_CHARS bytes of content, however big the file is
     try:
-        with open(abs_path, "r") as f:
-            content = f.read()
-            if len(content) > MAX_CHARS:
-                content = content[:MAX_CHARS] + " " + f' [...File "{file_path} truncated at {MAX_CHARS} characters"]'
-            return content
+        if start_line is not None or end_line is not None:
+            return _read_lines(abs_path, file_path, start_line, end_line)
+        return _read_range(abs_path, file_path, offset, length)
     except Exception as e:
         return f'Error: {str(e)}'
 
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def _offset_hint(file_path, next_offset, remaining):
+    return f'\n[...{remaining} more bytes in "{file_path}"; call get_file_content with offset={next_offset} to continue]'
+
+
+def _read_range(abs_path, file_path, offset, length):
+    offset = max(0, int(offset or 0))
+    limit = MAX_CHARS if length is None else max(0, min(int(length), MAX_CHARS))
+
+    with open(abs_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        f.seek(offset)
+        data = f.read(limit)
+
+    if offset + len(data) < size:
+        # Don't split a UTF-8 character; the next call starts at its first byte
+        data = _drop_partial_character(data)
+    end = offset + len(data)
+
+    content = _decode(data)
+    if end >= size:
+        return content
+
+    hint = _offset_hint(file_path, end, size - end)
+    if offset == 0 and length is None:
+        return content + " " + f' [...File "{file_path} truncated at {MAX_CHARS} characters"]' + hint
+    return content + hint
+
+
+def _drop_partial_character(data: bytes) -> bytes:
+    """Drops a multi-byte UTF-8 character cut off at the end of `data`."""
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte & 0xC0 == 0x80:
+            continue  # continuation byte, keep looking for the lead byte
+        if byte >= 0xF0:
+            needed = 4
+        elif byte >= 0xE0:
+            needed = 3
+        elif byte >= 0xC0:
+            needed = 2
+        else:
+            needed = 1
+        return data[:-back] if back < needed else data
+    return data
+
+
+def _read_lines(abs_path, file_path, start_line, end_line):
+    start_line = max(1, int(start_line or 1))
+    end_line = None if end_line is None else int(end_line)
+
+    with open(abs_path, "rb") as f:
+        # Skip to start_line by counting newlines a chunk at a time
+        line = 1
+        while line < start_line:
+            chunk_start = f.tell()
+            chunk = f.read(SKIP_CHUNK)
+            if not chunk:
+                return f'Error: start_line {start_line} is past the end of "{file_path}" ({line} lines)'
+
+            newlines = chunk.count(b"\n")
+            if line + newlines < start_line:
+                line += newlines
+                continue
+
+            position = -1
+            while line < start_line:
+                position = chunk.index(b"\n", position + 1)
+                line += 1
+            f.seek(chunk_start + position + 1)
+
+        position = f.tell()
+        out = bytearray()
+        while end_line is None or line <= end_line:
+            data = f.readline(MAX_CHARS - len(out) + 1)
+            if not data:
+                break
+
+            if len(out) + len(data) > MAX_CHARS:
+                if not out:
+                    # A single line longer than MAX_CHARS: page through it by offset
+                    return _read_range(abs_path, file_path, position, MAX_CHARS)
+                return _decode(out) + f'\n[...output limit reached; call get_file_content with start_line={line} to continue]'
+
+            out += data
+            position += len(data)
+            line += 1
+
+    return _decode(out)
+
+
 get_file_content_schema = types.FunctionDeclaration(
     name="get_file_content",
-    description="Reads the content of a file within the working directory. If the file is too large, it truncates the content to a maximum number of characters.",
+    description=(
+        "Reads the content of a file within the working directory. At most a fixed number of characters is returned per call; "
+        "when the result is cut short it ends with a hint saying how to continue. Use offset/length or start_line/end_line "
+        "to read just part of a large file."
+    ),
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
             "file_path": types.Schema(
                 type=types.Type.STRING,
                 description="The relative path to the file from the working_directory."
+            ),
+            "offset": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional byte offset to start reading from. Defaults to the start of the file."
+            ),
+            "length": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional number of bytes to read from offset, capped at the per-call limit."
+            ),
+            "start_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional first line to read (1-based). Takes precedence over offset/length."
+            ),
+            "end_line": types.Schema(
+                type=types.Type.INTEGER,
+                description="Optional last line to read (inclusive). Defaults to reading as many lines as fit."
             )
         },
         required=["file_path"]
     )
-)
\ No newline at end of file
+)
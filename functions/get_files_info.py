@@ -1,47 +1,175 @@
 import os
+from fnmatch import fnmatchcase
 from google.genai import types
+from functions.tool_cache import tool_cache
+from functions.ignore_rules import IgnoreRules
+from config import LISTING_PAGE_SIZE
 
-def get_files_info(working_directory, directory="."):
+# Entries are (relative path, is_dir, os.DirEntry)
+SORT_KEYS = {
+    "name": lambda entry: entry[0],
+    "size": lambda entry: (-_size(entry[2]), entry[0]),
+    "type": lambda entry: (not entry[1], entry[0]),
+}
+
+def get_files_info(working_directory, directory=".", depth=0, pattern=None, ignore=None, respect_gitignore=True, sort_by="name", cursor=None, limit=None):
     full_path = os.path.join(working_directory, directory)
-    
+
     # Normalized Path
     abs_path = os.path.abspath(full_path);
 
     if not abs_path.startswith(os.path.abspath(working_directory)):
         return f'Error: Cannot list "{directory}" as it is outside the permitted working directory'
-    
+
     if not os.path.isdir(abs_path):
         return f'Error: The path "{abs_path}" is not a valid directory'
-    
-    result = []
-    
+
+    if sort_by not in SORT_KEYS:
+        return f'Error: sort_by must be one of {", ".join(SORT_KEYS)}'
+
+    try:
+        depth, cursor = int(depth or 0), int(cursor or 0)
+        limit = max(1, min(int(limit or LISTING_PAGE_SIZE), LISTING_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return "Error: depth, cursor and limit must be integers"
+
+    args = (depth, pattern, tuple(ignore or ()), bool(respect_gitignore), sort_by)
+    list_entries = lambda: _list_entries(os.path.abspath(working_directory), abs_path, *args)
+
+    # A single directory's stat covers which entries it has, but not a whole
+    # subtree, and not their sizes: a file edited in place leaves it alone.
+    # So only the names are cached, and sizes are stat'ed for every page
+    if depth > 0 or sort_by == "size":
+        entries = list_entries()
+    else:
+        entries = tool_cache.cached("get_files_info", abs_path, list_entries, args)
+    if entries.startswith("Error"):
+        return entries
+    return _page(abs_path, entries, cursor, limit)
+
+
+def _size(entry):
+    """Size of an os.DirEntry or path."""
+    try:
+        return os.stat(entry).st_size
+    except OSError:
+        return 0  # e.g. a broken symlink
+
+
+def _walk(abs_path, depth, pattern, ignore, rules):
+    """
+    Yields (relative path, is_dir, os.DirEntry) for the entries under
+    `abs_path`, descending `depth` levels. os.scandir gives is_dir() for free
+    from the directory listing, and sizes are only stat'ed for the entries
+    that end up on the returned page (or for all of them when sorting by
+    size). The old listdir + isdir + getsize listing cost two stats per entry.
+    """
+    stack = [(abs_path, "", 0, rules)]
+    while stack:
+        dir_path, rel_dir, level, rules = stack.pop()
+        try:
+            iterator = os.scandir(dir_path)
+        except OSError:
+            if level == 0:
+                raise
+            continue  # unreadable subdirectory
+
+        with iterator:
+            for entry in iterator:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if rules is not None and rules.ignored(entry.path, is_dir):
+                    continue
+                if ignore and any(fnmatchcase(entry.name, glob) or fnmatchcase(rel_path, glob) for glob in ignore):
+                    continue
+
+                if is_dir and level < depth:
+                    stack.append((entry.path, rel_path, level + 1, rules.child(entry.path) if rules is not None else None))
+
+                if pattern and not (fnmatchcase(entry.name, pattern) or fnmatchcase(rel_path, pattern)):
+                    continue
+
+                yield rel_path, is_dir, entry
+
+
+def _list_entries(root, abs_path, depth, pattern, ignore, respect_gitignore, sort_by):
+    """
+    The sorted entries, as a string so the tool cache can keep it: "d" or
+    "f" and the relative path for each, separated by NULs, which no file
+    name has.
+    """
+    rules = IgnoreRules.for_directory(root, abs_path) if respect_gitignore else None
+
     try:
-        # Loop over each entry in the directory,
-        # and append the entry's info into 'result' 
-        for entry in os.listdir(abs_path):
-            entry_path = os.path.join(abs_path, entry)
-            
-            is_dir = os.path.isdir(entry_path)
-            file_size = os.path.getsize(entry_path)
-
-            result.append(f"- {entry}: file_size={file_size} bytes, is_dir={is_dir}")
-            
+        entries = sorted(_walk(abs_path, depth, pattern, ignore, rules), key=SORT_KEYS[sort_by])
     except Exception as e:
         return f"Error: '{str(e)}'"
-    
+    return "\0".join(("d" if is_dir else "f") + name for name, is_dir, _ in entries)
+
+
+def _page(abs_path, entries, cursor, limit):
+    entries = entries.split("\0") if entries else []
+    page = entries[cursor:cursor + limit]
+    result = [
+        f"- {entry[1:]}: file_size={_size(os.path.join(abs_path, entry[1:]))} bytes, is_dir={entry[0] == 'd'}"
+        for entry in page
+    ]
+
+    remaining = len(entries) - cursor - len(page)
+    if remaining > 0:
+        result.append(f'[...{remaining} more entries; call get_files_info again with cursor="{cursor + len(page)}" to continue]')
+
     return "\n".join(result)
 
 
 get_files_info_schema = types.FunctionDeclaration(
     name="get_files_info",
-    description="List information about files in a specified directory along with their sizes within the working directory.",
+    description=(
+        "List information about files in a specified directory along with their sizes within the working directory. "
+        "Can descend into subdirectories, filter by glob and page through large listings with a cursor. "
+        "Files matched by .gitignore are skipped by default."
+    ),
     parameters=types.Schema(
         type=types.Type.OBJECT,
         properties={
             "directory": types.Schema(
                 type=types.Type.STRING,
                 description="The target directory to list files from, relative to the working directory. Defaults to current directory."
+            ),
+            "depth": types.Schema(
+                type=types.Type.INTEGER,
+                description="How many levels of subdirectories to descend into. Defaults to 0 (only the directory itself)."
+            ),
+            "pattern": types.Schema(
+                type=types.Type.STRING,
+                description="Optional glob (e.g. \"*.py\") an entry's name or relative path must match to be listed."
+            ),
+            "ignore": types.Schema(
+                type=types.Type.ARRAY,
+                items=types.Schema(type=types.Type.STRING),
+                description="Optional globs of entries to skip, in addition to .gitignore."
+            ),
+            "respect_gitignore": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Whether to skip entries matched by .gitignore files. Defaults to true."
+            ),
+            "sort_by": types.Schema(
+                type=types.Type.STRING,
+                enum=list(SORT_KEYS),
+                description="Order of the listing: name (default), size (largest first) or type (directories first)."
+            ),
+            "cursor": types.Schema(
+                type=types.Type.STRING,
+                description="Cursor from a previous call's continuation hint, to fetch the next page."
+            ),
+            "limit": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of entries per page, up to {LISTING_PAGE_SIZE} (the default)."
             )
-        } 
+        }
     )
-)
\ No newline at end of file
+)
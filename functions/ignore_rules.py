@@ -0,0 +1,71 @@
+import os
+from fnmatch import fnmatchcase
+
+
+class IgnoreRules:
+    """
+    A small .gitignore matcher covering what the tools need: globs, "!"
+    negation, a trailing "/" for directory-only patterns and a leading "/"
+    (or any inner "/") to anchor a pattern to its .gitignore's directory.
+    Later rules win, as in git.
+    """
+
+    def __init__(self, rules=()):
+        # (base directory, pattern, negated, directory only, anchored)
+        self.rules = list(rules)
+
+    @classmethod
+    def for_directory(cls, root: str, directory: str):
+        """Rules from every .gitignore between `root` and `directory`, inclusive."""
+        root = os.path.abspath(root)
+        directory = os.path.abspath(directory)
+        rules = cls().child(root)
+        current = root
+        for part in os.path.relpath(directory, root).split(os.sep):
+            if part in (".", ""):
+                continue
+            current = os.path.join(current, part)
+            rules = rules.child(current)
+        return rules
+
+    def child(self, directory: str):
+        """These rules plus `directory`/.gitignore, if it has one."""
+        try:
+            with open(os.path.join(directory, ".gitignore"), "r") as f:
+                lines = f.read().splitlines()
+        except (OSError, UnicodeDecodeError):
+            return self
+
+        rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line.startswith("**/"):
+                line = line[3:]
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                rules.append((directory, line, negated, dir_only, anchored))
+        return IgnoreRules(rules)
+
+    def ignored(self, abs_path: str, is_dir: bool) -> bool:
+        if os.path.basename(abs_path) == ".git":
+            return True
+
+        ignored = False
+        name = os.path.basename(abs_path)
+        for base, pattern, negated, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if not abs_path.startswith(base + os.sep):
+                continue
+            target = abs_path[len(base) + 1:].replace(os.sep, "/") if anchored else name
+            if fnmatchcase(target, pattern):
+                ignored = not negated
+        return ignored
@@ -0,0 +1,83 @@
+import os
+import selectors
+import time
+from config import RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES, RUN_OUTPUT_MAX_BYTES
+
+READ_CHUNK = 65536
+
+
+class BoundedOutput:
+    """
+    Keeps the first `head_bytes` and the last `tail_bytes` of a stream and
+    counts everything in between, so memory stays flat however much a
+    process prints.
+    """
+
+    def __init__(self, head_bytes: int = RUN_OUTPUT_HEAD_BYTES, tail_bytes: int = RUN_OUTPUT_TAIL_BYTES):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.head_bytes - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            if len(self.tail) > self.tail_bytes:
+                del self.tail[:len(self.tail) - self.tail_bytes]
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.head) - len(self.tail)
+
+    def text(self) -> str:
+        def decode(data):
+            return data.decode("utf-8", errors="replace").replace("\r\n", "\n")
+
+        if not self.dropped:
+            return decode(self.head + self.tail)
+        return f"{decode(self.head)}\n[... {self.dropped} bytes of output dropped ...]\n{decode(self.tail)}"
+
+
+def capture_pipes(out_fd: int, err_fd: int, deadline: float, on_overflow=None, max_bytes: int = RUN_OUTPUT_MAX_BYTES):
+    """
+    Reads stdout/stderr pipes into BoundedOutputs until both close or
+    `deadline` (a time.monotonic() value) passes.
+
+    Once more than `max_bytes` have been read in total, `on_overflow` is
+    called once (typically to kill the process). Reading goes on either way,
+    so a killed process's pipes are drained to EOF and a process left running
+    keeps its last output in the tail buffer.
+
+    Returns (stdout, stderr, timed_out, overflowed).
+    """
+    outputs = {out_fd: BoundedOutput(), err_fd: BoundedOutput()}
+    timed_out = False
+    overflowed = False
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(out_fd, selectors.EVENT_READ)
+        selector.register(err_fd, selectors.EVENT_READ)
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                data = os.read(key.fd, READ_CHUNK)
+                if not data:
+                    selector.unregister(key.fd)
+                    continue
+
+                outputs[key.fd].write(data)
+                if not overflowed and outputs[out_fd].total + outputs[err_fd].total > max_bytes:
+                    overflowed = True
+                    if on_overflow:
+                        on_overflow()
+
+    return outputs[out_fd], outputs[err_fd], timed_out, overflowed
@@ -0,0 +1,165 @@
+import itertools
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from config import PYTHON_POOL_PRELOAD
+from functions.output_capture import capture_pipes
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_pool_server.py")
+
+# Off by default; main.py turns it on with --warm-python
+enabled = False
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolUnavailableError(Exception):
+    """The fork server is gone; the caller should fall back to a cold run."""
+
+
+class WarmPythonPool:
+    """
+    Runs Python scripts by forking them from a warm interpreter.
+
+    A fork server (python_pool_server.py) starts once per working directory
+    and imports PYTHON_POOL_PRELOAD up front. Every run still gets a fresh,
+    isolated child process with its own stdout/stderr pipes, argv and exit
+    code. It only skips interpreter startup and the preloaded imports.
+    Preloaded working-directory modules that were edited since are dropped
+    before forking, so children never see stale code.
+    """
+
+    def __init__(self, working_directory: str, preload=PYTHON_POOL_PRELOAD):
+        self.working_directory = os.path.abspath(working_directory)
+        self._sock, server_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self._process = subprocess.Popen(
+            [sys.executable, SERVER_PATH, str(server_sock.fileno()), self.working_directory, *preload],
+            pass_fds=[server_sock.fileno()],
+            stdin=subprocess.DEVNULL,
+        )
+        server_sock.close()
+
+        self._ids = itertools.count()
+        self._runs = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._read_replies, daemon=True).start()
+
+    def _read_replies(self):
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                break
+
+            message = json.loads(data)
+            with self._lock:
+                run = self._runs.get(message["id"])
+            if run is None:
+                continue
+            if "pid" in message:
+                run["pid"] = message["pid"]
+                run["started"].set()
+            else:
+                run["returncode"] = message["returncode"]
+                run["usage"] = {"cpu_seconds": message["cpu_seconds"], "max_rss": message["max_rss"]}
+                run["done"].set()
+
+        # Server is gone: wake everyone still waiting
+        self._closed = True
+        with self._lock:
+            for run in self._runs.values():
+                run["started"].set()
+                run["done"].set()
+
+    def run(self, abs_path: str, args: list, timeout: float, kill_on_overflow: bool = True, limits: dict = None):
+        """
+        Runs one script to completion under the setrlimit `limits`
+        ({"RLIMIT_CPU": (soft, hard), ...}) and returns (stdout, stderr,
+        returncode, overflowed, usage), where usage is the child's
+        {"cpu_seconds", "max_rss"}. Raises subprocess.TimeoutExpired after
+        `timeout` seconds, with the child killed.
+        """
+        if self._closed:
+            raise PoolUnavailableError("warm Python pool has stopped")
+
+        run_id = next(self._ids)
+        run = {"pid": None, "returncode": None, "usage": None, "started": threading.Event(), "done": threading.Event()}
+        with self._lock:
+            self._runs[run_id] = run
+
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            request = {"id": run_id, "path": abs_path, "args": list(args), "cwd": self.working_directory, "limits": limits or {}}
+            try:
+                socket.send_fds(self._sock, [json.dumps(request).encode()], [out_w, err_w])
+            except OSError as e:
+                raise PoolUnavailableError(str(e))
+            finally:
+                os.close(out_w)
+                os.close(err_w)
+
+            deadline = time.monotonic() + timeout
+            on_overflow = (lambda: self._kill(run)) if kill_on_overflow else None
+            stdout, stderr, timed_out, overflowed = capture_pipes(out_r, err_r, deadline, on_overflow)
+
+            if not timed_out and not run["done"].wait(max(0.0, deadline - time.monotonic())):
+                timed_out = True
+            if timed_out:
+                self._kill(run)
+                raise subprocess.TimeoutExpired([abs_path, *args], timeout)
+            if run["returncode"] is None:
+                raise PoolUnavailableError("warm Python pool stopped during a run")
+
+            return stdout, stderr, run["returncode"], overflowed, run["usage"]
+        finally:
+            os.close(out_r)
+            os.close(err_r)
+            with self._lock:
+                self._runs.pop(run_id, None)
+
+    def _kill(self, run):
+        run["started"].wait(1)
+        if run["pid"] is not None:
+            try:
+                os.kill(run["pid"], signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def close(self):
+        self._closed = True
+        try:
+            # shutdown() also wakes the reply thread blocked in recv()
+            self._sock.shutdown(socket.SHUT_RDWR)
+            self._sock.close()
+        finally:
+            self._process.wait(timeout=5)
+
+
+def get_pool(working_directory: str):
+    """Returns the shared pool for `working_directory`, or None when the pool is disabled or unsupported."""
+    if not enabled or not hasattr(os, "fork"):
+        return None
+
+    key = os.path.abspath(working_directory)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = _pools[key] = WarmPythonPool(key)
+        return pool
+
+
+def discard_pool(working_directory: str):
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(working_directory), None)
+    if pool:
+        pool.close()
@@ -0,0 +1,176 @@
+"""
+Fork server behind functions.python_pool. Not meant to be run by hand.
+
+Usage: python python_pool_server.py <socket_fd> <working_directory> [module ...]
+
+Imports the given modules once, then waits for requests on a SEQPACKET Unix
+socket. Each request is a JSON message carrying the write ends of the
+stdout/stderr pipes. The server forks a fresh child that runs the script
+as __main__, with those pipes as its stdout/stderr and the request's
+setrlimit limits applied. The server replies with {"id", "pid"} once the
+child is forked and with {"id", "returncode", "cpu_seconds", "max_rss"}
+(ru_maxrss, as the platform reports it) once it exits.
+"""
+import atexit
+import builtins
+import importlib
+import json
+import os
+import resource
+import select
+import signal
+import socket
+import sys
+import threading
+import traceback
+import types
+
+
+def _module_files(working_directory):
+    """mtimes of every loaded module that lives in the working directory."""
+    files = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and os.path.abspath(path).startswith(working_directory + os.sep):
+            try:
+                files[name] = (path, os.stat(path).st_mtime_ns)
+            except OSError:
+                files[name] = (path, None)
+    return files
+
+
+def _drop_stale_modules(loaded):
+    """Forgets working-directory modules edited since they were imported, so children import them fresh."""
+    stale = set()
+    for name, (path, mtime) in loaded.items():
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            current = None
+        if current != mtime:
+            stale.add(name)
+
+    for name in list(sys.modules):
+        if any(name == s or name.startswith(s + ".") for s in stale):
+            sys.modules.pop(name, None)
+            loaded.pop(name, None)
+
+
+def _run_child(request, stdout_fd, stderr_fd):
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False)
+
+    for name, (soft, hard) in request.get("limits", {}).items():
+        resource.setrlimit(getattr(resource, name), (soft, hard))
+
+    os.chdir(request["cwd"])
+    sys.argv = [request["path"], *request["args"]]
+    sys.path[0] = os.path.dirname(request["path"])
+
+    # The script's own __main__, so pickling, atexit handlers and threads
+    # that look it up find the script rather than this server
+    main = types.ModuleType("__main__")
+    main.__file__ = request["path"]
+    main.__builtins__ = builtins
+    sys.modules["__main__"] = main
+
+    code = 0
+    try:
+        with open(request["path"], "rb") as f:
+            source = f.read()
+        exec(compile(source, request["path"], "exec"), main.__dict__)
+    except SystemExit as e:
+        if e.code is None:
+            code = 0
+        elif isinstance(e.code, int):
+            code = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except BaseException as e:
+        # Hide the server frames, like a plain `python script.py` would
+        tb = e.__traceback__
+        while tb and tb.tb_frame.f_code.co_filename != request["path"]:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb)
+        code = 1
+
+    # What the interpreter does on the way out, which os._exit would skip:
+    # wait for non-daemon threads, then run the atexit handlers
+    try:
+        threading._shutdown()
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(code & 0xFF)
+
+
+def main():
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    working_directory = os.path.abspath(sys.argv[2])
+    os.chdir(working_directory)
+    sys.path[0] = working_directory
+
+    for name in sys.argv[3:]:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+    loaded = _module_files(working_directory)
+
+    def reply(message):
+        sock.send(json.dumps(message).encode())
+
+    # SIGCHLD wakes the select loop through this pipe, so exits are reported promptly
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    children = {}
+    while True:
+        ready, _, _ = select.select([sock, wakeup_r], [], [])
+        if wakeup_r in ready:
+            os.read(wakeup_r, 4096)
+        if sock in ready:
+            data, fds, _, _ = socket.recv_fds(sock, 1 << 20, 2)
+            if not data:
+                break
+
+            request = json.loads(data)
+            _drop_stale_modules(loaded)
+            pid = os.fork()
+            if pid == 0:
+                sock.close()
+                os.close(wakeup_r)
+                os.close(wakeup_w)
+                _run_child(request, *fds)
+            for fd in fds:
+                os.close(fd)
+            children[pid] = request["id"]
+            reply({"id": request["id"], "pid": pid})
+
+        while children:
+            pid, status, usage = os.wait4(-1, os.WNOHANG)
+            if pid == 0:
+                break
+            reply({
+                "id": children.pop(pid),
+                "returncode": os.waitstatus_to_exitcode(status),
+                "cpu_seconds": usage.ru_utime + usage.ru_stime,
+                "max_rss": usage.ru_maxrss,
+            })
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,97 @@
-import os, subprocess, sys
+import os, signal, subprocess, sys, threading, time
 from google.genai import types
+from functions.tool_cache import tool_cache
+from functions import python_pool
+from functions.output_capture import capture_pipes
+from tracing import tracer
+from config import RUN_OUTPUT_MAX_BYTES, RUN_OUTPUT_KILL_ON_OVERFLOW, RUN_TIMEOUT_SECONDS, RUN_CPU_SECONDS, RUN_MAX_MEMORY_BYTES, RUN_MAX_OPEN_FILES, RUN_MAX_FILE_BYTES, RUN_MAX_CONCURRENT
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, no rusage
+    resource = None
+
+# Shared by every session in the process, so parallel agents queue for a
+# slot instead of all running scripts at once
+_run_slots = threading.BoundedSemaphore(RUN_MAX_CONCURRENT)
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+def run_limits():
+    """The setrlimit limits for one run, {"RLIMIT_...": (soft, hard)}, never above the limits this process already has."""
+    if resource is None:
+        return {}
+    wanted = {
+        # SIGXCPU at the soft limit, SIGKILL a second later if it's ignored
+        "RLIMIT_CPU": (RUN_CPU_SECONDS, RUN_CPU_SECONDS + 1),
+        "RLIMIT_AS": (RUN_MAX_MEMORY_BYTES, RUN_MAX_MEMORY_BYTES),
+        "RLIMIT_NOFILE": (RUN_MAX_OPEN_FILES, RUN_MAX_OPEN_FILES),
+        "RLIMIT_FSIZE": (RUN_MAX_FILE_BYTES, RUN_MAX_FILE_BYTES),
+    }
+    limits = {}
+    for name, (soft, hard) in wanted.items():
+        if not soft or not hasattr(resource, name):
+            continue
+        current = resource.getrlimit(getattr(resource, name))[1]
+        if current != resource.RLIM_INFINITY:
+            soft, hard = min(soft, current), min(hard, current)
+        limits[name] = (soft, hard)
+    return limits
+
+
+def _limit_note(returncode, usage, stderr):
+    """Says which limit stopped the script, when it looks like one did."""
+    if resource is None:
+        return None  # no limits were set
+    # SIGXCPU at the soft limit, or SIGKILL at the hard one if it was caught
+    cpu_signal = -getattr(signal, "SIGXCPU", 0)
+    if RUN_CPU_SECONDS and (returncode == cpu_signal or (returncode == -signal.SIGKILL and usage and usage["cpu_seconds"] >= RUN_CPU_SECONDS)):
+        return f"Process hit its CPU time limit of {RUN_CPU_SECONDS} s"
+    if RUN_MAX_MEMORY_BYTES and "MemoryError" in stderr:
+        return f"Process hit its memory limit of {RUN_MAX_MEMORY_BYTES // (1024 * 1024)} MB"
+    # Python ignores SIGXFSZ, so going over shows up as EFBIG
+    if RUN_MAX_FILE_BYTES and "File too large" in stderr:
+        return f"Process hit its file size limit of {RUN_MAX_FILE_BYTES // (1024 * 1024)} MB"
+    return None
+
+
+def _usage_attributes(usage, queued):
+    attributes = {"queued_seconds": round(queued, 3)}
+    if usage:
+        attributes["cpu_seconds"] = round(usage["cpu_seconds"], 3)
+        attributes["peak_rss_mb"] = round(usage["max_rss"] * _RSS_UNIT / (1024 * 1024), 1)
+    return attributes
+
+
+class RunStats:
+    """What the scripts run so far cost, for the verbose per-iteration stats."""
+
+    def __init__(self):
+        self.runs = 0
+        self.queued_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.last = None
+        self._lock = threading.Lock()
+
+    def record(self, attributes):
+        with self._lock:
+            self.runs += 1
+            self.queued_seconds += attributes["queued_seconds"]
+            self.cpu_seconds += attributes.get("cpu_seconds", 0.0)
+            self.peak_rss_mb = max(self.peak_rss_mb, attributes.get("peak_rss_mb", 0.0))
+            self.last = attributes
+
+    def stats(self):
+        line = f"Script runs: {self.runs}, {self.cpu_seconds:.2f} s CPU, peak RSS {self.peak_rss_mb:.1f} MB, {self.queued_seconds:.2f} s queued"
+        if self.last and "cpu_seconds" in self.last:
+            line += f" (last: {self.last['cpu_seconds']:.2f} s CPU, {self.last['peak_rss_mb']:.1f} MB)"
+        return line
+
+
+run_stats = RunStats()
+
 
 def run_python_file(working_directory: str, file_path: str, args=[]):
     full_path = os.path.join(working_directory, file_path)
@@ -14,34 +106,114 @@ def run_python_file(working_directory: str, file_path: str, args=[]):
     if not file_path.endswith(".py"):
         return f'Error: "{file_path}" is not a Python file.'
     try:
-        completed = subprocess.run(
-            [sys.executable, abs_path, *args],
-            cwd=working_directory,
-            capture_output=True,
-            timeout=30, 
-            text=True
-        )
+        stdout, stderr, returncode, overflowed, usage, queued = run_script(working_directory, abs_path, args, timeout=RUN_TIMEOUT_SECONDS)
+        # The script may have changed any file, so cached reads can't be trusted
+        tool_cache.clear()
 
-        stdout = completed.stdout.strip()
-        stderr = completed.stderr.strip()
+        stdout = stdout.text().strip()
+        stderr = stderr.text().strip()
         
         parts = []
         if stdout:
             parts.append(f"STDOUT: \n{stdout}")
         if stderr:
             parts.append(f"STDERR: \n{stderr}")
-        if completed.returncode != 0:
-            parts.append(f"Process exited with code {completed.returncode}")
+        if overflowed:
+            action = "process was killed" if RUN_OUTPUT_KILL_ON_OVERFLOW else "the rest was dropped"
+            parts.append(f"Output exceeded {RUN_OUTPUT_MAX_BYTES} bytes; {action}")
+        if returncode != 0:
+            parts.append(f"Process exited with code {returncode}")
+            note = _limit_note(returncode, usage, stderr)
+            if note:
+                parts.append(note)
 
         if not parts:
-            return "No output produced."
+            parts.append("No output produced.")
+        # These change from run to run, so they go on the trace span and the
+        # verbose stats: in the result they would end up in the history and
+        # the response cache key
+        attributes = _usage_attributes(usage, queued)
+        tracer.annotate(**attributes)
+        run_stats.record(attributes)
         
         return "\n".join(parts)
     except subprocess.TimeoutExpired:
-        return "Error: Process timed out after 30 seconds"
+        tool_cache.clear()
+        return f"Error: Process timed out after {RUN_TIMEOUT_SECONDS} seconds"
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Sets the limits and then execs the real command, which keeps them. A
+# preexec_fn would do the same in the forked child, but that runs Python
+# code between fork and exec, which isn't safe with the threads this
+# process always has, and it rules out the posix_spawn/vfork fast path.
+_LIMITS_BOOTSTRAP = """import os, resource, sys
+for limit in sys.argv[1].split(","):
+    name, soft, hard = limit.split(":")
+    resource.setrlimit(getattr(resource, name), (int(soft), int(hard)))
+os.execv(sys.argv[2], sys.argv[2:])
+"""
+
+
+def run_script(working_directory: str, abs_path: str, args, timeout: float):
+    """
+    Runs a Python script in its own process, the way run_python_file does:
+    once one of the RUN_MAX_CONCURRENT slots is free, from the warm pool if
+    it's on, under run_limits(), with its output captured as a bounded head
+    and tail. Returns (stdout, stderr, returncode, overflowed, usage,
+    seconds queued for a slot); usage is None where there's no rusage.
+    Raises subprocess.TimeoutExpired if it runs past `timeout`.
+    """
+    queued = time.monotonic()
+    with _run_slots:
+        queued = time.monotonic() - queued
+        return (*_run(working_directory, abs_path, args, timeout), queued)
+
+
+def _run(working_directory, abs_path, args, timeout):
+    limits = run_limits()
+    pool = python_pool.get_pool(working_directory)
+    if pool is not None:
+        try:
+            return pool.run(abs_path, args, timeout, RUN_OUTPUT_KILL_ON_OVERFLOW, limits)
+        except python_pool.PoolUnavailableError:
+            python_pool.discard_pool(working_directory)
+
+    command = [sys.executable, abs_path, *args]
+    if limits:
+        # -I -S: nothing but the standard library, and no site start-up cost
+        encoded = ",".join(f"{name}:{soft}:{hard}" for name, (soft, hard) in limits.items())
+        command = [sys.executable, "-I", "-S", "-c", _LIMITS_BOOTSTRAP, encoded, *command]
+
+    # Read the pipes as the script writes, keeping only a bounded head and tail.
+    # No stdin, like a warm pool child: a script that reads it gets EOF
+    # instead of blocking on the agent's terminal until the timeout
+    process = subprocess.Popen(
+        command,
+        cwd=working_directory,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    with process:
+        on_overflow = process.kill if RUN_OUTPUT_KILL_ON_OVERFLOW else None
+        stdout, stderr, timed_out, overflowed = capture_pipes(
+            process.stdout.fileno(),
+            process.stderr.fileno(),
+            time.monotonic() + timeout,
+            on_overflow,
+        )
+        if timed_out:
+            process.kill()
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        if not hasattr(os, "wait4"):
+            return stdout, stderr, process.wait(), overflowed, None
+        # Reaped here rather than by process.wait() to get its rusage
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        usage = {"cpu_seconds": rusage.ru_utime + rusage.ru_stime, "max_rss": rusage.ru_maxrss}
+        return stdout, stderr, process.returncode, overflowed, usage
+
 run_python_file_schema = types.FunctionDeclaration(
     name="run_python_file",
     description="Executes a Python file located within the working directory and captures its output. It can also pass optional arguments to the script.",
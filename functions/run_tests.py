@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from google.genai import types
+from functions.run_python import run_script
+from functions.search_files import walk_files
+from functions.tool_cache import tool_cache
+from tracing import tracer
+from config import RUN_TIMEOUT_SECONDS, RUN_TESTS_WORKERS, RUN_TESTS_MAX_FAILURES
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_tests_worker.py")
+
+# What unittest discovery and pytest pick up, plus the calculator's tests.py
+TEST_FILE = re.compile(r"(test_\w*|\w+_test|tests?)\.py")
+
+# Per working directory, the last run of each test file:
+# {abs path: (report, {dependency: signature when it ran})}
+_last_runs = {}
+_last_runs_lock = threading.Lock()
+
+
+def _signature(abs_path):
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def discover(root: str):
+    """Test files under `root` (or `root` itself if it's a file), as absolute paths."""
+    if os.path.isfile(root):
+        return [root]
+    return sorted(
+        os.path.join(root, rel_path) for rel_path, _ in walk_files(root)
+        if TEST_FILE.fullmatch(os.path.basename(rel_path))
+    )
+
+
+def _affected(last_run) -> bool:
+    if last_run is None:
+        return True
+    report, signatures = last_run
+    # An import error cut the trace short, so any file might fix it
+    if report.get("error") is not None:
+        return True
+    return any(_signature(path) != signature for path, signature in signatures.items())
+
+
+def _run_file(working_directory: str, test_path: str):
+    """Runs one test file in its own process and returns its report."""
+    fd, report_path = tempfile.mkstemp(prefix="run_tests_", suffix=".json")
+    os.close(fd)
+    try:
+        _, stderr, returncode, _, _, _ = run_script(working_directory, WORKER_PATH, [working_directory, test_path, report_path], timeout=RUN_TIMEOUT_SECONDS)
+        with open(report_path) as f:
+            report = json.loads(f.read() or "null")
+        if report is None:
+            last_line = (stderr.text().strip().splitlines() or [""])[-1]
+            report = {"error": f"test process exited with code {returncode} {last_line}".strip()}
+    except subprocess.TimeoutExpired:
+        report = {"error": f"still running after {RUN_TIMEOUT_SECONDS} seconds, killed"}
+    finally:
+        os.remove(report_path)
+
+    # Crashes and timeouts leave no trace, so only the file itself is known
+    dependencies = report.pop("dependencies", [test_path])
+    return report, {path: _signature(path) for path in dependencies}
+
+
+def _failure_lines(working_directory, test_path, report, earlier):
+    rel_path = os.path.relpath(test_path, working_directory)
+    suffix = " (earlier run; nothing it imports has changed)" if earlier else ""
+    if report.get("error") is not None:
+        return [f"ERROR {rel_path}: {report['error']}{suffix}"]
+    lines = []
+    for failure in report["failures"]:
+        where = f" at {failure['where']}" if failure["where"] else ""
+        lines.append(f"{failure['kind']} {failure['id']}{where}: {failure['message'][:200]}{suffix}")
+    return lines
+
+
+def run_tests(working_directory: str, path: str = ".", run_all: bool = False):
+    abs_working_directory = os.path.abspath(working_directory)
+    root = os.path.abspath(os.path.join(working_directory, path))
+    if root != abs_working_directory and not root.startswith(abs_working_directory + os.sep):
+        return f'Error: Cannot run tests in "{path}" as it is outside the permitted working directory'
+    if not os.path.exists(root):
+        return f'Error: "{path}" not found.'
+
+    try:
+        test_files = discover(root)
+        if not test_files:
+            return f'No test files found in "{path}" (looked for test_*.py, *_test.py and tests.py)'
+
+        with _last_runs_lock:
+            last_runs = _last_runs.setdefault(abs_working_directory, {})
+            previous = {test_path: last_runs.get(test_path) for test_path in test_files}
+        to_run = [test_path for test_path in test_files if run_all or _affected(previous[test_path])]
+
+        start = time.monotonic()
+        runs = {}
+        if to_run:
+            with ThreadPoolExecutor(max_workers=min(RUN_TESTS_WORKERS, len(to_run))) as pool:
+                runs.update(zip(to_run, pool.map(lambda test_path: _run_file(abs_working_directory, test_path), to_run)))
+            with _last_runs_lock:
+                last_runs.update(runs)
+            # The tests may have written files
+            tool_cache.clear()
+        # Kept out of the summary, which has to come out the same on a replay
+        tracer.annotate(files_run=len(to_run), tests_seconds=round(time.monotonic() - start, 3))
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+    counts = {"tests": 0, "failed": 0, "errors": 0, "skipped": 0}
+    failures = []
+    for test_path in test_files:
+        earlier = test_path not in to_run
+        report = (previous if earlier else runs)[test_path][0]
+        failures.extend(_failure_lines(abs_working_directory, test_path, report, earlier))
+        if earlier:
+            continue
+        counts["tests"] += report.get("tests", 0)
+        counts["skipped"] += report.get("skipped", 0)
+        counts["failed"] += sum(1 for failure in report.get("failures", []) if failure["kind"] == "FAIL")
+        counts["errors"] += sum(1 for failure in report.get("failures", []) if failure["kind"] == "ERROR") + (report.get("error") is not None)
+
+    if to_run:
+        passed = counts["tests"] - counts["failed"] - counts["errors"] - counts["skipped"]
+        lines = [
+            f"Ran {counts['tests']} tests from {len(to_run)} of {len(test_files)} test files: "
+            f"{max(passed, 0)} passed, {counts['failed']} failed, {counts['errors']} errors, {counts['skipped']} skipped"
+        ]
+    else:
+        lines = [f"Ran nothing: none of the {len(test_files)} test files imports anything changed since its last run (pass run_all to run them anyway)"]
+    if to_run and len(to_run) < len(test_files):
+        lines.append(f"Not run: {len(test_files) - len(to_run)} test files that import nothing changed since their last run")
+    lines.extend(failures[:RUN_TESTS_MAX_FAILURES])
+    if len(failures) > RUN_TESTS_MAX_FAILURES:
+        lines.append(f"[...{len(failures) - RUN_TESTS_MAX_FAILURES} more failures]")
+    return "\n".join(lines)
+
+
+run_tests_schema = types.FunctionDeclaration(
+    name="run_tests",
+    description="Runs the unittest tests in the working directory and returns a short pass/fail summary. Only test files that import something changed since their last run are run (in parallel); earlier failures of the others are still listed.",
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "path": types.Schema(
+                type=types.Type.STRING,
+                description="Optional test file or directory to look for tests in, relative to the working directory. Defaults to the whole working directory."
+            ),
+            "run_all": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Run every test file, even those not affected by changes since their last run."
+            )
+        }
+    )
+)
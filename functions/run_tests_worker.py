@@ -0,0 +1,89 @@
+"""
+Runs the unittest cases of one test file for run_tests.py, and writes a
+JSON report: test counts, every failure and error, and the
+working-directory source files that were imported while loading and
+running the tests (the file's dependencies for test selection).
+
+Run as a script, cold or from the warm Python pool:
+    python run_tests_worker.py WORKING_DIRECTORY TEST_FILE REPORT_PATH
+"""
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import traceback
+import unittest
+
+FRAME = re.compile(r'\s*File "(.+)", line (\d+)')
+
+
+def _in_directory(path, directory):
+    return bool(path) and os.path.abspath(path).startswith(directory + os.sep)
+
+
+def _source_files(working_directory):
+    return {
+        os.path.abspath(module.__file__)
+        for name, module in list(sys.modules.items())
+        if name != "__main__" and _in_directory(getattr(module, "__file__", None), working_directory)
+    }
+
+
+def _module_name(working_directory, test_path):
+    """A dotted name when the file is inside packages, as unittest discovery would import it, else just its name."""
+    parts = os.path.relpath(test_path, working_directory)[:-len(".py")].split(os.sep)
+    package = working_directory
+    for part in parts[:-1]:
+        package = os.path.join(package, part)
+        if not os.path.exists(os.path.join(package, "__init__.py")):
+            return parts[-1]
+    return ".".join(parts)
+
+
+def _failure(kind, test_id, formatted, working_directory):
+    lines = formatted.rstrip().splitlines()
+    # The innermost frame in the working directory is where to look
+    where = None
+    for line in lines:
+        frame = FRAME.match(line)
+        if frame and _in_directory(frame.group(1), working_directory):
+            where = f"{os.path.relpath(frame.group(1), working_directory)}:{frame.group(2)}"
+    return {"kind": kind, "id": test_id, "where": where, "message": lines[-1].strip() if lines else ""}
+
+
+def run(working_directory, test_path):
+    # Working-directory modules a warm pool preloaded would hide imports from
+    # the trace below, so drop them and let the tests import their own
+    for name, module in list(sys.modules.items()):
+        if name != "__main__" and _in_directory(getattr(module, "__file__", None), working_directory):
+            del sys.modules[name]
+    # sys.path[0] is this script's directory; tests expect their own and the working directory instead
+    sys.path[0:1] = dict.fromkeys([os.path.dirname(test_path), working_directory])
+
+    report = {"tests": 0, "skipped": 0, "failures": [], "error": None}
+    try:
+        module = importlib.import_module(_module_name(working_directory, test_path))
+        suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+        result = unittest.TextTestRunner(stream=io.StringIO(), verbosity=0).run(suite)
+    except BaseException:
+        report["error"] = traceback.format_exc().rstrip().splitlines()[-1]
+    else:
+        report["tests"] = result.testsRun
+        report["skipped"] = len(result.skipped)
+        for kind, problems in (("FAIL", result.failures), ("ERROR", result.errors)):
+            for test, formatted in problems:
+                report["failures"].append(_failure(kind, test.id(), formatted, working_directory))
+        for test in result.unexpectedSuccesses:
+            report["failures"].append({"kind": "FAIL", "id": test.id(), "where": None, "message": "unexpected success"})
+
+    report["dependencies"] = sorted(_source_files(working_directory) | {test_path})
+    return report
+
+
+if __name__ == "__main__":
+    working_directory, test_path, report_path = os.path.abspath(sys.argv[1]), os.path.abspath(sys.argv[2]), sys.argv[3]
+    report = run(working_directory, test_path)
+    with open(report_path, "w") as f:
+        json.dump(report, f)
@@ -0,0 +1,341 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from fnmatch import fnmatchcase
+from google.genai import types
+from functions.ignore_rules import IgnoreRules
+from functions.tool_cache import tool_cache
+from state_dir import resolve
+from config import SEARCH_INDEX_DIR, SEARCH_MAX_FILE_BYTES, SEARCH_RESCAN_SECONDS, SEARCH_MAX_RESULTS
+
+INDEX_VERSION = 1
+
+# A definition of the searched name ranks above a plain mention
+DEFINITION = re.compile(r"^\s*(?:async\s+def|def|class)\s+(\w+)|^(\w+)\s*=")
+
+
+def trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def regex_trigrams(pattern: str) -> set:
+    """
+    Trigrams every match of `pattern` must contain, taken from the literal
+    runs outside any group. Returns an empty set (search every file) for
+    patterns with alternation or without a literal run of 3+ characters.
+    """
+    if "|" in pattern:
+        return set()
+
+    runs, run = [], ""
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == "\\" and i < len(pattern):
+            escaped = pattern[i]
+            i += 1
+            if escaped.isalnum():
+                # \w, \d, \b, ... aren't literals
+                runs.append(run)
+                run = ""
+            elif depth == 0:
+                run += escaped
+            continue
+
+        if char not in ".^$()[]{}*+?":
+            if depth == 0:
+                run += char
+            continue
+
+        if char in "*?{" and run:
+            run = run[:-1]  # the character before is optional
+        runs.append(run)
+        run = ""
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(0, depth - 1)
+        elif char in "[{":
+            end = pattern.find("]" if char == "[" else "}", i + 1)
+            i = len(pattern) if end == -1 else end + 1
+    runs.append(run)
+
+    required = set()
+    for run in runs:
+        required |= trigrams(run)
+    return required
+
+
+class TrigramIndex:
+    """
+    Trigram -> files inverted index of the text files under one directory.
+
+    Files are re-indexed when their (mtime_ns, size) changes. Paths written
+    through write_file are refreshed on the next search via the tool cache
+    listener. A full mtime scan runs at most every SEARCH_RESCAN_SECONDS, or
+    right after run_python_file, to pick up other changes. The index is
+    persisted so a new session only re-reads files that changed.
+    """
+
+    def __init__(self, root: str, index_dir: str = None):
+        self.root = os.path.abspath(root)
+        self.path = os.path.join(resolve(index_dir or SEARCH_INDEX_DIR), hashlib.sha256(self.root.encode()).hexdigest()[:16] + ".json.z")
+        self.files = {}      # relative path -> (mtime_ns, size, trigrams)
+        self.postings = {}   # trigram -> set of relative paths
+        self._dirty = set()
+        self._last_scan = None
+        self._unsaved = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return
+        for rel_path, (mtime_ns, size, packed) in data["files"].items():
+            self._add(rel_path, mtime_ns, size, {packed[i:i + 3] for i in range(0, len(packed), 3)})
+
+    def save(self):
+        with self._lock:
+            files = {
+                rel_path: [mtime_ns, size, "".join(sorted(grams))]
+                for rel_path, (mtime_ns, size, grams) in self.files.items()
+            }
+        data = zlib.compress(json.dumps({"version": INDEX_VERSION, "root": self.root, "files": files}).encode())
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _add(self, rel_path, mtime_ns, size, grams):
+        self.files[rel_path] = (mtime_ns, size, grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(rel_path)
+
+    def _remove(self, rel_path):
+        entry = self.files.pop(rel_path, None)
+        if entry is None:
+            return
+        for gram in entry[2]:
+            paths = self.postings.get(gram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self.postings[gram]
+
+    def mark_changed(self, abs_path):
+        """Tool cache listener: refresh one written path, or everything when abs_path is None."""
+        with self._lock:
+            if abs_path is None:
+                self._last_scan = None
+            elif abs_path.startswith(self.root + os.sep):
+                self._dirty.add(os.path.relpath(abs_path, self.root).replace(os.sep, "/"))
+
+    def _index_file(self, rel_path, stat=None):
+        abs_path = os.path.join(self.root, rel_path)
+        try:
+            stat = stat or os.stat(abs_path)
+        except OSError:
+            self._remove(rel_path)
+            return True
+
+        current = self.files.get(rel_path)
+        if current is not None and current[:2] == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        self._remove(rel_path)
+        text = _read_text(abs_path)
+        if text is not None:
+            self._add(rel_path, stat.st_mtime_ns, stat.st_size, trigrams(text))
+        return True
+
+    def refresh(self):
+        """Brings the index up to date, saving it after a full scan that changed anything."""
+        with self._lock:
+            for rel_path in self._dirty:
+                self._unsaved |= self._index_file(rel_path)
+            self._dirty.clear()
+
+            if self._last_scan is not None and time.monotonic() - self._last_scan < SEARCH_RESCAN_SECONDS:
+                return
+
+            seen = set()
+            for rel_path, stat in walk_files(self.root):
+                seen.add(rel_path)
+                self._unsaved |= self._index_file(rel_path, stat)
+            for rel_path in set(self.files) - seen:
+                self._remove(rel_path)
+                self._unsaved = True
+            self._last_scan = time.monotonic()
+
+            # Saving is the slow part, so writes between full scans aren't saved
+            # one by one; the next session's mtime scan catches up on them anyway
+            if self._unsaved:
+                self.save()
+                self._unsaved = False
+
+    def candidates(self, required: set):
+        """Files that contain every trigram in `required` (all files if it is empty)."""
+        with self._lock:
+            if not required:
+                return sorted(self.files)
+            posting_lists = sorted((self.postings.get(gram, set()) for gram in required), key=len)
+            result = set(posting_lists[0])
+            for paths in posting_lists[1:]:
+                result &= paths
+                if not result:
+                    break
+            return sorted(result)
+
+
+def _read_text(abs_path):
+    try:
+        with open(abs_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size > SEARCH_MAX_FILE_BYTES:
+                return None
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None  # binary
+    return data.decode("utf-8", errors="replace")
+
+
+def walk_files(root: str):
+    """
+    Yields (relative path, os.stat_result) for every file under `root`
+    that the ignore rules let through, skipping __pycache__ and not
+    following symlinks.
+    """
+    stack = [(root, "", IgnoreRules.for_directory(root, root))]
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        try:
+            iterator = os.scandir(dir_path)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if rules.ignored(entry.path, is_dir) or entry.name == "__pycache__":
+                        continue
+                    if is_dir:
+                        stack.append((entry.path, rel_path, rules.child(entry.path)))
+                    elif entry.is_file(follow_symlinks=False):
+                        yield rel_path, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(working_directory: str) -> TrigramIndex:
+    root = os.path.abspath(working_directory)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = TrigramIndex(root)
+            tool_cache.add_listener(index.mark_changed)
+        return index
+
+
+def _rank(rel_path, line, query_words):
+    definition = DEFINITION.match(line)
+    defined = definition and (definition.group(1) or definition.group(2)) in query_words
+    in_name = any(word.lower() in os.path.basename(rel_path).lower() for word in query_words)
+    return (0 if defined else 1, 0 if in_name else 1)
+
+
+def search_files(working_directory, query, regex=False, case_sensitive=False, path_glob=None, max_results=None):
+    if not query:
+        return "Error: query must not be empty"
+
+    flags = 0 if case_sensitive else re.IGNORECASE
+    try:
+        matcher = re.compile(query if regex else re.escape(query), flags)
+    except re.error as e:
+        return f"Error: invalid regular expression: {e}"
+
+    try:
+        max_results = max(1, min(int(max_results or SEARCH_MAX_RESULTS), SEARCH_MAX_RESULTS))
+    except (TypeError, ValueError):
+        return "Error: max_results must be an integer"
+    index = get_index(working_directory)
+    index.refresh()
+
+    required = regex_trigrams(query) if regex else trigrams(query)
+    query_words = set(re.findall(r"\w+", query)) if not regex else set(re.findall(r"[A-Za-z_]\w{2,}", query))
+
+    hits = []
+    files_with_hits = {}
+    for rel_path in index.candidates(required):
+        if path_glob and not fnmatchcase(rel_path, path_glob):
+            continue
+        text = _read_text(os.path.join(index.root, rel_path))
+        if text is None:
+            continue
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if matcher.search(line):
+                hits.append((rel_path, line_number, line))
+                files_with_hits[rel_path] = files_with_hits.get(rel_path, 0) + 1
+
+    if not hits:
+        return f'No matches for "{query}"'
+
+    # Definitions first, then files named after the query, then files with the most hits
+    hits.sort(key=lambda hit: (*_rank(hit[0], hit[2], query_words), -files_with_hits[hit[0]], hit[0], hit[1]))
+    result = [f"{rel_path}:{line_number}: {line.strip()[:200]}" for rel_path, line_number, line in hits[:max_results]]
+    if len(hits) > max_results:
+        result.append(f"[...{len(hits) - max_results} more matches in {len(files_with_hits)} files; narrow the query or use path_glob]")
+    return "\n".join(result)
+
+
+search_files_schema = types.FunctionDeclaration(
+    name="search_files",
+    description=(
+        "Searches the contents of the files in the working directory for a literal string or regular expression, "
+        "using an index so it is fast even on large projects. Returns ranked path:line: text hits, definitions first."
+    ),
+    parameters=types.Schema(
+        type=types.Type.OBJECT,
+        properties={
+            "query": types.Schema(
+                type=types.Type.STRING,
+                description="The text to search for, or a Python regular expression if regex is true."
+            ),
+            "regex": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Treat query as a regular expression. Defaults to false."
+            ),
+            "case_sensitive": types.Schema(
+                type=types.Type.BOOLEAN,
+                description="Match case exactly. Defaults to false."
+            ),
+            "path_glob": types.Schema(
+                type=types.Type.STRING,
+                description="Optional glob the relative file path must match, e.g. \"pkg/*.py\"."
+            ),
+            "max_results": types.Schema(
+                type=types.Type.INTEGER,
+                description=f"Maximum number of hits to return, up to {SEARCH_MAX_RESULTS}."
+            )
+        },
+        required=["query"]
+    )
+)
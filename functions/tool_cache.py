@@ -0,0 +1,99 @@
+import os
+import threading
+from collections import OrderedDict
+from tracing import tracer
+from config import TOOL_CACHE_MAX_CHARS
+
+
+class ToolCache:
+    """
+    Shared cache of read-only tool results, keyed on the resolved path.
+
+    Every entry remembers the (mtime_ns, size, inode) of its path when it was
+    computed, and is only reused while a fresh os.stat still matches. Directory
+    listings are checked against the directory's own stat, which changes when
+    entries are added, removed or renamed, but not when a file changes in
+    place, so listings keep only names and get_files_info stats the sizes.
+    """
+
+    def __init__(self, max_chars: int = TOOL_CACHE_MAX_CHARS):
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        Registers listener(abs_path) to be told about writes. It gets the
+        written path from invalidate(), or None from clear() when anything
+        may have changed.
+        """
+        self._listeners.append(listener)
+
+    @staticmethod
+    def _signature(abs_path):
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def cached(self, kind: str, abs_path: str, compute, args: tuple = ()):
+        """Returns compute() for (kind, abs_path, args), reusing a still-valid earlier result."""
+        signature = self._signature(abs_path)
+        if signature is None:
+            return compute()
+
+        key = (kind, abs_path, args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                tracer.annotate(cache="hit")
+                return entry[1]
+            self.misses += 1
+        tracer.annotate(cache="miss")
+
+        result = compute()
+
+        # Errors are cheap to recompute and may be transient, so don't keep them
+        if isinstance(result, str) and not result.startswith("Error"):
+            with self._lock:
+                self._remove(key)
+                self._entries[key] = (signature, result)
+                self._total_chars += len(result)
+                while self._total_chars > self.max_chars and self._entries:
+                    self._remove(next(iter(self._entries)))
+        return result
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_chars -= len(entry[1])
+
+    def invalidate(self, abs_path: str):
+        """Drops every entry for `abs_path` and for the directories above it."""
+        with self._lock:
+            for key in list(self._entries):
+                path = key[1]
+                if path == abs_path or abs_path.startswith(path.rstrip(os.sep) + os.sep):
+                    self._remove(key)
+        for listener in self._listeners:
+            listener(abs_path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_chars = 0
+        for listener in self._listeners:
+            listener(None)
+
+    def stats(self):
+        return f"Tool cache: {self.hits} hits, {self.misses} misses, {len(self._entries)} entries"
+
+
+tool_cache = ToolCache()
@@ -1,5 +1,6 @@
 import os
 from google.genai import types
+from functions.tool_cache import tool_cache
 
 def write_file(working_directory, file_path, content):
     abs_working_dir = os.path.abspath(working_directory)
@@ -20,6 +21,8 @@ def write_file(working_directory, file_path, content):
     try:
         with open(abs_file_path, "w") as f:
             f.write(content)
+        # Drop cached reads of this file and listings of the directories above it
+        tool_cache.invalidate(abs_file_path)
         return (
             f'Successfully wrote to "{file_path}" ({len(content)} characters written)'
         )
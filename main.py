@@ -1,131 +1,169 @@
-from google import genai
-from google.genai import types
-
 import os, sys
 import argparse
-from dotenv import load_dotenv
-
-from typing import List, Union
 
-from functions.get_files_info import get_files_info_schema
-from functions.get_file_content import get_file_content_schema
-from functions.run_python import run_python_file_schema
-from functions.write_file import write_file_schema
-from functions.call_function import call_function
+from config import MAX_TOOL_WORKERS, MAX_ITERATIONS, BATCH_CONCURRENCY, RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES, CONTEXT_TOKEN_BUDGET, PROFILE_TOP_FUNCTIONS, MODEL_REQUESTS_PER_MINUTE, MODEL_TOKENS_PER_MINUTE, MODEL_MAX_CONCURRENCY, RETRY_MAX_ATTEMPTS, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS, SESSION_LOG_DIR, DAEMON_SOCKET, DAEMON_MAX_SESSIONS
 
+# Only the standard library and config are imported up front. The SDK, the
+# agent loop and the tool schemas are imported inside main() once the
+# arguments are known to be good, so --help and usage errors return without
+# paying for the SDK import.
 
 ## Argument Parser
 parser = argparse.ArgumentParser(description="AI Code Assistant")
-parser.add_argument("prompt", type=str, help="The prompt to send to the AI model")
+parser.add_argument("prompt", type=str, nargs="?", help="The prompt to send to the AI model")
 parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
+parser.add_argument("--max-tool-workers", type=int, default=MAX_TOOL_WORKERS, help="Maximum number of read-only tool calls to run at once (1 runs them sequentially)")
+parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS, help="Maximum number of model calls per prompt")
+parser.add_argument("--batch", type=str, metavar="PROMPTS_JSONL", help="Run every prompt in a JSONL file concurrently instead of a single prompt")
+parser.add_argument("--batch-output", type=str, help="Where to stream batch results as JSONL (defaults to <batch>.results.jsonl)")
+parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Maximum number of batch prompts in flight at once")
+parser.add_argument("--context-budget", type=int, default=CONTEXT_TOKEN_BUDGET, help="Estimated token budget for the history sent each iteration; older tool outputs are shrunk to fit (0 disables)")
+parser.add_argument("--stream", action="store_true", help="Stream model output and start tool calls as soon as they arrive")
+parser.add_argument("--warm-python", action="store_true", help="Fork run_python_file scripts from a warm interpreter instead of starting a new one each time")
+parser.add_argument("--cache", action="store_true", help="Reuse recorded model responses for identical requests and record new ones")
+parser.add_argument("--replay", action="store_true", help="Only use recorded model responses; fail instead of calling the model")
+parser.add_argument("--cache-dir", type=str, default=RESPONSE_CACHE_DIR, help="Directory of the model response cache")
+parser.add_argument("--trace", type=str, metavar="TRACE_JSONL", help="Record timed spans of model and tool calls to this JSONL file and print a summary table at the end")
+parser.add_argument("--profile", action="store_true", help="Run under cProfile and print the most expensive functions at the end")
+parser.add_argument("--rpm", type=int, default=MODEL_REQUESTS_PER_MINUTE, help="Client-side limit on model requests per minute (0 for none)")
+parser.add_argument("--tpm", type=int, default=MODEL_TOKENS_PER_MINUTE, help="Client-side limit on estimated model tokens per minute (0 for none)")
+parser.add_argument("--resume", type=str, metavar="SESSION", help="Continue a logged session (id or path) from where it stopped, without re-running its tools; a prompt, if given, is added as a new turn")
+parser.add_argument("--export", type=str, metavar="SESSION", help="Print a compact transcript of a logged session and exit")
+parser.add_argument("--session-dir", type=str, default=SESSION_LOG_DIR, help="Directory of session logs")
+parser.add_argument("--max-attempts", type=int, default=RETRY_MAX_ATTEMPTS, help="Attempts per model call when it is throttled or fails transiently (1 disables retries)")
+parser.add_argument("--serve", action="store_true", help="Run as a daemon that serves prompts from other invocations over --socket, keeping the client and tool caches warm")
+parser.add_argument("--socket", type=str, default=os.path.expanduser(DAEMON_SOCKET), help="Unix socket of the daemon")
+parser.add_argument("--no-daemon", action="store_true", help="Run in this process even if a daemon is listening")
+
+# Options that configure the process itself. A run that sets any of them
+# isn't sent to a daemon, which was started with its own.
+IN_PROCESS_OPTIONS = ["batch", "export", "warm_python", "cache", "replay", "cache_dir", "trace", "profile", "rpm", "tpm", "max_attempts"]
 
-# types.Tool is a collection of functions the model can call
-available_functions = types.Tool(
-    function_declarations=[
-        get_files_info_schema,
-        get_file_content_schema,
-        run_python_file_schema,
-        write_file_schema
-    ]
-)
 
-SYSTEM_PROMPT = """
-You are a helpful AI coding agent.
-
-When a user asks a question or makes a request, make a function call plan.
-Don't ask for more information.
-Use the functions to get information about the files, read file contents, run Python files, and write files as needed to fulfill the user's request.
-You can perform the following operations:
+def main():
+    args = parser.parse_args()
 
-- List files and directories
-- Read file contents
-- Execute Python files with optional arguments
-- Write or overwrite files
+    if args.prompt is None and not (args.batch or args.resume or args.export or args.serve):
+        parser.error("a prompt is required unless --batch, --resume, --export or --serve is given")
 
-All paths you provide should be relative to the working directory. You do not need to specify the working directory in your function calls as it is automatically injected for security reasons.
-"""
+    if not (args.serve or args.no_daemon) and all(getattr(args, name) == parser.get_default(name) for name in IN_PROCESS_OPTIONS):
+        from daemon import forward
+        exit_code = forward(args.socket, sys.argv[1:], os.getcwd())
+        if exit_code is not None:
+            sys.exit(exit_code)
 
-def main():
+    if args.export or args.resume:
+        from session_log import session_path
+        try:
+            path = session_path(args.export or args.resume, args.session_dir)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        if args.export:
+            from session_log import export_session, load_session
+            print(export_session(load_session(path)))
+            return
+
+    from dotenv import load_dotenv
     load_dotenv()
 
-    api_key = os.environ.get("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
+    if args.warm_python:
+        from functions import python_pool
+        python_pool.enabled = True
 
-    args = parser.parse_args()
+    # Replay mode must never touch the network, so it gets no real client
+    if args.replay:
+        client = None
+    else:
+        from google import genai
+        from rate_limit import RateLimitedClient, RateLimiter, RetryPolicy
+        # Under the cache, so cache hits don't count against the limits
+        client = RateLimitedClient(
+            genai.Client(api_key=os.environ.get("GEMINI_API_KEY")),
+            RateLimiter(args.rpm, args.tpm, MODEL_MAX_CONCURRENCY),
+            RetryPolicy(args.max_attempts, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS),
+        )
+    limiter = client.limiter if client else None
+
+    if args.cache or args.replay:
+        from response_cache import CachedClient, ResponseCache
+        from state_dir import PerSession
+        # A daemon's sessions each use the cache of their own project
+        cache = PerSession(args.cache_dir, lambda directory: ResponseCache(directory, RESPONSE_CACHE_MAX_BYTES))
+        client = CachedClient(client, cache, replay=args.replay)
+
+    if args.serve:
+        from daemon import serve
+        serve(args.socket, client, parser, run, DAEMON_MAX_SESSIONS)
+        return
+
+    if args.trace:
+        from tracing import tracer
+        tracer.enabled = True
+
+    if args.profile:
+        import cProfile, pstats
+        profiler = cProfile.Profile()
+        profiler.runcall(run, args, client)
+        print(f"\n--- Profile (top {PROFILE_TOP_FUNCTIONS} by cumulative time) ---")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    else:
+        run(args, client)
 
-    if args.verbose:
-        print(f"User prompt: {args.prompt}\n")
+    if args.verbose and limiter:
+        print(limiter.stats())
 
-    # Messages stored for tracking the conversation
-    messages = [
-        types.Content(role="user", parts=[types.Part(text=args.prompt)])
-    ]
+    if args.trace:
+        tracer.export(args.trace)
+        print(f"\n--- Trace summary ({len(tracer.spans)} spans, written to {args.trace}) ---")
+        print(tracer.summary())
 
-    generate_content(client, messages, args.verbose)
-    print("\n--- Conversation History ---")
-    for user_msg in messages:
-        print(user_msg.role + ": " + "".join([part.text for part in user_msg.parts if part.text]))
-        
 
-def generate_content(client: genai.Client, message: Union[List, str], verbose: bool):
-    MAX_ITERATIONS = 20
+def run(args, client):
+    from tracing import tracer
 
-    for i in range(MAX_ITERATIONS):
-        try:
-            response = client.models.generate_content(
-                model="gemini-2.0-flash-001",
-                contents=message,
-                config=types.GenerateContentConfig(
-                    system_instruction=SYSTEM_PROMPT,
-                    tools=[available_functions]
-                )
-            )
-
-            # verbose output
-            if verbose:
-                print(f"\nIteration {i+1}/{MAX_ITERATIONS}")
-                print(f"Prompt tokens: {response.usage_metadata.prompt_token_count}")
-                print(f"Response tokens: {response.usage_metadata.candidates_token_count}")
-                print("---------------------------------------------------------------")
-
-            # Add candidates' content back to conversation
-            for _, candidate in enumerate(response.candidates):
-                message.append(candidate.content)
-
-            # If final text is available → done
-            if not response.function_calls:
-                print(response.text)
-                break
-
-            # Otherwise, handle function calls
-            for function_call in response.function_calls:
-                function_call_result = call_function(function_call, verbose)
-                function_response = function_call_result.parts[0].function_response.response
-
-                if not function_response:
-                    raise ValueError("Function response is empty")
-
-                result_text = (
-                    function_response["result"]
-                    if isinstance(function_response, dict) and "result" in function_response
-                    else str(function_response)
-                )       
-
-                if verbose:
-                    print(f"-> {result_text}")
-
-                user_msg = types.Content(
-                    role="user",
-                    parts=[types.Part(text=result_text)]
-                )
-                message.append(user_msg)
-
-        except Exception as e:
-            print(f"Error during iteration {i+1}: {e}")
-            break
+    if args.batch:
+        import asyncio
+        from batch import run_batch
+        output_path = args.batch_output or os.path.splitext(args.batch)[0] + ".results.jsonl"
+        with tracer.span("run", "batch"):
+            asyncio.run(run_batch(client, args.batch, output_path, args.concurrency, args.max_iterations, args.max_tool_workers, args.verbose, args.context_budget, args.session_dir))
+        return
+
+    from google.genai import types
+    from agent import add_messages, finish_interrupted_turn, generate_content
+    from session_log import SessionLog, export_session
+
+    # Messages stored for tracking the conversation, and logged as they come
+    if args.resume:
+        session_log, messages = SessionLog.resume(args.resume, args.session_dir)
+        print(f"Resuming session {session_log.session_id} ({len(messages)} messages)")
+        finish_interrupted_turn(messages, args.verbose, args.max_tool_workers, session_log)
     else:
-        # Only runs if loop finished all 20 iterations without break
-        print("Reached maximum iterations without final response.")
+        session_log, messages = SessionLog.create(args.session_dir), []
+
+    if args.prompt:
+        if args.verbose:
+            print(f"User prompt: {args.prompt}\n")
+        add_messages(messages, [types.Content(role="user", parts=[types.Part(text=args.prompt)])], session_log)
+
+    try:
+        if messages[-1].role == "model":
+            print("The session already has a final answer; give a prompt to continue it.")
+        else:
+            with tracer.span("run", "prompt") as span:
+                generate_content(client, messages, args.verbose, args.max_tool_workers, args.max_iterations, args.context_budget, args.stream, session_log)
+                span["messages"] = len(messages)
+    finally:
+        session_log.close()
+        if args.verbose:
+            print("\n--- Conversation ---")
+            print(export_session(messages))
+        # Also printed on Ctrl-C, since everything up to it is in the log
+        print(f"\nSession {session_log.session_id}: {len(messages)} messages in {session_log.path} "
+              f"(--resume {session_log.session_id} to continue, --export {session_log.session_id} for a transcript)")
+
+    if args.verbose and (args.cache or args.replay):
+        print(f"\nResponse cache: {client.cache.hits} hits, {client.cache.misses} misses")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,266 @@
+import asyncio
+import random
+import threading
+import time
+from itertools import count
+from types import SimpleNamespace
+
+from context_budget import estimate_tokens
+from tracing import tracer
+from config import LIMITER_POLL_SECONDS
+
+# Throttling, timeouts and server-side failures; anything else (bad request,
+# auth, not found) fails the same way however often it is retried
+RETRYABLE_STATUS = frozenset({408, 429, 500, 502, 503, 504})
+THROTTLED_STATUS = 429
+
+
+def is_retryable(error: Exception) -> bool:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code in RETRYABLE_STATUS
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    import httpx  # the SDK's transport, so it's always installed and already imported
+    return isinstance(error, httpx.TransportError)
+
+
+def server_retry_delay(error: Exception):
+    """The wait in seconds the server asked for with a Retry-After header or a RetryInfo detail, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+
+    # {"error": {"details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "20s"}]}}
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for detail in details.get("error", {}).get("details", []) or []:
+            if isinstance(detail, dict) and str(detail.get("@type", "")).endswith("RetryInfo"):
+                try:
+                    return float(str(detail.get("retryDelay", "")).rstrip("s"))
+                except ValueError:
+                    pass
+    return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the wait before retry n is uniform
+    in [0, min(max_delay, base_delay * 2**n)], so sessions throttled at the
+    same moment don't all come back at the same moment. A delay asked for
+    by the server is a lower bound.
+    """
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, rng: random.Random = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        backoff = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        asked = server_retry_delay(error)
+        return max(backoff, min(asked, self.max_delay)) if asked else backoff
+
+
+class _TokenBucket:
+    """Refills `per_minute` units evenly over a minute and holds at most a minute's worth."""
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self.updated = now
+
+    def wait(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request bigger than the whole bucket goes through once it's full,
+        # rather than never
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Client-side limits for model calls, shared by every session (thread or
+    task) that uses the same client: requests per minute and tokens per
+    minute as token buckets (0 turns a limit off), plus a cap on requests in
+    flight.
+
+    The cap adapts to throttling, additive increase / multiplicative
+    decrease: a 429 halves it and pauses everyone for the retry delay, and
+    each success raises it by 1/cap, so it grows back by one per cap
+    successes, up to `max_concurrency`.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0, max_concurrency: int = 8, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self._requests = _TokenBucket(requests_per_minute, now) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute, now) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def reserve(self, tokens: int) -> float:
+        """Takes a request slot and `tokens` if they're available now and returns 0, else returns how long to wait before asking again."""
+        with self._lock:
+            now = self._clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.concurrency):
+                return LIMITER_POLL_SECONDS
+            wait = max(
+                self._requests.wait(1, now) if self._requests else 0.0,
+                self._tokens.wait(tokens, now) if self._tokens else 0.0,
+            )
+            if wait > 0:
+                return wait
+            if self._requests:
+                self._requests.level -= 1
+            if self._tokens:
+                self._tokens.level -= tokens
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, tokens: int):
+        while (wait := self.reserve(tokens)) > 0:
+            self.waited_seconds += wait
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int):
+        while (wait := self.reserve(tokens)) > 0:
+            self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def release(self, estimated_tokens: int, used_tokens: int):
+        """Frees the slot and settles the token bucket with what the request actually used."""
+        with self._lock:
+            self.in_flight -= 1
+            if self._tokens:
+                # May go below zero, which just makes the next requests wait longer
+                self._tokens.level -= used_tokens - estimated_tokens
+
+    def succeeded(self):
+        with self._lock:
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def throttled_for(self, delay: float):
+        with self._lock:
+            now = self._clock()
+            self.throttled += 1
+            # Requests that were already in flight get their 429s together;
+            # that's one signal, not one halving each
+            if now >= self.paused_until:
+                self.concurrency = max(1.0, self.concurrency / 2)
+            self.paused_until = max(self.paused_until, now + delay)
+
+    def stats(self) -> str:
+        return f"Rate limiter: {self.throttled} throttled, {self.waited_seconds:.1f}s waited, concurrency {int(self.concurrency)}/{self.max_concurrency}"
+
+
+def request_tokens(contents) -> int:
+    if isinstance(contents, str):
+        return max(1, len(contents) // 4)
+    return sum(estimate_tokens(content) for content in contents)
+
+
+def used_tokens(response, estimated: int) -> int:
+    usage = getattr(response, "usage_metadata", None)
+    if not usage or usage.prompt_token_count is None:
+        return estimated
+    return usage.prompt_token_count + (usage.candidates_token_count or 0)
+
+
+class _LimitedModels:
+    def __init__(self, models, limiter: RateLimiter, policy: RetryPolicy):
+        self._models = models
+        self._limiter = limiter
+        self._policy = policy
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """How long to wait before retrying after `error`; re-raises it if it shouldn't be retried."""
+        if not is_retryable(error) or attempt + 1 >= self._policy.max_attempts:
+            raise error
+        delay = self._policy.delay(attempt, error)
+        if getattr(error, "code", None) == THROTTLED_STATUS:
+            self._limiter.throttled_for(delay)
+        tracer.annotate(retries=attempt + 1)
+        print(f"Model call failed ({error}); retry {attempt + 1}/{self._policy.max_attempts - 1} in {delay:.1f}s")
+        return delay
+
+    def generate_content(self, *, model, contents, config=None):
+        estimated = request_tokens(contents)
+        for attempt in count():
+            self._limiter.acquire(estimated)
+            try:
+                response = self._models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                self._limiter.release(estimated, estimated)
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            self._limiter.release(estimated, used_tokens(response, estimated))
+            self._limiter.succeeded()
+            return response
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        # Only the request up to its first chunk is retried; after that the
+        # caller has already acted on part of the turn
+        estimated = request_tokens(contents)
+        for attempt in count():
+            self._limiter.acquire(estimated)
+            try:
+                chunks = iter(self._models.generate_content_stream(model=model, contents=contents, config=config))
+                first = next(chunks, None)
+            except Exception as e:
+                self._limiter.release(estimated, estimated)
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            break
+
+        last = first
+        try:
+            if first is None:
+                return
+            yield first
+            for last in chunks:
+                yield last
+        finally:
+            self._limiter.release(estimated, used_tokens(last, estimated))
+        self._limiter.succeeded()
+
+
+class _LimitedAsyncModels(_LimitedModels):
+    async def generate_content(self, *, model, contents, config=None):
+        estimated = request_tokens(contents)
+        for attempt in count():
+            await self._limiter.acquire_async(estimated)
+            try:
+                response = await self._models.generate_content(model=model, contents=contents, config=config)
+            except Exception as e:
+                self._limiter.release(estimated, estimated)
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            self._limiter.release(estimated, used_tokens(response, estimated))
+            self._limiter.succeeded()
+            return response
+
+
+class RateLimitedClient:
+    """
+    Wraps a genai.Client so that every generate_content call waits for the
+    shared RateLimiter and transient failures (429, 5xx, timeouts, dropped
+    connections) are retried under a RetryPolicy.
+    """
+
+    def __init__(self, client, limiter: RateLimiter, policy: RetryPolicy):
+        self.limiter = limiter
+        self.models = _LimitedModels(client.models, limiter, policy)
+        self.aio = SimpleNamespace(models=_LimitedAsyncModels(client.aio.models, limiter, policy))
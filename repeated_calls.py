@@ -0,0 +1,116 @@
+import json
+import threading
+from google.genai import types
+from blob_store import REFERENCE
+from context_budget import CHARS_PER_TOKEN
+from functions.call_function import READ_ONLY_FUNCTIONS
+from tracing import tracer
+
+
+def _function_calls(content: types.Content):
+    return [part.function_call for part in content.parts or [] if part.function_call]
+
+
+def _text(content: types.Content):
+    if content.parts and len(content.parts) == 1:
+        return content.parts[0].text
+    return None
+
+
+class RepeatedCalls:
+    """
+    Replaces the result of a read-only call the model already made with
+    the same arguments by a one-line note, when the result is the same as
+    last time and that earlier result is still in the context in full.
+
+    The call itself still runs, so "unchanged" is checked against the
+    files as they are now; reads go through the tool cache, so a repeat
+    usually costs a stat. Everything is worked out from the history, so
+    resumed sessions and daemon sessions need no extra state.
+
+    The earlier result only counts if the last request sent it whole: as it
+    is in the history, or expanded from the blob store if it was spilled. A
+    digest left by compaction or a bare blob reference won't do, since the
+    model may be calling again to get the text back. A note
+    never matches a real result, so asking a third time gets the full
+    output again.
+    """
+
+    def __init__(self):
+        self.short_circuited = 0
+        self.chars_saved = 0
+        self._lock = threading.Lock()
+
+    def replace_repeats(self, messages: list, sent: list, results: list) -> list:
+        """
+        `results` are the tool result messages for the calls in
+        messages[-1], the model turn that answered the request `sent`.
+        Returns them with repeats replaced by notes.
+        """
+        # [name, args, indices in this turn, index of the latest earlier result, its iteration]
+        pending = []
+        for index, function_call in enumerate(_function_calls(messages[-1])):
+            name, args = function_call.name.lower(), function_call.args or {}
+            if name not in READ_ONLY_FUNCTIONS or index >= len(results):
+                continue
+            for entry in pending:
+                if entry[0] == name and entry[1] == args:
+                    entry[2].append(index)
+                    break
+            else:
+                pending.append([name, args, [index], None, None])
+        if not pending:
+            return results
+
+        # Walk back to the latest earlier result of each call, and its iteration (the model turn that asked for it)
+        missing = len(pending)
+        iteration = sum(1 for content in messages[:-1] if content.role == "model")
+        for m in range(len(messages) - 2, -1, -1):
+            if messages[m].role != "model":
+                continue
+            for offset, function_call in enumerate(_function_calls(messages[m])):
+                for entry in pending:
+                    if entry[3] is None and entry[0] == function_call.name.lower() and entry[1] == (function_call.args or {}):
+                        entry[3], entry[4] = m + 1 + offset, iteration
+                        missing -= 1
+                        break
+            iteration -= 1
+            if not missing:
+                break
+
+        results = list(results)
+        saved = 0
+        for name, args, indices, index, iteration in pending:
+            if index is None or index >= len(sent):
+                continue
+            previous = _text(messages[index])
+            seen = _text(sent[index])
+            # What the model got has to be the whole output: the history's own
+            # text, or the full output a blob reference was expanded to. Not a
+            # compaction digest, and not a reference sent as it is.
+            if previous is None or seen is None or REFERENCE.match(seen):
+                continue
+            if sent[index] is not messages[index] and not REFERENCE.match(previous):
+                continue
+            for i in indices:
+                # Blobs are content-addressed, so the same output spills to the same reference
+                if _text(results[i]) != previous:
+                    continue
+                note = f"[{name}({json.dumps(args, default=str)}): unchanged since iteration {iteration}, {len(seen)} characters; see that result above]"
+                if len(note) >= len(seen):
+                    continue
+                results[i] = types.Content(role="user", parts=[types.Part(text=note)])
+                saved += len(seen) - len(note)
+                with self._lock:
+                    self.short_circuited += 1
+                    self.chars_saved += len(seen) - len(note)
+
+        if saved:
+            tracer.annotate(repeat_chars_saved=saved)
+        return results
+
+    def stats(self):
+        return f"Repeated calls: {self.short_circuited} short-circuited, ~{self.chars_saved // CHARS_PER_TOKEN} tokens saved"
+
+
+repeated_calls = RepeatedCalls()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from types import SimpleNamespace
+from google.genai import types
+from tracing import tracer
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def _to_json(value):
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return value
+
+
+class ResponseCache:
+    """
+    Content-addressed store of model responses on disk.
+
+    Each response is stored once as a zlib-compressed JSON file named after the
+    hash of (model, config, contents). The config carries the system prompt and
+    tool schemas, so changing either one misses the cache. When the store grows
+    past `max_bytes`, the least recently used entries are deleted.
+    """
+
+    SUFFIX = ".json.z"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+
+        # key -> size, oldest use first. mtime doubles as the last-used time
+        # so the order survives between runs.
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(self.SUFFIX):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime_ns, name[:-len(self.SUFFIX)], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._total_bytes = sum(self._entries.values())
+
+    @staticmethod
+    def key(model: str, contents, config, stream: bool = False) -> str:
+        request = {"model": model, "config": _to_json(config), "contents": _to_json(contents)}
+        if stream:
+            # Streamed turns are stored as their list of chunks
+            request["stream"] = True
+        payload = json.dumps(
+            request,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = json.loads(zlib.decompress(f.read()))
+            os.utime(self._path(key))
+        except (OSError, ValueError, zlib.error):
+            # Deleted by another process or corrupted; treat it as a miss
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        if isinstance(data, list):
+            return [types.GenerateContentResponse.model_validate(chunk) for chunk in data]
+        return types.GenerateContentResponse.model_validate(data)
+
+    def put(self, key: str, response):
+        """Stores a response, or the list of chunks of a streamed response."""
+        data = zlib.compress(json.dumps(_to_json(response), separators=(",", ":")).encode("utf-8"))
+
+        # Write to a temp file and rename so readers never see half a file
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+class _CachedModels:
+    def __init__(self, models, cache: ResponseCache, replay: bool):
+        self._models = models
+        self._cache = cache
+        self._replay = replay
+
+    def _lookup(self, model, contents, config, stream=False):
+        key = self._cache.key(model, contents, config, stream)
+        response = self._cache.get(key)
+        tracer.annotate(cache="miss" if response is None else "hit")
+        if response is None and self._replay:
+            raise CacheMissError(f"No recorded response for request {key[:12]} (--replay never calls the model)")
+        return key, response
+
+    def generate_content(self, *, model, contents, config=None):
+        key, response = self._lookup(model, contents, config)
+        if response is None:
+            response = self._models.generate_content(model=model, contents=contents, config=config)
+            self._cache.put(key, response)
+        return response
+
+    def generate_content_stream(self, *, model, contents, config=None):
+        key, chunks = self._lookup(model, contents, config, stream=True)
+        if chunks is not None:
+            yield from chunks
+            return
+
+        chunks = []
+        for chunk in self._models.generate_content_stream(model=model, contents=contents, config=config):
+            chunks.append(chunk)
+            yield chunk
+        # Only record turns that streamed to the end
+        self._cache.put(key, chunks)
+
+
+class _CachedAsyncModels(_CachedModels):
+    async def generate_content(self, *, model, contents, config=None):
+        key, response = self._lookup(model, contents, config)
+        if response is None:
+            response = await self._models.generate_content(model=model, contents=contents, config=config)
+            self._cache.put(key, response)
+        return response
+
+
+class CachedClient:
+    """
+    Wraps a genai.Client so that generate_content calls go through a
+    ResponseCache. With `replay=True` the wrapped client may be None, since a
+    cache miss raises CacheMissError instead of calling the model.
+    """
+
+    def __init__(self, client, cache: ResponseCache, replay: bool = False):
+        self.cache = cache
+        self.models = _CachedModels(client.models if client else None, cache, replay)
+        self.aio = SimpleNamespace(models=_CachedAsyncModels(client.aio.models if client else None, cache, replay))
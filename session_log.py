@@ -0,0 +1,98 @@
+import os
+import secrets
+import time
+from typing import List
+from google.genai import types
+from config import SESSION_LOG_DIR, SESSION_EXPORT_CHARS
+
+
+class SessionLog:
+    """
+    Append-only JSONL log of one conversation, one types.Content per line,
+    each written and flushed as soon as it joins the history. A run that
+    crashes, is interrupted or runs out of iterations keeps every model turn
+    and tool result it paid for, and can be picked up with resume().
+    """
+
+    SUFFIX = ".jsonl"
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "ab")
+
+    @property
+    def session_id(self) -> str:
+        return os.path.basename(self.path)[:-len(self.SUFFIX)] if self.path.endswith(self.SUFFIX) else self.path
+
+    @classmethod
+    def create(cls, directory: str = SESSION_LOG_DIR, name: str = None) -> "SessionLog":
+        """A new, empty log; named after the current time unless `name` is given."""
+        name = name or f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        return cls(os.path.join(directory, name + cls.SUFFIX))
+
+    @classmethod
+    def resume(cls, session: str, directory: str = SESSION_LOG_DIR):
+        """Reopens a session by id or path; returns the log, ready for appending, and its messages."""
+        path = session_path(session, directory)
+        messages = load_session(path, repair=True)
+        return cls(path), messages
+
+    def append(self, contents: List[types.Content]):
+        self._file.write(b"".join(content.model_dump_json(exclude_none=True).encode("utf-8") + b"\n" for content in contents))
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def session_path(session: str, directory: str = SESSION_LOG_DIR) -> str:
+    if os.path.isfile(session):
+        return session
+    path = os.path.join(directory, session + SessionLog.SUFFIX)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No session {session!r} (looked for {path})")
+    return path
+
+
+def load_session(path: str, repair: bool = False) -> List[types.Content]:
+    """
+    Rebuilds the history from a log. A last line without its newline was
+    cut off mid-write and is dropped; with `repair` it is also truncated
+    away, so appending can carry on from a clean line.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    end = data.rfind(b"\n") + 1
+    if end < len(data) and repair:
+        with open(path, "r+b") as f:
+            f.truncate(end)
+    return [types.Content.model_validate_json(line) for line in data[:end].splitlines() if line.strip()]
+
+
+def _one_line(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else f"{text[:limit]}... ({len(text)} chars)"
+
+
+def export_session(messages: List[types.Content], limit: int = SESSION_EXPORT_CHARS) -> str:
+    """A compact transcript: one line per message, with tool calls as name(args) and long text cut to `limit` characters."""
+    lines = []
+    calls_pending = False
+    for number, content in enumerate(messages, start=1):
+        pieces = []
+        calls = 0
+        for part in content.parts or []:
+            if part.function_call:
+                calls += 1
+                args = ", ".join(f"{key}={value!r}" for key, value in (part.function_call.args or {}).items())
+                pieces.append(_one_line(f"{part.function_call.name}({args})", limit))
+            elif part.text:
+                pieces.append(_one_line(part.text, limit))
+        # Tool results go back as user messages right after the model's calls
+        role = "tool" if content.role == "user" and calls_pending else content.role
+        if content.role == "model":
+            calls_pending = calls > 0
+        lines.append(f"{number:>3} {role}: {' | '.join(pieces)}")
+    return "\n".join(lines)
@@ -0,0 +1,44 @@
+"""
+Where what outlives a run is kept: session logs, the model response cache,
+search indexes and tool output blobs all go under config.STATE_DIR. A
+relative STATE_DIR is per project, taken from the directory the agent runs
+in. A daemon session sets that to its client's directory, so its state
+lands in the client's project rather than wherever the daemon started.
+"""
+import contextvars
+import os
+import threading
+
+# The directory the current daemon session runs in; None outside the daemon.
+# Tool threads and asyncio.to_thread copy the context, so they see it too.
+session_directory = contextvars.ContextVar("session_directory", default=None)
+
+
+def resolve(path: str) -> str:
+    """`path` as an absolute path, a relative one taken from the current session's directory."""
+    return os.path.join(session_directory.get() or os.getcwd(), os.path.expanduser(path))
+
+
+class PerSession:
+    """
+    Stands in for the `factory(directory)` of the current session's project:
+    attribute lookups go to the one for `path` resolved in that session,
+    made on first use and shared by every session in the same project.
+    """
+
+    def __init__(self, path: str, factory):
+        self.path = path
+        self.factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+
+    def current(self):
+        directory = resolve(self.path)
+        with self._lock:
+            instance = self._instances.get(directory)
+            if instance is None:
+                instance = self._instances[directory] = self.factory(directory)
+            return instance
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
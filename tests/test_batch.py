@@ -0,0 +1,87 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from google.genai import types
+from batch import load_batch, run_batch
+
+
+def text_response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+class FakeAsyncModels:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content(self, model, contents, config):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        prompt = contents[0].parts[0].text
+        if prompt == "fail":
+            raise RuntimeError("boom")
+        return text_response(f"echo: {prompt}")
+
+
+def fake_client(latency=0.0):
+    return SimpleNamespace(aio=SimpleNamespace(models=FakeAsyncModels(latency)))
+
+
+class TestBatch(unittest.TestCase):
+    def write_batch(self, tmpdir, lines):
+        path = os.path.join(tmpdir, "prompts.jsonl")
+        with open(path, "w") as f:
+            f.write("\n".join(json.dumps(line) for line in lines))
+        return path
+
+    def run_batch(self, client, batch_path, output_path, concurrency):
+        with redirect_stdout(io.StringIO()):
+            return asyncio.run(run_batch(client, batch_path, output_path, concurrency, 5, 1))
+
+    def test_load_batch_accepts_strings_and_objects(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self.write_batch(tmpdir, ["first", {"id": "b", "prompt": "second", "max_iterations": 2}])
+            tasks = load_batch(path)
+            self.assertEqual(tasks[0], {"prompt": "first", "id": 1})
+            self.assertEqual(tasks[1]["id"], "b")
+            self.assertEqual(tasks[1]["max_iterations"], 2)
+
+    def test_results_are_streamed_as_jsonl(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self.write_batch(tmpdir, ["one", "fail", "three"])
+            output_path = os.path.join(tmpdir, "out.jsonl")
+            self.run_batch(fake_client(), path, output_path, 2)
+
+            with open(output_path) as f:
+                records = {record["id"]: record for record in map(json.loads, f)}
+
+            self.assertEqual(records[1]["response"], "echo: one")
+            self.assertEqual(records[2]["error"], "boom")
+            self.assertEqual(records[3]["response"], "echo: three")
+
+    def test_concurrency_limit(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = self.write_batch(tmpdir, [f"prompt {i}" for i in range(8)])
+            client = fake_client(latency=0.05)
+
+            start = time.perf_counter()
+            self.run_batch(client, path, os.path.join(tmpdir, "out.jsonl"), 4)
+            elapsed = time.perf_counter() - start
+
+            self.assertEqual(client.aio.models.max_in_flight, 4)
+            self.assertLess(elapsed, 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
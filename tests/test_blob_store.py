@@ -0,0 +1,119 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.genai import types
+import blob_store
+from agent import generate_content
+from benchmarks.scripted_model import model_turn
+from blob_store import BlobStore, expand_recent, spill
+from functions import call_function
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+class RecordingModels:
+    """Reads big.txt, then finishes; keeps the contents of every request."""
+
+    def __init__(self):
+        self.requests = []
+
+    def generate_content(self, model, contents, config):
+        self.requests.append(list(contents))
+        if len(self.requests) == 1:
+            return model_turn([("get_file_content", {"file_path": "big.txt"})], 1)
+        return model_turn("done", 1)
+
+
+class TestBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.store = BlobStore(os.path.join(self.tmpdir.name, "blobs"), memory_entries=2)
+        patcher = patch.object(blob_store, "store", self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_round_trip_and_dedup(self):
+        digest = self.store.put("a" * 10000)
+        self.assertEqual(self.store.put("a" * 10000), digest)
+        self.assertEqual(len(os.listdir(self.store.directory)), 1)
+        self.assertEqual((self.store.stored, self.store.deduplicated), (1, 1))
+
+        # A fresh store (another session) reads it back from disk
+        self.assertEqual(BlobStore(self.store.directory).get(digest), "a" * 10000)
+        self.assertIsNone(self.store.get("0" * 64))
+
+    def test_evicts_least_recently_used(self):
+        # Random hex compresses to the same size every time
+        first = self.store.put(os.urandom(4000).hex())
+        second = self.store.put(os.urandom(4000).hex())
+        self.store.max_bytes = self.store._total_bytes + 1000
+        # Read back from disk, which makes it the most recently used again
+        self.store._recent.clear()
+        self.assertIsNotNone(self.store.get(first))
+        third = self.store.put(os.urandom(4000).hex())
+
+        self.assertFalse(os.path.exists(self.store._path(second)))
+        self.assertIsNone(self.store.get(second))
+        # The order comes from mtimes, so another process evicts the same way
+        reopened = BlobStore(self.store.directory)
+        reopened.get(third)
+        self.assertEqual(list(reopened._entries), [first, third])
+
+    def test_spill_only_large_outputs(self):
+        self.assertEqual(spill("short", spill_chars=100), "short")
+        reference = spill("x" * 5000 + "tail", spill_chars=100)
+        self.assertTrue(blob_store.REFERENCE.match(reference))
+        self.assertIn("5004 characters", reference)
+        self.assertNotIn("tail", reference)
+
+    def test_expand_recent(self):
+        old = spill("old " * 2000, spill_chars=100)
+        new = spill("new " * 2000, spill_chars=100)
+        messages = [user("prompt"), model("call"), user(old), model("call"), user(new)]
+
+        expanded = expand_recent(messages, keep_recent=1)
+        self.assertEqual(expanded[2].parts[0].text, old)
+        self.assertEqual(expanded[4].parts[0].text, "new " * 2000)
+        # The history itself keeps the reference
+        self.assertEqual(messages[4].parts[0].text, new)
+
+        # Results the model hasn't seen yet are expanded even outside the window
+        messages.append(user(spill("more " * 2000, spill_chars=100)))
+        expanded = expand_recent(messages, keep_recent=1)
+        self.assertEqual(expanded[4].parts[0].text, "new " * 2000)
+
+    def test_missing_blob_stays_a_reference(self):
+        reference = spill("gone " * 2000, spill_chars=100)
+        for name in os.listdir(self.store.directory):
+            os.remove(os.path.join(self.store.directory, name))
+        self.store._recent.clear()
+        self.assertEqual(expand_recent([user(reference)], keep_recent=1)[0].parts[0].text, reference)
+
+    def test_agent_loop_keeps_references_and_sends_full_outputs(self):
+        workdir = os.path.join(self.tmpdir.name, "work")
+        os.makedirs(workdir)
+        with open(os.path.join(workdir, "big.txt"), "w") as f:
+            f.write("line of the big file\n" * 300)
+        models = RecordingModels()
+        messages = [user("read big.txt")]
+
+        with patch.object(call_function, "WORKING_DIRECTORY", workdir), redirect_stdout(io.StringIO()):
+            generate_content(SimpleNamespace(models=models), messages, verbose=False)
+
+        self.assertTrue(blob_store.REFERENCE.match(messages[2].parts[0].text))
+        self.assertIn("line of the big file\n" * 300, models.requests[1][2].parts[0].text)
+
+
+if __name__ == "__main__":
+    unittest.main()
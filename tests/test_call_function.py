@@ -0,0 +1,76 @@
+import io
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from google.genai import types
+from functions import call_function as dispatcher
+
+
+def make_call(name, **args):
+    return types.FunctionCall(name=name, args=args)
+
+
+def result_of(content):
+    return content.parts[0].function_response.response["result"]
+
+
+class TestCallFunctions(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.lock = threading.Lock()
+
+        def slow_read(working_directory, file_path):
+            with self.lock:
+                self.events.append(("start", file_path))
+            time.sleep(0.05)
+            with self.lock:
+                self.events.append(("end", file_path))
+            return f"read {file_path}"
+
+        def write(working_directory, file_path, content):
+            with self.lock:
+                self.events.append(("write", file_path))
+            return f"wrote {file_path}"
+
+        self.fake_functions = {"get_file_content": slow_read, "write_file": write}
+
+    def run_calls(self, calls, max_workers):
+        with patch.dict(dispatcher.name_to_function, self.fake_functions), redirect_stdout(io.StringIO()):
+            return dispatcher.call_functions(calls, max_workers=max_workers)
+
+    def test_results_keep_call_order(self):
+        calls = [make_call("get_file_content", file_path=f"f{i}") for i in range(5)]
+        results = self.run_calls(calls, max_workers=4)
+        self.assertEqual([result_of(r) for r in results], [f"read f{i}" for i in range(5)])
+
+    def test_reads_run_concurrently(self):
+        calls = [make_call("get_file_content", file_path=f"f{i}") for i in range(4)]
+        start = time.perf_counter()
+        self.run_calls(calls, max_workers=4)
+        self.assertLess(time.perf_counter() - start, 0.15)
+
+    def test_write_is_a_barrier(self):
+        calls = [
+            make_call("get_file_content", file_path="a"),
+            make_call("get_file_content", file_path="b"),
+            make_call("write_file", file_path="c", content=""),
+            make_call("get_file_content", file_path="d"),
+        ]
+        results = self.run_calls(calls, max_workers=4)
+        self.assertEqual([result_of(r) for r in results], ["read a", "read b", "wrote c", "read d"])
+
+        write_index = self.events.index(("write", "c"))
+        self.assertIn(("end", "a"), self.events[:write_index])
+        self.assertIn(("end", "b"), self.events[:write_index])
+        self.assertIn(("start", "d"), self.events[write_index:])
+
+    def test_sequential_when_single_worker(self):
+        calls = [make_call("get_file_content", file_path=f"f{i}") for i in range(3)]
+        self.run_calls(calls, max_workers=1)
+        self.assertEqual(self.events[:2], [("start", "f0"), ("end", "f0")])
+
+
+if __name__ == "__main__":
+    unittest.main()
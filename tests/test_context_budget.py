@@ -0,0 +1,67 @@
+import unittest
+from google.genai import types
+from context_budget import compact_history, estimate_tokens
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def model_call(name):
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args={}))])
+
+
+def history(tool_outputs):
+    messages = [user("Fix the calculator")]
+    for i in range(tool_outputs):
+        messages.append(model_call("get_file_content"))
+        messages.append(user(f"file {i}\n" + "x" * 8000))
+    return messages
+
+
+class TestCompactHistory(unittest.TestCase):
+    def test_under_budget_is_untouched(self):
+        messages = history(2)
+        contents, before, after = compact_history(messages, 100000)
+        self.assertIs(contents, messages)
+        self.assertEqual(before, after)
+
+    def test_shrinks_old_tool_outputs_to_fit(self):
+        messages = history(10)
+        contents, before, after = compact_history(messages, 10000, keep_recent=2)
+
+        self.assertLessEqual(after, 10000)
+        self.assertLess(after, before)
+        self.assertEqual(sum(estimate_tokens(c) for c in contents), after)
+        self.assertEqual(len(contents), len(messages))
+        self.assertIn("elided", contents[2].parts[0].text)
+
+    def test_keeps_prompt_and_recent_messages(self):
+        messages = history(10)
+        contents, _, _ = compact_history(messages, 1, keep_recent=3)
+
+        self.assertIs(contents[0], messages[0])
+        for i in range(-3, 0):
+            self.assertIs(contents[i], messages[i])
+        # Over budget even after digests, so the oldest outputs become stubs
+        self.assertTrue(contents[2].parts[0].text.startswith("[Earlier tool result elided"))
+
+    def test_does_not_modify_history(self):
+        messages = history(5)
+        original = [m.parts[0].text for m in messages if m.role == "user"]
+        compact_history(messages, 100, keep_recent=1)
+        self.assertEqual([m.parts[0].text for m in messages if m.role == "user"], original)
+
+    def test_never_shrinks_a_later_prompt(self):
+        # A resumed session adds the user's next instruction after a finished turn
+        follow_up = "Now rename evaluate to run everywhere. " + "Keep the old name as an alias. " * 300
+        messages = history(3) + [types.Content(role="model", parts=[types.Part(text="done")]), user(follow_up)] + history(6)[1:]
+        contents, _, _ = compact_history(messages, 1, keep_recent=2)
+
+        self.assertIs(contents[8], messages[8])
+        self.assertTrue(contents[2].parts[0].text.startswith("[Earlier tool result elided"))
+        self.assertTrue(contents[10].parts[0].text.startswith("[Earlier tool result elided"))
+
+
+if __name__ == "__main__":
+    unittest.main()
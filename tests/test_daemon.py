@@ -0,0 +1,98 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from benchmarks.scripted_model import model_turn
+from config import BLOB_SPILL_CHARS
+from daemon import AgentDaemon, forward
+from main import parser, run
+from session_log import load_session
+
+
+class EchoModels:
+    """Echoes the prompt, after reading or searching notes.txt if the prompt asks to; waits at `gate` so sessions overlap."""
+
+    def __init__(self, gate):
+        self.gate = gate
+
+    def generate_content(self, model, contents, config):
+        prompt = contents[0].parts[0].text
+        if prompt.startswith("read") and len(contents) == 1:
+            return model_turn([("get_file_content", {"file_path": "notes.txt"})], 1)
+        if prompt.startswith("search") and len(contents) == 1:
+            return model_turn([("search_files", {"query": "notes"})], 1)
+        self.gate.wait(timeout=5)
+        return model_turn(f"echo: {prompt}", 1)
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.socket_path = os.path.join(self.tmpdir.name, "daemon.sock")
+
+    def start(self, gate):
+        client = SimpleNamespace(models=EchoModels(gate))
+        daemon = AgentDaemon(self.socket_path, client, parser, run, max_sessions=4)
+        threading.Thread(target=daemon.serve_forever, daemon=True).start()
+        self.addCleanup(daemon.server_close)
+        self.addCleanup(daemon.shutdown)
+        return daemon
+
+    def project(self, name, notes):
+        cwd = os.path.join(self.tmpdir.name, name)
+        os.makedirs(os.path.join(cwd, "calculator"))
+        with open(os.path.join(cwd, "calculator", "notes.txt"), "w") as f:
+            f.write(notes)
+        return cwd
+
+    def test_no_daemon(self):
+        self.assertIsNone(forward(self.socket_path, ["hi"], self.tmpdir.name, io.StringIO()))
+
+    def test_concurrent_sessions_keep_their_output_and_directory(self):
+        # Both sessions have to be in flight at once to get past the gate
+        gate = threading.Barrier(2)
+        self.start(gate)
+        results = {}
+
+        def client(name):
+            out = io.StringIO()
+            cwd = self.project(name, f"notes of {name}")
+            results[name] = (forward(self.socket_path, [f"read for {name}"], cwd, out), out.getvalue(), cwd)
+
+        threads = [threading.Thread(target=client, args=(name,)) for name in ("alpha", "beta")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        for name, other in (("alpha", "beta"), ("beta", "alpha")):
+            exit_code, output, cwd = results[name]
+            self.assertEqual(exit_code, 0)
+            self.assertIn(f"echo: read for {name}", output)
+            self.assertNotIn(other, output)
+            # The tool ran in the client's directory, and the session was logged there
+            sessions = os.path.join(cwd, ".tinyagent", "sessions")
+            messages = load_session(os.path.join(sessions, os.listdir(sessions)[0]))
+            self.assertIn(f"notes of {name}", messages[2].parts[0].text)
+
+    def test_state_goes_in_the_client_project(self):
+        self.start(threading.Barrier(1))
+        cwd = self.project("gamma", "long notes\n" * BLOB_SPILL_CHARS)
+        for prompt in ("read the notes", "search the notes"):
+            self.assertEqual(forward(self.socket_path, [prompt], cwd, io.StringIO()), 0)
+
+        # The spilled output, the search index and the session logs, not in the daemon's directory
+        self.assertEqual(sorted(os.listdir(os.path.join(cwd, ".tinyagent"))), ["blobs", "search", "sessions"])
+
+    def test_errors_end_the_session_with_an_exit_code(self):
+        self.start(threading.Barrier(1))
+        out = io.StringIO()
+        self.assertEqual(forward(self.socket_path, ["--resume", "missing"], self.tmpdir.name, out), 1)
+        self.assertIn("No session 'missing'", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
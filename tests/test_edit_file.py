@@ -0,0 +1,107 @@
+import os
+import stat
+import tempfile
+import unittest
+from functions.edit_file import edit_file
+
+ORIGINAL = "def add(a, b):\n    return a + b\n\n\ndef sub(a, b):\n    return a - b\n"
+
+
+class TestEditFile(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.cwd = self._dir.name
+        self.path = os.path.join(self.cwd, "ops.py")
+        with open(self.path, "w") as f:
+            f.write(ORIGINAL)
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_search_replace(self):
+        result = edit_file(self.cwd, "ops.py", edits=[
+            {"search": "return a - b", "replace": "return a - b  # subtract"},
+            {"search": "def add(a, b):\n", "replace": "def add(a, b):\n    \"\"\"Adds.\"\"\"\n"},
+        ])
+        self.assertIn("Successfully edited", result)
+        self.assertIn("2 changes", result)
+        # Ranges are reported in the new file: the docstring edit spans lines 1-2,
+        # and pushes the subtract line from 6 to 7
+        self.assertIn("lines 1-2, 7", result)
+        self.assertEqual(self.read(), ORIGINAL.replace("return a - b", "return a - b  # subtract").replace(
+            "def add(a, b):\n", "def add(a, b):\n    \"\"\"Adds.\"\"\"\n"))
+
+    def test_ambiguous_or_missing_search_changes_nothing(self):
+        result = edit_file(self.cwd, "ops.py", edits=[
+            {"search": "return a + b", "replace": "return b + a"},
+            {"search": "(a, b)", "replace": "(x, y)"},
+        ])
+        self.assertIn("Error:", result)
+        self.assertIn("more than once", result)
+
+        result = edit_file(self.cwd, "ops.py", edits=[{"search": "def mul", "replace": "def times"}])
+        self.assertIn("not found", result)
+        self.assertEqual(self.read(), ORIGINAL)
+
+    def test_overlapping_edits(self):
+        result = edit_file(self.cwd, "ops.py", edits=[
+            {"search": "def add(a, b):\n    return", "replace": ""},
+            {"search": "return a + b", "replace": ""},
+        ])
+        self.assertIn("overlap", result)
+        self.assertEqual(self.read(), ORIGINAL)
+
+    def test_unified_diff(self):
+        diff = (
+            "--- a/ops.py\n"
+            "+++ b/ops.py\n"
+            "@@ -4,3 +4,6 @@\n"
+            " \n"
+            " def sub(a, b):\n"
+            "     return a - b\n"
+            "+\n"
+            "+def mul(a, b):\n"
+            "+    return a * b\n"
+        )
+        result = edit_file(self.cwd, "ops.py", diff=diff)
+        self.assertIn("Successfully edited", result)
+        self.assertIn("lines 4-9", result)
+        self.assertEqual(self.read(), ORIGINAL + "\ndef mul(a, b):\n    return a * b\n")
+
+    def test_diff_with_stale_line_numbers(self):
+        diff = "@@ -40,2 +40,2 @@\n def add(a, b):\n-    return a + b\n+    return b + a\n"
+        result = edit_file(self.cwd, "ops.py", diff=diff)
+        self.assertIn("Successfully edited", result)
+        self.assertEqual(self.read(), ORIGINAL.replace("a + b", "b + a"))
+
+    def test_diff_that_does_not_match(self):
+        diff = "@@ -1,2 +1,2 @@\n def add(a, b):\n-    return a * b\n+    return b * a\n"
+        result = edit_file(self.cwd, "ops.py", diff=diff)
+        self.assertIn("does not match", result)
+        self.assertEqual(self.read(), ORIGINAL)
+
+    def test_keeps_mode_and_leaves_no_temp_files(self):
+        os.chmod(self.path, 0o755)
+        edit_file(self.cwd, "ops.py", edits=[{"search": "a - b", "replace": "a-b"}])
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o755)
+        self.assertEqual(os.listdir(self.cwd), ["ops.py"])
+
+    def test_requires_exactly_one_of_edits_or_diff(self):
+        self.assertIn("Error:", edit_file(self.cwd, "ops.py"))
+        self.assertIn("Error:", edit_file(self.cwd, "ops.py", edits=[{"search": "a", "replace": "b"}], diff="@@ -1 +1 @@\n"))
+
+    def test_file_outside_cwd(self):
+        result = edit_file(self.cwd, "../ops.py", edits=[{"search": "a", "replace": "b"}])
+        self.assertIn("Error:", result)
+
+    def test_missing_file(self):
+        result = edit_file(self.cwd, "missing.py", edits=[{"search": "a", "replace": "b"}])
+        self.assertIn("Error:", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 from functions.get_file_content import get_file_content
 import tempfile, os
+from unittest.mock import patch
 from config import MAX_CHARS
 
 class TestGetFileContent(unittest.TestCase):
@@ -29,4 +30,51 @@ class TestGetFileContent(unittest.TestCase):
             result = get_file_content(tmpdir, "big.txt")
 
             self.assertTrue(result.startswith("A" * MAX_CHARS))
-            self.assertIn("truncated at 10000 characters", result)
\ No newline at end of file
+            self.assertIn("truncated at 10000 characters", result)
+            self.assertIn("offset=10000", result)
+
+    def test_offset_and_length(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "digits.txt"), "w") as f:
+                f.write("0123456789")
+
+            self.assertEqual(get_file_content(tmpdir, "digits.txt", offset=7), "789")
+            result = get_file_content(tmpdir, "digits.txt", offset=2, length=3)
+            self.assertTrue(result.startswith("234\n"))
+            self.assertIn("offset=5 to continue", result)
+
+    def test_paging_covers_whole_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            text = "héllo wörld " * 2000
+            with open(os.path.join(tmpdir, "big.txt"), "w", encoding="utf-8") as f:
+                f.write(text)
+
+            pages, offset = [], 0
+            while True:
+                result = get_file_content(tmpdir, "big.txt", offset=offset, length=MAX_CHARS)
+                page, _, hint = result.partition("\n[...")
+                pages.append(page)
+                if not hint:
+                    break
+                offset = int(hint.split("offset=")[1].split()[0])
+
+            self.assertEqual("".join(pages), text)
+
+    def test_line_range(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "lines.txt"), "w") as f:
+                f.writelines(f"line {i}\n" for i in range(1, 1001))
+
+            with patch("functions.get_file_content.SKIP_CHUNK", 64):
+                result = get_file_content(tmpdir, "lines.txt", start_line=500, end_line=502)
+            self.assertEqual(result, "line 500\nline 501\nline 502\n")
+
+            self.assertIn("past the end", get_file_content(tmpdir, "lines.txt", start_line=5000))
+
+    def test_line_range_continuation(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, "lines.txt"), "w") as f:
+                f.writelines("x" * 99 + "\n" for _ in range(500))
+
+            result = get_file_content(tmpdir, "lines.txt", start_line=1)
+            self.assertIn(f"start_line={MAX_CHARS // 100 + 1} to continue", result)
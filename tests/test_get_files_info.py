@@ -34,6 +34,74 @@ class TestGetFilesInfo(unittest.TestCase):
                 result = get_files_info(tempdir, nested_dir)
                 self.assertIn("test.py", result)
 
+    def make_tree(self, root):
+        os.makedirs(os.path.join(root, "pkg", "sub"))
+        os.makedirs(os.path.join(root, "build"))
+        for path in ("a.py", "notes.txt", "pkg/b.py", "pkg/sub/c.py", "build/out.py", "debug.log"):
+            with open(os.path.join(root, path), "w") as f:
+                f.write("x" * len(path))
+        with open(os.path.join(root, ".gitignore"), "w") as f:
+            f.write("build/\n*.log\n")
+
+    def test_recursive_with_pattern(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.make_tree(tempdir)
+            result = get_files_info(tempdir, depth=1, pattern="*.py")
+            self.assertEqual(
+                [line.split(":")[0] for line in result.splitlines()],
+                ["- a.py", "- pkg/b.py"],
+            )
+            self.assertIn("pkg/sub/c.py", get_files_info(tempdir, depth=2, pattern="*.py"))
+
+    def test_respects_gitignore_and_ignore_globs(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.make_tree(tempdir)
+            result = get_files_info(tempdir, depth=3)
+            self.assertNotIn("build", result)
+            self.assertNotIn("debug.log", result)
+
+            self.assertIn("build/out.py", get_files_info(tempdir, depth=3, respect_gitignore=False))
+            self.assertNotIn("notes.txt", get_files_info(tempdir, ignore=["*.txt"]))
+
+    def test_pagination(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            for i in range(25):
+                open(os.path.join(tempdir, f"f{i:02}.txt"), "w").close()
+
+            names, cursor = [], None
+            while True:
+                result = get_files_info(tempdir, limit=10, cursor=cursor)
+                lines = result.splitlines()
+                if lines[-1].startswith("[..."):
+                    cursor = lines[-1].split('cursor="')[1].split('"')[0]
+                    lines = lines[:-1]
+                else:
+                    cursor = None
+                names += [line.split(":")[0][2:] for line in lines]
+                if cursor is None:
+                    break
+
+            self.assertEqual(names, [f"f{i:02}.txt" for i in range(25)])
+
+    def test_sizes_follow_edits_in_place(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            fpath = os.path.join(tempdir, "temp.txt")
+            with open(fpath, "w") as f:
+                f.write("hello")
+            self.assertIn("file_size=5 bytes", get_files_info(tempdir))
+
+            # Edited from outside the agent: the directory's stat doesn't change
+            with open(fpath, "a") as f:
+                f.write(" world")
+            self.assertIn("file_size=11 bytes", get_files_info(tempdir))
+
+    def test_sort_by_size(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.make_tree(tempdir)
+            first = get_files_info(tempdir, sort_by="size", respect_gitignore=False).splitlines()[0]
+            self.assertIn("is_dir=True", first)
+            self.assertIn("Error", get_files_info(tempdir, sort_by="colour"))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
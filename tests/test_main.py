@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup(unittest.TestCase):
+    def run_main(self, *args):
+        return subprocess.run([sys.executable, "main.py", *args], cwd=ROOT, capture_output=True, text=True, timeout=30)
+
+    def test_import_does_not_load_the_sdk(self):
+        code = "import sys, main; print(sorted(m for m in ('google.genai', 'agent', 'asyncio') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=30)
+        self.assertEqual(result.stdout.strip(), "[]", result.stderr)
+
+    def test_help(self):
+        result = self.run_main("--help")
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("--replay", result.stdout)
+
+    def test_missing_prompt_is_a_usage_error(self):
+        result = self.run_main()
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("a prompt is required", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from functions import python_pool
+from functions.output_capture import BoundedOutput
+from functions.run_python import run_python_file
+from config import RUN_OUTPUT_HEAD_BYTES, RUN_OUTPUT_TAIL_BYTES
+
+
+class TestBoundedOutput(unittest.TestCase):
+    def test_small_output_is_kept_whole(self):
+        output = BoundedOutput(4, 4)
+        output.write(b"abc")
+        output.write(b"def")
+        self.assertEqual(output.text(), "abcdef")
+        self.assertEqual(output.dropped, 0)
+
+    def test_keeps_head_and_tail(self):
+        output = BoundedOutput(4, 4)
+        for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+            output.write(chunk)
+        self.assertEqual(output.total, 16)
+        self.assertEqual(output.dropped, 8)
+        self.assertEqual(output.text(), "0123\n[... 8 bytes of output dropped ...]\ncdef")
+
+
+class TestRunawayOutput(unittest.TestCase):
+    def run_script(self, source):
+        with tempfile.TemporaryDirectory() as cwd:
+            with open(os.path.join(cwd, "noisy.py"), "w") as f:
+                f.write(source)
+            return run_python_file(cwd, "noisy.py")
+
+    def test_runaway_script_is_killed(self):
+        start = time.monotonic()
+        result = self.run_script("while True:\n    print('x' * 1000)\n")
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertIn("process was killed", result)
+        self.assertIn("bytes of output dropped", result)
+        self.assertLess(len(result), RUN_OUTPUT_HEAD_BYTES + RUN_OUTPUT_TAIL_BYTES + 1000)
+
+    def test_drain_mode_lets_script_finish(self):
+        with patch("functions.run_python.RUN_OUTPUT_KILL_ON_OVERFLOW", False):
+            result = self.run_script("for _ in range(20000):\n    print('x' * 1000)\nprint('done')\n")
+        self.assertIn("the rest was dropped", result)
+        self.assertTrue(result.split("\nOutput exceeded")[0].endswith("done"))
+        self.assertNotIn("Process exited", result)
+
+    def test_warm_pool_is_bounded_too(self):
+        with patch.object(python_pool, "enabled", True), tempfile.TemporaryDirectory() as cwd:
+            with open(os.path.join(cwd, "noisy.py"), "w") as f:
+                f.write("while True:\n    print('x' * 1000)\n")
+            try:
+                result = run_python_file(cwd, "noisy.py")
+            finally:
+                python_pool.discard_pool(cwd)
+        self.assertIn("process was killed", result)
+        self.assertIn("Process exited with code -9", result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from functions.python_pool import WarmPythonPool
+
+
+class TestWarmPythonPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cwd = self.tmpdir.name
+        os.mkdir(os.path.join(self.cwd, "pkg"))
+        open(os.path.join(self.cwd, "pkg", "__init__.py"), "w").close()
+        self.write("pkg/greeting.py", "WORD = 'hello'\n")
+
+        self.pool = WarmPythonPool(self.cwd, preload=["pkg.greeting"])
+        self.addCleanup(self.pool.close)
+
+    def write(self, name, content):
+        path = os.path.join(self.cwd, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def run_script(self, script, args=(), timeout=10):
+        stdout, stderr, returncode, _, _ = self.pool.run(script, list(args), timeout=timeout)
+        return stdout.text(), stderr.text(), returncode
+
+    def test_limits_and_usage(self):
+        script = self.write("spin.py", "while True:\n    pass\n")
+        _, _, returncode, _, usage = self.pool.run(script, [], timeout=10, limits={"RLIMIT_CPU": (1, 2)})
+        self.assertEqual(returncode, -signal.SIGXCPU)
+        self.assertGreater(usage["cpu_seconds"], 0.5)
+        self.assertGreater(usage["max_rss"], 0)
+
+    def test_same_contract_as_a_cold_run(self):
+        script = self.write(
+            "script.py",
+            "import sys\nprint('out', sys.argv[1:])\nprint('err', file=sys.stderr)\nsys.exit(3)\n",
+        )
+        stdout, stderr, returncode = self.run_script(script, ["a", "b"])
+        cold = subprocess.run([sys.executable, script, "a", "b"], cwd=self.cwd, capture_output=True, text=True)
+
+        self.assertEqual((stdout, stderr, returncode), (cold.stdout, cold.stderr, cold.returncode))
+
+    def test_exits_like_a_cold_run(self):
+        script = self.write("script.py", """import atexit, pickle, threading, time
+
+class Point:
+    pass
+
+def later():
+    time.sleep(0.2)
+    print("thread done")
+
+atexit.register(lambda: print("atexit ran"))
+threading.Thread(target=later).start()
+print(type(pickle.loads(pickle.dumps(Point()))).__module__)
+print("main done")
+""")
+        warm = self.run_script(script)
+        cold = subprocess.run([sys.executable, script], cwd=self.cwd, capture_output=True, text=True)
+
+        self.assertEqual(warm, (cold.stdout, cold.stderr, cold.returncode))
+        self.assertEqual(warm[0], "__main__\nmain done\nthread done\natexit ran\n")
+
+    def test_runs_are_isolated(self):
+        script = self.write("script.py", "import pkg.greeting as g\nprint(g.WORD)\ng.WORD = 'changed'\n")
+        self.assertEqual(self.run_script(script)[0], "hello\n")
+        self.assertEqual(self.run_script(script)[0], "hello\n")
+
+    def test_edited_preloaded_module_is_reimported(self):
+        script = self.write("script.py", "from pkg.greeting import WORD\nprint(WORD)\n")
+        self.run_script(script)
+
+        time.sleep(0.01)
+        self.write("pkg/greeting.py", "WORD = 'goodbye'\n")
+        self.assertEqual(self.run_script(script)[0], "goodbye\n")
+
+    def test_uncaught_exception(self):
+        script = self.write("script.py", "raise ValueError('bad')\n")
+        _, stderr, returncode = self.run_script(script)
+        self.assertEqual(returncode, 1)
+        self.assertIn("ValueError: bad", stderr)
+        self.assertNotIn("python_pool_server", stderr)
+
+    def test_timeout_kills_child(self):
+        script = self.write("script.py", "import time\ntime.sleep(60)\n")
+        start = time.monotonic()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.run_script(script, timeout=0.5)
+        self.assertLess(time.monotonic() - start, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
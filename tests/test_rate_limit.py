@@ -0,0 +1,127 @@
+import asyncio
+import io
+import random
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from google.genai import errors, types
+from agent import generate_content
+from benchmarks.scripted_model import FaultInjectingClient, ScriptedClient, api_error, model_turn
+from rate_limit import RateLimitedClient, RateLimiter, RetryPolicy, server_retry_delay
+
+
+def limited(client, max_attempts=5, max_concurrency=8):
+    return RateLimitedClient(client, RateLimiter(max_concurrency=max_concurrency), RetryPolicy(max_attempts, 0, 0))
+
+
+class TestRetries(unittest.TestCase):
+    def test_transient_failures_are_retried(self):
+        faulty = FaultInjectingClient(ScriptedClient(["hi"]), faults=[429, 503])
+        client = limited(faulty)
+        with redirect_stdout(io.StringIO()):
+            response = client.models.generate_content(model="m", contents=[])
+
+        self.assertEqual(response.text, "hi")
+        self.assertEqual(faulty.injected, [429, 503])
+        # Halved by the 429, then a step back up for the success
+        self.assertEqual(client.limiter.throttled, 1)
+        self.assertEqual(client.limiter.concurrency, 4.25)
+        self.assertEqual(client.limiter.in_flight, 0)
+
+    def test_client_errors_are_not_retried(self):
+        faulty = FaultInjectingClient(ScriptedClient(["hi"]), faults=[400])
+        with self.assertRaises(errors.ClientError):
+            limited(faulty).models.generate_content(model="m", contents=[])
+        self.assertEqual(faulty.requests, 1)
+
+    def test_gives_up_after_max_attempts(self):
+        faulty = FaultInjectingClient(ScriptedClient(["hi"]), faults=[503] * 3)
+        with redirect_stdout(io.StringIO()), self.assertRaises(errors.ServerError):
+            limited(faulty, max_attempts=3).models.generate_content(model="m", contents=[])
+        self.assertEqual(faulty.injected, [503] * 3)
+
+    def test_stream_is_retried_before_its_first_chunk(self):
+        faulty = FaultInjectingClient(ScriptedClient(["hello"]), faults=[503])
+        client = limited(faulty)
+        with redirect_stdout(io.StringIO()):
+            chunks = list(client.models.generate_content_stream(model="m", contents=[]))
+        self.assertEqual([chunk.text for chunk in chunks], ["hello"])
+        self.assertEqual(client.limiter.in_flight, 0)
+
+    def test_agent_loop_survives_throttling(self):
+        faulty = FaultInjectingClient(ScriptedClient([[("get_files_info", {})], "done"]), faults=[429, None, 500, 503])
+        messages = [types.Content(role="user", parts=[types.Part(text="look around")])]
+        with redirect_stdout(io.StringIO()) as out:
+            generate_content(limited(faulty), messages, verbose=False)
+        self.assertNotIn("Error during iteration", out.getvalue())
+        self.assertEqual(messages[-1].parts[0].text, "done")
+
+    def test_backoff_is_jittered_and_bounded(self):
+        policy = RetryPolicy(10, 1.0, 10.0, random.Random(1))
+        delays = [policy.delay(attempt, api_error(503)) for attempt in range(8)]
+        for attempt, delay in enumerate(delays):
+            self.assertLessEqual(delay, min(10.0, 2 ** attempt))
+        self.assertEqual(len(set(delays)), len(delays))
+
+    def test_server_retry_delay_is_honored(self):
+        error = api_error(429, retry_delay=20)
+        self.assertEqual(server_retry_delay(error), 20.0)
+        self.assertEqual(RetryPolicy(5, 0.0, 60.0).delay(0, error), 20.0)
+        self.assertIsNone(server_retry_delay(api_error(503)))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_requests_per_minute(self):
+        now = [0.0]
+        limiter = RateLimiter(requests_per_minute=2, clock=lambda: now[0])
+        for _ in range(2):
+            self.assertEqual(limiter.reserve(10), 0)
+            limiter.release(10, 10)
+        self.assertEqual(limiter.reserve(10), 30.0)
+        now[0] = 30.0
+        self.assertEqual(limiter.reserve(10), 0)
+
+    def test_tokens_per_minute_settle_with_actual_usage(self):
+        now = [0.0]
+        limiter = RateLimiter(tokens_per_minute=600, clock=lambda: now[0])
+        self.assertEqual(limiter.reserve(400), 0)
+        # The request really used 500, leaving 100 of the bucket
+        limiter.release(400, 500)
+        self.assertEqual(limiter.reserve(200), 10.0)
+
+    def test_one_halving_per_burst_of_429s(self):
+        now = [0.0]
+        limiter = RateLimiter(max_concurrency=8, clock=lambda: now[0])
+        limiter.throttled_for(5.0)
+        limiter.throttled_for(5.0)
+        self.assertEqual(limiter.concurrency, 4.0)
+        self.assertEqual(limiter.reserve(1), 5.0)
+        now[0] = 6.0
+        limiter.throttled_for(5.0)
+        self.assertEqual(limiter.concurrency, 2.0)
+
+    def test_requests_in_flight_are_capped(self):
+        class SlowModels:
+            def __init__(self):
+                self.in_flight = 0
+                self.max_in_flight = 0
+
+            async def generate_content(self, model, contents, config):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(0.01)
+                self.in_flight -= 1
+                return model_turn("ok", 1)
+
+        models = SlowModels()
+        client = limited(SimpleNamespace(models=None, aio=SimpleNamespace(models=models)), max_concurrency=3)
+
+        async def run_all():
+            return await asyncio.gather(*(client.aio.models.generate_content(model="m", contents=[]) for _ in range(10)))
+
+        self.assertEqual(len(asyncio.run(run_all())), 10)
+        self.assertEqual(models.max_in_flight, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
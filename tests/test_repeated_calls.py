@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from google.genai import types
+import agent
+import blob_store
+from agent import generate_content
+from benchmarks.scripted_model import ScriptedClient, model_turn
+from blob_store import BlobStore
+from config import BLOB_SPILL_CHARS
+from functions import call_function
+from repeated_calls import RepeatedCalls
+
+READ_NOTES = ("get_file_content", {"file_path": "notes.txt"})
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+class TestRepeatedCalls(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.notes = os.path.join(self.tmpdir.name, "notes.txt")
+        self.write_notes("the notes say hello, " * 20)
+        self.repeats = RepeatedCalls()
+        patcher = patch.object(blob_store, "store", BlobStore(os.path.join(self.tmpdir.name, "blobs")))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_notes(self, text):
+        with open(self.notes, "w") as f:
+            f.write(text)
+
+    def run_loop(self, turns):
+        messages = [user("read the notes")]
+        with patch.object(call_function, "WORKING_DIRECTORY", self.tmpdir.name), \
+                patch.object(agent, "repeated_calls", self.repeats), redirect_stdout(io.StringIO()):
+            generate_content(ScriptedClient(turns + ["done"]), messages, verbose=False)
+        # The tool results, one per turn
+        return [content.parts[0].text for content in messages[2::2]]
+
+    def test_repeat_is_short_circuited(self):
+        first, _, repeat = self.run_loop([[READ_NOTES], [("get_files_info", {})], [READ_NOTES]])
+        self.assertIn("the notes say hello", first)
+        self.assertTrue(repeat.startswith('[get_file_content({"file_path": "notes.txt"}): unchanged since iteration 1,'))
+        self.assertEqual(self.repeats.short_circuited, 1)
+        self.assertEqual(self.repeats.chars_saved, len(first) - len(repeat))
+
+    def test_changed_file_is_read_in_full(self):
+        self.write_notes("short")
+        turns = [[READ_NOTES], [("write_file", {"file_path": "notes.txt", "content": "rewritten " * 20})], [READ_NOTES]]
+        self.assertIn("rewritten", self.run_loop(turns)[2])
+        self.assertEqual(self.repeats.short_circuited, 0)
+
+    def test_asking_again_after_a_note_gets_the_full_result(self):
+        first, note, third = self.run_loop([[READ_NOTES], [READ_NOTES], [READ_NOTES]])
+        self.assertIn("unchanged since iteration 1", note)
+        self.assertEqual(third, first)
+
+    def test_spilled_output_is_short_circuited(self):
+        self.write_notes("the notes say hello, " * (BLOB_SPILL_CHARS // 10))
+        first, repeat = self.run_loop([[READ_NOTES], [READ_NOTES]])
+        # The history keeps a reference, but the model was sent the whole output
+        self.assertTrue(blob_store.REFERENCE.match(first))
+        self.assertIn("unchanged since iteration 1", repeat)
+        self.assertIn(f"{os.path.getsize(self.notes)} characters", repeat)
+        self.assertEqual(self.repeats.short_circuited, 1)
+
+    def test_only_results_sent_in_full_count(self):
+        call = model_turn([READ_NOTES], 0).candidates[0].content
+        result = user("the notes say hello, " * 20)
+        messages = [user("read the notes"), call, result, call]
+
+        # The earlier result went out compacted, so the model never saw it whole
+        sent = [messages[0], call, user("digest")]
+        self.assertEqual(self.repeats.replace_repeats(messages, sent, [result])[0], result)
+
+        # Or as a bare blob reference
+        reference = user(blob_store.spill("the notes say hello, " * 500))
+        spilled = [messages[0], call, reference, call]
+        self.assertEqual(self.repeats.replace_repeats(spilled, spilled[:3], [reference])[0], reference)
+
+        sent = messages[:3]
+        self.assertIn("unchanged since iteration 1", self.repeats.replace_repeats(messages, sent, [result])[0].parts[0].text)
+
+
+if __name__ == "__main__":
+    unittest.main()
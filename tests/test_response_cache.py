@@ -0,0 +1,119 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.genai import types
+from agent import generate_content
+from benchmarks.scripted_model import ScriptedClient
+from functions import call_function
+from response_cache import CacheMissError, CachedClient, ResponseCache
+
+
+def text_response(text):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+def user_message(text):
+    return [types.Content(role="user", parts=[types.Part(text=text)])]
+
+
+class CountingModels:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        return text_response(f"answer {self.calls}")
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_depends_on_every_input(self):
+        config = types.GenerateContentConfig(system_instruction="a")
+        key = ResponseCache.key("m", user_message("hi"), config)
+
+        self.assertEqual(key, ResponseCache.key("m", user_message("hi"), types.GenerateContentConfig(system_instruction="a")))
+        self.assertNotEqual(key, ResponseCache.key("other", user_message("hi"), config))
+        self.assertNotEqual(key, ResponseCache.key("m", user_message("bye"), config))
+        self.assertNotEqual(key, ResponseCache.key("m", user_message("hi"), types.GenerateContentConfig(system_instruction="b")))
+
+    def test_round_trip_survives_reopen(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            ResponseCache(tmpdir, 1 << 20).put("k", text_response("hello"))
+
+            cache = ResponseCache(tmpdir, 1 << 20)
+            self.assertEqual(cache.get("k").text, "hello")
+            self.assertIsNone(cache.get("missing"))
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ResponseCache(tmpdir, 1 << 20)
+            cache.put("a", text_response("a"))
+            entry_size = cache._total_bytes
+            cache.max_bytes = entry_size * 2
+
+            cache.put("b", text_response("b"))
+            cache.get("a")
+            cache.put("c", text_response("c"))
+
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertFalse(os.path.exists(cache._path("b")))
+
+    def test_cached_client_records_then_replays(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            models = CountingModels()
+            client = CachedClient(SimpleNamespace(models=models, aio=SimpleNamespace(models=None)), ResponseCache(tmpdir, 1 << 20))
+
+            first = client.models.generate_content(model="m", contents=user_message("hi"))
+            second = client.models.generate_content(model="m", contents=user_message("hi"))
+            self.assertEqual(models.calls, 1)
+            self.assertEqual(first.text, second.text)
+
+            replay = CachedClient(None, ResponseCache(tmpdir, 1 << 20), replay=True)
+            self.assertEqual(replay.models.generate_content(model="m", contents=user_message("hi")).text, "answer 1")
+            with self.assertRaises(CacheMissError):
+                replay.models.generate_content(model="m", contents=user_message("new"))
+
+    def test_streamed_turns_are_recorded_as_chunks(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            chunks = [text_response("a"), text_response("b")]
+            streaming = SimpleNamespace(generate_content_stream=lambda model, contents, config=None: iter(chunks))
+            client = CachedClient(SimpleNamespace(models=streaming, aio=SimpleNamespace(models=None)), ResponseCache(tmpdir, 1 << 20))
+            self.assertEqual([c.text for c in client.models.generate_content_stream(model="m", contents=user_message("hi"))], ["a", "b"])
+
+            replay = CachedClient(None, ResponseCache(tmpdir, 1 << 20), replay=True)
+            self.assertEqual([c.text for c in replay.models.generate_content_stream(model="m", contents=user_message("hi"))], ["a", "b"])
+            # The streamed recording doesn't answer a non-streamed request
+            with self.assertRaises(CacheMissError):
+                replay.models.generate_content(model="m", contents=user_message("hi"))
+
+    def test_replays_a_session_that_ran_a_script(self):
+        # The script's result is part of the next request's key, so it has to come out the same on replay
+        with tempfile.TemporaryDirectory() as tmpdir, patch.object(call_function, "WORKING_DIRECTORY", tmpdir):
+            with open(os.path.join(tmpdir, "hello.py"), "w") as f:
+                # Same output every run, different memory use
+                f.write("import random\ndata = bytearray(random.randrange(10, 60) * 1024 * 1024)\nprint('hello')\n")
+            cache_dir = os.path.join(tmpdir, "cache")
+
+            def session(client):
+                output = io.StringIO()
+                with redirect_stdout(output):
+                    generate_content(client, user_message("run hello.py"), verbose=False)
+                return output.getvalue()
+
+            scripted = ScriptedClient([[("run_python_file", {"file_path": "hello.py"})], "it printed hello"])
+            self.assertIn("it printed hello", session(CachedClient(scripted, ResponseCache(cache_dir, 1 << 20))))
+
+            replayed = session(CachedClient(None, ResponseCache(cache_dir, 1 << 20), replay=True))
+            self.assertNotIn("Error during iteration", replayed)
+            self.assertIn("it printed hello", replayed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
 import os
+import re
 import tempfile
+import threading
 import unittest
+from unittest.mock import patch
+from functions import run_python
 from functions.run_python import run_python_file
 from functions.write_file import write_file
+from tracing import tracer
 
 class TestRunPythonFile(unittest.TestCase):
     def test_run_python_file_stdout(self):
@@ -44,4 +49,73 @@ class TestRunPythonFile(unittest.TestCase):
 
             result = run_python_file(cwd, non_py_file)
             self.assertIn("Error", result)
-            self.assertIn("is not a Python file", result)
\ No newline at end of file
+            self.assertIn("is not a Python file", result)
+
+    def traced(self):
+        tracer.reset()
+        tracer.enabled = True
+        self.addCleanup(setattr, tracer, "enabled", False)
+
+    def run_traced(self, cwd, file_path):
+        with tracer.span("tool", "run_python_file"):
+            return run_python_file(cwd, file_path)
+
+    def test_reports_cpu_time_and_peak_rss_on_the_trace(self):
+        self.traced()
+        with tempfile.TemporaryDirectory() as cwd:
+            write_file(cwd, "temp.py", "data = bytearray(50 * 1024 * 1024)\nprint(len(data))")
+
+            result = self.run_traced(cwd, "temp.py")
+            # Not in the result, which has to be the same every run
+            self.assertEqual(result, "STDOUT: \n52428800")
+            self.assertGreater(tracer.spans[0]["peak_rss_mb"], 50)
+            self.assertGreaterEqual(tracer.spans[0]["cpu_seconds"], 0)
+
+    def test_reports_cpu_time_and_peak_rss_in_the_stats(self):
+        stats = run_python.RunStats()
+        with tempfile.TemporaryDirectory() as cwd, patch.object(run_python, "run_stats", stats):
+            write_file(cwd, "temp.py", "data = bytearray(50 * 1024 * 1024)\nprint(len(data))")
+            run_python_file(cwd, "temp.py")
+            run_python_file(cwd, "temp.py")
+
+        # No tracing needed
+        self.assertEqual(stats.runs, 2)
+        self.assertGreater(stats.peak_rss_mb, 50)
+        self.assertRegex(stats.stats(), r"^Script runs: 2, \d+\.\d\d s CPU, peak RSS \d+\.\d MB, \d+\.\d\d s queued \(last: ")
+
+    def test_stdin_is_empty(self):
+        with tempfile.TemporaryDirectory() as cwd:
+            write_file(cwd, "temp.py", "import sys\nprint(repr(sys.stdin.read()))")
+            self.assertEqual(run_python_file(cwd, "temp.py"), "STDOUT: \n''")
+
+    def test_cpu_limit(self):
+        with tempfile.TemporaryDirectory() as cwd, patch.object(run_python, "RUN_CPU_SECONDS", 1):
+            write_file(cwd, "spin.py", "while True:\n    pass")
+
+            result = run_python_file(cwd, "spin.py")
+            self.assertIn("Process hit its CPU time limit of 1 s", result)
+
+    def test_memory_limit(self):
+        with tempfile.TemporaryDirectory() as cwd, patch.object(run_python, "RUN_MAX_MEMORY_BYTES", 256 * 1024 * 1024):
+            write_file(cwd, "hog.py", "data = bytearray(1024 * 1024 * 1024)")
+
+            result = run_python_file(cwd, "hog.py")
+            self.assertIn("MemoryError", result)
+            self.assertIn("Process hit its memory limit of 256 MB", result)
+
+    def test_runs_queue_for_a_slot(self):
+        with tempfile.TemporaryDirectory() as cwd, patch.object(run_python, "_run_slots", threading.BoundedSemaphore(1)):
+            write_file(cwd, "nap.py", "import time\nstart = time.time()\ntime.sleep(0.3)\nprint(start, time.time())")
+
+            results = []
+            self.traced()
+            threads = [threading.Thread(target=lambda: results.append(self.run_traced(cwd, "nap.py"))) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            windows = sorted(tuple(map(float, re.search(r"STDOUT: \n(\S+) (\S+)", result).groups())) for result in results)
+            for (_, end), (start, _) in zip(windows, windows[1:]):
+                self.assertLessEqual(end, start)
+            self.assertGreater(max(span["queued_seconds"] for span in tracer.spans), 0.2)
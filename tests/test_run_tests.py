@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+from functions.run_tests import run_tests
+
+TEST_A = """import unittest
+from pkg.a import value
+
+class TestA(unittest.TestCase):
+    def test_value(self):
+        self.assertEqual(value(), 1)
+"""
+
+TEST_B = """import unittest
+from pkg.b import value
+
+class TestB(unittest.TestCase):
+    def test_value(self):
+        self.assertEqual(value(), 2)
+
+    def test_broken(self):
+        self.assertEqual(value(), 3)
+"""
+
+
+class TestRunTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cwd = self.tmpdir.name
+        os.mkdir(os.path.join(self.cwd, "pkg"))
+        self.write("pkg/__init__.py", "")
+        self.write("pkg/a.py", "def value():\n    return 1\n")
+        self.write("pkg/b.py", "def value():\n    return 2\n")
+        self.write("test_a.py", TEST_A)
+        self.write("test_b.py", TEST_B)
+
+    def write(self, name, content):
+        with open(os.path.join(self.cwd, name), "w") as f:
+            f.write(content)
+
+    def test_summary(self):
+        result = run_tests(self.cwd)
+        lines = result.splitlines()
+        self.assertRegex(lines[0], r"^Ran 3 tests from 2 of 2 test files: 2 passed, 1 failed, 0 errors, 0 skipped$")
+        self.assertEqual(lines[1], "FAIL test_b.TestB.test_broken at test_b.py:9: AssertionError: 2 != 3")
+        self.assertEqual(len(lines), 2)
+        # Nothing in it varies between runs, so replaying a session gives the same history
+        self.assertEqual(run_tests(self.cwd, run_all=True), result)
+
+    def test_only_affected_files_run(self):
+        run_tests(self.cwd)
+        result = run_tests(self.cwd)
+        self.assertTrue(result.startswith("Ran nothing: none of the 2 test files"))
+        # The failure is still reported
+        self.assertIn("FAIL test_b.TestB.test_broken at test_b.py:9: AssertionError: 2 != 3 (earlier run", result)
+
+        self.write("pkg/a.py", "def value():\n    return 10\n")
+        result = run_tests(self.cwd)
+        self.assertRegex(result, r"^Ran 1 tests from 1 of 2 test files: 0 passed, 1 failed")
+        self.assertIn("FAIL test_a.TestA.test_value at test_a.py:6: AssertionError: 10 != 1", result)
+
+        self.assertRegex(run_tests(self.cwd, run_all=True), r"^Ran 3 tests from 2 of 2 test files")
+
+    def test_import_errors_are_rerun(self):
+        self.write("test_c.py", "import pkg.missing\n")
+        result = run_tests(self.cwd, "test_c.py")
+        self.assertIn("ERROR test_c.py: ModuleNotFoundError: No module named 'pkg.missing'", result)
+
+        self.write("pkg/missing.py", "")
+        self.assertRegex(run_tests(self.cwd, "test_c.py"), r"^Ran 0 tests from 1 of 1 test files: 0 passed, 0 failed, 0 errors")
+
+    def test_outside_working_directory(self):
+        self.assertTrue(run_tests(self.cwd, "..").startswith("Error: Cannot run tests"))
+
+
+if __name__ == "__main__":
+    unittest.main()
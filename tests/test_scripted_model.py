@@ -0,0 +1,41 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from google.genai import types
+from agent import generate_content
+from benchmarks.scripted_model import ScriptedClient, ScriptExhaustedError
+from functions import call_function
+
+
+class TestScriptedClient(unittest.TestCase):
+    def test_drives_the_agent_loop_with_real_tools(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            with open(os.path.join(workdir, "notes.txt"), "w") as f:
+                f.write("hello from the workspace")
+
+            client = ScriptedClient([
+                [("get_files_info", {}), ("get_file_content", {"file_path": "notes.txt"})],
+                "all done",
+            ])
+            messages = [types.Content(role="user", parts=[types.Part(text="look around")])]
+            with patch.object(call_function, "WORKING_DIRECTORY", workdir), redirect_stdout(io.StringIO()) as out:
+                generate_content(client, messages, verbose=False)
+
+        self.assertIn("all done", out.getvalue())
+        self.assertIn("hello from the workspace", messages[3].parts[0].text)
+        # The second request carries the first turn and both tool results
+        self.assertEqual([count for count, _ in client.requests], [1, 4])
+        self.assertLess(client.requests[0][1], client.requests[1][1])
+
+    def test_running_past_the_script(self):
+        client = ScriptedClient([[("get_files_info", {})]])
+        client.models.generate_content(model="m", contents=[])
+        with self.assertRaises(ScriptExhaustedError):
+            client.models.generate_content(model="m", contents=[])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from functions import search_files as search_module
+from functions.search_files import TrigramIndex, regex_trigrams, search_files, trigrams
+from functions.write_file import write_file
+
+
+class TestSearchFiles(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.cwd = os.path.join(tmpdir.name, "project")
+        os.mkdir(self.cwd)
+
+        # Keep the persisted index and the per-directory registry local to the test
+        patches = [
+            patch.object(search_module, "SEARCH_INDEX_DIR", os.path.join(tmpdir.name, "index")),
+            patch.dict(search_module._indexes, clear=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        write_file(self.cwd, "pkg/calculator.py", "class Calculator:\n    def evaluate(self, expression):\n        return 1\n")
+        write_file(self.cwd, "main.py", "from pkg.calculator import Calculator\nprint(Calculator().evaluate('1'))\n")
+        write_file(self.cwd, "notes.txt", "nothing to see\n")
+
+    def test_literal_search_ranks_definition_first(self):
+        result = search_files(self.cwd, "evaluate").splitlines()
+        self.assertEqual(result[0], "pkg/calculator.py:2: def evaluate(self, expression):")
+        self.assertIn("main.py:2: print(Calculator().evaluate('1'))", result)
+
+    def test_regex_and_case(self):
+        self.assertIn("pkg/calculator.py:1", search_files(self.cwd, r"class \w+:", regex=True))
+        self.assertIn("No matches", search_files(self.cwd, "CALCULATOR()", case_sensitive=True))
+        self.assertIn("main.py:2", search_files(self.cwd, "calculator()"))
+        self.assertIn("Error", search_files(self.cwd, "(", regex=True))
+
+    def test_path_glob_and_limit(self):
+        result = search_files(self.cwd, "calculator", path_glob="pkg/*")
+        self.assertNotIn("main.py", result)
+        self.assertIn("more matches", search_files(self.cwd, "e", max_results=1))
+        self.assertEqual(search_files(self.cwd, "e", max_results="ten"), "Error: max_results must be an integer")
+
+    def test_write_file_updates_index(self):
+        self.assertIn("No matches", search_files(self.cwd, "brand_new_symbol"))
+        write_file(self.cwd, "notes.txt", "brand_new_symbol = 3\n")
+        self.assertIn("notes.txt:1", search_files(self.cwd, "brand_new_symbol"))
+
+    def test_index_narrows_candidates_and_persists(self):
+        search_files(self.cwd, "evaluate")
+        index = TrigramIndex(self.cwd)
+        self.assertEqual(set(index.files), {"pkg/calculator.py", "main.py", "notes.txt"})
+        self.assertEqual(index.candidates(trigrams("evaluate")), ["main.py", "pkg/calculator.py"])
+        self.assertEqual(index.candidates(trigrams("nothing")), ["notes.txt"])
+
+    def test_regex_trigrams(self):
+        self.assertEqual(regex_trigrams("def eval"), trigrams("def eval"))
+        self.assertEqual(regex_trigrams(r"foo|bar"), set())
+        self.assertEqual(regex_trigrams(r"(optional)?text"), trigrams("text"))
+        self.assertEqual(regex_trigrams(r"abcd?"), trigrams("abc"))
+        self.assertEqual(regex_trigrams(r"\w+_cache\."), trigrams("_cache."))
+
+
+if __name__ == "__main__":
+    unittest.main()
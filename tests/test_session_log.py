@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from google.genai import types
+from agent import finish_interrupted_turn, generate_content
+from benchmarks.scripted_model import ScriptedClient, model_turn
+from functions import call_function
+from session_log import SessionLog, export_session, load_session, session_path
+
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+class TestSessionLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.workdir = os.path.join(self.tmpdir.name, "work")
+        os.makedirs(self.workdir)
+        with open(os.path.join(self.workdir, "notes.txt"), "w") as f:
+            f.write("hello")
+        self.sessions = os.path.join(self.tmpdir.name, "sessions")
+
+    def run_loop(self, client, messages, session_log):
+        with patch.object(call_function, "WORKING_DIRECTORY", self.workdir), redirect_stdout(io.StringIO()):
+            generate_content(client, messages, verbose=False, session_log=session_log)
+
+    def test_every_message_is_logged_as_it_is_added(self):
+        log = SessionLog.create(self.sessions)
+        messages = [user("look around")]
+        log.append(messages)
+        self.run_loop(ScriptedClient([[("get_file_content", {"file_path": "notes.txt"})], "done"]), messages, log)
+        log.close()
+
+        self.assertEqual(load_session(session_path(log.session_id, self.sessions)), messages)
+        self.assertEqual(len(messages), 4)
+
+    def test_torn_last_line_is_dropped_and_repaired(self):
+        log = SessionLog.create(self.sessions, name="torn")
+        log.append([user("first"), user("second")])
+        log.close()
+        with open(log.path, "ab") as f:
+            f.write(b'{"role": "us')
+
+        self.assertEqual(len(load_session(log.path)), 2)
+        log, messages = SessionLog.resume("torn", self.sessions)
+        log.append([user("third")])
+        log.close()
+        self.assertEqual([m.parts[0].text for m in load_session(log.path)], ["first", "second", "third"])
+
+    def test_resume_runs_only_the_interrupted_calls(self):
+        # The run stopped after the model asked for a file but before the result was logged
+        log = SessionLog.create(self.sessions, name="interrupted")
+        call = types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name="get_file_content", args={"file_path": "notes.txt"}))])
+        log.append([user("read the notes"), call])
+        log.close()
+
+        log, messages = SessionLog.resume("interrupted", self.sessions)
+        with patch.object(call_function, "WORKING_DIRECTORY", self.workdir), redirect_stdout(io.StringIO()):
+            finish_interrupted_turn(messages, verbose=False, session_log=log)
+        self.assertIn("hello", messages[2].parts[0].text)
+
+        client = ScriptedClient(["the notes say hello"])
+        self.run_loop(client, messages, log)
+        log.close()
+        # One model call, and it already had the tool result
+        self.assertEqual([count for count, _ in client.requests], [3])
+        self.assertEqual(len(load_session(log.path)), 4)
+
+    def test_missing_session(self):
+        with self.assertRaises(FileNotFoundError):
+            session_path("nope", self.sessions)
+
+    def test_export_is_one_line_per_message(self):
+        messages = [
+            user("look around"),
+            model_turn([("get_file_content", {"file_path": "notes.txt"})], 0).candidates[0].content,
+            user("x" * 1000),
+            model_turn("all done\nbye", 0).candidates[0].content,
+        ]
+        lines = export_session(messages, limit=20).splitlines()
+        self.assertEqual(lines[0], "  1 user: look around")
+        self.assertEqual(lines[1], "  2 model: get_file_content(fil... (39 chars)")
+        self.assertEqual(lines[2], "  3 tool: xxxxxxxxxxxxxxxxxxxx... (1000 chars)")
+        self.assertEqual(lines[3], "  4 model: all done bye")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.genai import types
+from functions import call_function as dispatcher_module
+from functions.call_function import ToolDispatcher
+from agent import generate_content, stream_response
+
+
+def chunk(*parts):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=list(parts)))]
+    )
+
+
+def call_part(name, **args):
+    return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+class ScriptedStreamModels:
+    """Streams each scripted turn, recording what the tools had seen at each chunk."""
+
+    def __init__(self, turns, tool_log):
+        self.turns = list(turns)
+        self.tool_log = tool_log
+        self.seen_by_chunk = []
+
+    def generate_content_stream(self, model, contents, config):
+        for item in self.turns.pop(0):
+            self.seen_by_chunk.append(list(self.tool_log))
+            yield item
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tool_log = []
+
+        def fake_read(working_directory, file_path):
+            self.tool_log.append(file_path)
+            return f"contents of {file_path}"
+
+        patcher = patch.dict(dispatcher_module.name_to_function, {"get_file_content": fake_read})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tool_starts_before_stream_ends(self):
+        turn = [
+            chunk(call_part("get_file_content", file_path="a.py")),
+            chunk(types.Part(text="still ")),
+            chunk(types.Part(text="streaming")),
+        ]
+        models = ScriptedStreamModels([turn], self.tool_log)
+        client = SimpleNamespace(models=models)
+
+        with redirect_stdout(io.StringIO()) as out, ToolDispatcher(max_workers=1) as dispatcher:
+            response, timings = stream_response(client, [], dispatcher)
+
+        # The call ran before the second chunk was even requested
+        self.assertEqual(models.seen_by_chunk[1], ["a.py"])
+        self.assertTrue(out.getvalue().endswith("still streaming"))
+        self.assertEqual(len(response.candidates[0].content.parts), 2)
+        self.assertEqual(response.candidates[0].content.parts[1].text, "still streaming")
+        self.assertIsNotNone(timings["first_token"])
+        self.assertIsNotNone(timings["first_tool"])
+
+    def test_generate_content_streams_until_final_answer(self):
+        turns = [
+            [chunk(call_part("get_file_content", file_path="a.py"), call_part("get_file_content", file_path="b.py"))],
+            [chunk(types.Part(text="Done"))],
+        ]
+        client = SimpleNamespace(models=ScriptedStreamModels(turns, self.tool_log))
+        messages = [types.Content(role="user", parts=[types.Part(text="read both")])]
+
+        with redirect_stdout(io.StringIO()) as out:
+            generate_content(client, messages, False, max_tool_workers=2, stream=True)
+
+        self.assertIn("Done", out.getvalue())
+        self.assertEqual([m.role for m in messages], ["user", "model", "user", "user", "model"])
+        self.assertEqual(messages[2].parts[0].text, "contents of a.py")
+        self.assertEqual(messages[3].parts[0].text, "contents of b.py")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from functions.get_file_content import get_file_content
+from functions.get_files_info import get_files_info
+from functions.tool_cache import ToolCache, tool_cache
+from functions.write_file import write_file
+
+
+class TestToolCache(unittest.TestCase):
+    def setUp(self):
+        tool_cache.clear()
+
+    def test_repeated_read_skips_disk(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_file(tmpdir, "a.txt", "hello")
+            self.assertEqual(get_file_content(tmpdir, "a.txt"), "hello")
+
+            with patch("builtins.open", side_effect=AssertionError("file was reopened")):
+                self.assertEqual(get_file_content(tmpdir, "a.txt"), "hello")
+
+    def test_write_file_invalidates_file_and_listing(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            write_file(tmpdir, "a.txt", "hello")
+            get_file_content(tmpdir, "a.txt")
+            listing = get_files_info(tmpdir)
+
+            write_file(tmpdir, "a.txt", "hello, world")
+            self.assertEqual(get_file_content(tmpdir, "a.txt"), "hello, world")
+            self.assertNotEqual(get_files_info(tmpdir), listing)
+            self.assertIn("file_size=12", get_files_info(tmpdir))
+
+    def test_external_change_is_detected(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "a.txt")
+            with open(path, "w") as f:
+                f.write("one")
+            get_file_content(tmpdir, "a.txt")
+
+            with open(path, "w") as f:
+                f.write("three")
+            self.assertEqual(get_file_content(tmpdir, "a.txt"), "three")
+
+    def test_counters_and_size_bound(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ToolCache(max_chars=10)
+            for name in ("a", "b"):
+                path = os.path.join(tmpdir, name)
+                open(path, "w").close()
+                cache.cached("read", path, lambda: "x" * 6)
+
+            cache.cached("read", os.path.join(tmpdir, "b"), lambda: "y")
+            cache.cached("read", os.path.join(tmpdir, "a"), lambda: "z")
+            self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
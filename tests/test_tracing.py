@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import patch
+from google.genai import types
+from functions import call_function as dispatcher_module
+from agent import generate_content
+from tracing import Tracer, tracer
+
+
+def response(*parts, prompt_tokens=10, response_tokens=5):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=list(parts)))],
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=response_tokens
+        ),
+    )
+
+
+class ScriptedModels:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def generate_content(self, model, contents, config):
+        return self.responses.pop(0)
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        local = Tracer()
+        with local.span("tool", "noop") as span:
+            span["result_bytes"] = 1
+        self.assertEqual(local.spans, [])
+
+    def test_nesting_and_errors(self):
+        local = Tracer()
+        local.enabled = True
+        with local.span("run", "prompt"):
+            with local.span("model", "m") as span:
+                span["prompt_tokens"] = 3
+            with self.assertRaises(ValueError):
+                with local.span("tool", "boom"):
+                    raise ValueError("bad")
+
+        by_name = {span["name"]: span for span in local.spans}
+        self.assertIsNone(by_name["prompt"]["parent"])
+        self.assertEqual(by_name["m"]["parent"], by_name["prompt"]["id"])
+        self.assertEqual(by_name["m"]["prompt_tokens"], 3)
+        self.assertEqual(by_name["boom"]["error"], "ValueError: bad")
+        self.assertIn("boom", local.summary())
+
+
+class TestAgentTracing(unittest.TestCase):
+    def setUp(self):
+        tracer.reset()
+        tracer.enabled = True
+        self.addCleanup(setattr, tracer, "enabled", False)
+        self.addCleanup(tracer.reset)
+
+        patcher = patch.dict(dispatcher_module.name_to_function, {
+            "get_file_content": lambda working_directory, file_path: f"contents of {file_path}",
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spans_for_iterations_model_and_tools(self):
+        call = lambda path: types.Part(function_call=types.FunctionCall(name="get_file_content", args={"file_path": path}))
+        client = SimpleNamespace(models=ScriptedModels([
+            response(call("a.py"), call("b.py")),
+            response(types.Part(text="done"), prompt_tokens=40, response_tokens=2),
+        ]))
+
+        messages = [types.Content(role="user", parts=[types.Part(text="read a and b")])]
+        with redirect_stdout(io.StringIO()):
+            generate_content(client, messages, verbose=False, max_tool_workers=2)
+
+        spans = tracer.spans
+        iterations = {span["id"]: span for span in spans if span["kind"] == "iteration"}
+        models = [span for span in spans if span["kind"] == "model"]
+        tools = [span for span in spans if span["kind"] == "tool"]
+
+        self.assertEqual(len(iterations), 2)
+        self.assertEqual(sorted(span["prompt_tokens"] for span in models), [10, 40])
+        self.assertEqual(len(tools), 2)
+        for span in tools:
+            # Tools ran on the dispatcher's threads but still nest under their iteration
+            self.assertEqual(iterations[span["parent"]]["name"], "1")
+            self.assertEqual(span["result_bytes"], len("contents of a.py"))
+            self.assertGreater(span["args_bytes"], 0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            tracer.export(path)
+            with open(path) as f:
+                exported = [json.loads(line) for line in f]
+        self.assertEqual(len(exported), len(spans))
+        self.assertEqual(exported, sorted(exported, key=lambda span: span["start"]))
+
+        summary = tracer.summary()
+        self.assertIn("get_file_content", summary)
+        self.assertIn("iteration", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
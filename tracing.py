@@ -0,0 +1,112 @@
+import contextvars
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Innermost open span of the current thread / asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Records timed spans of an agent run: the run itself, each iteration, each
+    model call and each tool call. A span is a dict of attributes (tokens,
+    argument/result sizes, cache hits, ...) plus its start time, duration and
+    parent span id.
+
+    Spans nest through a contextvar, so tool calls started from an iteration
+    are its children even on the dispatcher's threads (which run each call in
+    a copy of the submitting context) or on other asyncio tasks. While
+    disabled, span() only costs a contextmanager entry.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self._ids = itertools.count(1)
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self._ids = itertools.count(1)
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes):
+        if not self.enabled:
+            yield attributes
+            return
+
+        parent = _current_span.get()
+        span = {
+            "id": next(self._ids),
+            "parent": parent["id"] if parent else None,
+            "kind": kind,
+            "name": name,
+            "thread": threading.current_thread().name,
+        }
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes.setdefault("error", f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span["start"] = round(start - self._origin, 6)
+            span["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            span.update(attributes)
+            with self._lock:
+                self.spans.append(span)
+
+    def annotate(self, **attributes):
+        """Adds attributes to the innermost open span, if there is one."""
+        span = _current_span.get()
+        if span is not None:
+            span.update(attributes)
+
+    def export(self, path: str):
+        """Writes every finished span as one JSON object per line, in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        with open(path, "w") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    def summary(self) -> str:
+        """One row per (kind, name): call count, latency and the summed sizes, tokens and cache hits."""
+        with self._lock:
+            spans = list(self.spans)
+
+        rows = {}
+        for span in spans:
+            row = rows.setdefault((span["kind"], span["name"]), {"durations": [], "totals": {}, "cache_hits": 0, "errors": 0})
+            row["durations"].append(span["duration_ms"])
+            for field in ("args_bytes", "result_bytes", "prompt_tokens", "response_tokens"):
+                if span.get(field) is not None:
+                    row["totals"][field] = row["totals"].get(field, 0) + span[field]
+            row["cache_hits"] += span.get("cache") == "hit"
+            row["errors"] += "error" in span
+
+        header = f"{'kind':<10} {'name':<20} {'calls':>5} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9} {'in':>9} {'out':>9} {'hits':>5} {'errors':>6}"
+        lines = [header, "-" * len(header)]
+        for (kind, name), row in sorted(rows.items(), key=lambda item: -sum(item[1]["durations"])):
+            durations = sorted(row["durations"])
+            totals = row["totals"]
+            # in/out are bytes for tools, tokens for model calls
+            size_in = totals.get("args_bytes", totals.get("prompt_tokens", ""))
+            size_out = totals.get("result_bytes", totals.get("response_tokens", ""))
+            lines.append(
+                f"{kind:<10} {name[:20]:<20} {len(durations):>5} {sum(durations):>10.1f} {sum(durations) / len(durations):>9.1f} "
+                f"{durations[int(0.95 * (len(durations) - 1))]:>9.1f} {durations[-1]:>9.1f} {size_in:>9} {size_out:>9} "
+                f"{row['cache_hits']:>5} {row['errors']:>6}"
+            )
+        return "\n".join(lines)
+
+
+tracer = Tracer()